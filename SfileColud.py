@@ -2,18 +2,31 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter.font import Font
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 import webbrowser
 import json
+import re
 import os
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, urlencode
 import pyperclip
 from dotenv import load_dotenv
 import threading
+import queue
+import asyncio
+import multiprocessing
 import time
 import sv_ttk
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import io
+import hashlib
+import heapq
+import itertools
+from collections import OrderedDict
+import sqlite3
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from logging.handlers import RotatingFileHandler
 import logging
 import sys
@@ -24,10 +37,14 @@ from ttkbootstrap import Style
 from ttkbootstrap.constants import *
 from ttkbootstrap.tooltip import ToolTip
 from ttkbootstrap.dialogs import Messagebox, Querybox
-from ttkbootstrap.scrolled import ScrolledFrame
 from ttkbootstrap.tableview import Tableview
 from ttkbootstrap.validation import add_regex_validation
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # تنظیمات پیشرفته لاگ‌گیری
 def setup_logging():
     """تنظیمات پیشرفته لاگ‌گیری با پشتیبانی از encoding"""
@@ -66,15 +83,240 @@ def setup_logging():
     logger.addHandler(console_handler)
 
 
-# فراخوانی تابع تنظیم لاگ‌گیری
-setup_logging()
-
-# حالا می‌توانید از ماژول logging به صورت معمول استفاده کنید
-logging.info("This is a test log message with UTF-8 characters: üöäç")
+# لاگ‌گیری و متغیرهای محیطی فقط در process اصلی تنظیم می‌شوند (در بلوک __main__)؛
+# processهای کوچک‌سازی تصاویر این ماژول را دوباره import می‌کنند
 logger = logging.getLogger(__name__)
 
-# بارگذاری متغیرهای محیطی
-load_dotenv()
+
+def get_cache_dir():
+    """مسیر پوشه کش برنامه در دایرکتوری کاربر"""
+    if platform.system() == "Windows":
+        base_dir = os.getenv('LOCALAPPDATA') or os.path.expanduser('~')
+    elif platform.system() == "Darwin":
+        base_dir = os.path.expanduser('~/Library/Caches')
+    else:
+        base_dir = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+
+    cache_dir = os.path.join(base_dir, 'SfileCloud')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+class IconRegistry:
+    """ثبت مشترک آیکون‌ها برای کل برنامه
+
+    هر آیکون فقط یک بار رسم می‌شود و اندازه‌های مختلف آن با کلید (name, size)
+    نگه داشته می‌شوند. آیکون‌های اندازه اصلی همیشه نگه داشته می‌شوند (Treeview
+    فقط نام تصویر را نگه می‌دارد)، اما اندازه‌های دیگر با شمارش ارجاع مدیریت
+    می‌شوند و با رسیدن به max_variants، نسخه‌هایی که کسی از آن‌ها استفاده
+    نمی‌کند به ترتیب قدیمی‌ترین حذف می‌شوند. نسخه‌ای که هنوز در ویجتی نمایش
+    داده می‌شود (حتی بدون acquire) حذف نمی‌شود، چون ویجت‌های Tk فقط نام تصویر
+    را نگه می‌دارند و حذف PhotoImage تصویر را از روی ویجت پاک می‌کند.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    icon_size = (24, 24)
+    icon_definitions = {
+        'upload': ("↑", "#4CAF50"),
+        'download': ("↓", "#2196F3"),
+        'folder': ("📁", "#FFC107"),
+        'file': ("📄", "#9E9E9E"),
+        'google': ("G", "#4285F4"),
+        'refresh': ("↻", "#009688"),
+        'back': ("←", "#607D8B"),
+        'up': ("↑", "#795548"),
+        'user': ("👤", "#673AB7"),
+        'settings': ("⚙", "#607D8B"),
+        'info': ("ℹ", "#00BCD4"),
+        'search': ("🔍", "#FF9800"),
+        'share': ("↗", "#E91E63"),
+        'delete': ("🗑", "#F44336"),
+        'edit': ("✏", "#2196F3"),
+        'copy': ("⎘", "#009688"),
+        'paste': ("📋", "#FF9800"),
+        'link': ("🔗", "#3F51B5"),
+        'theme': ("🎨", "#9C27B0"),
+        'exit': ("⏻", "#F44336"),
+        'menu': ("☰", "#000000"),
+        'add': ("+", "#4CAF50"),
+        'success': ("✓", "#4CAF50"),
+        'error': ("✗", "#F44336"),
+        'warning': ("⚠", "#FFC107"),
+        'drive': ("💾", "#4285F4"),
+        'pdf': ("PDF", "#F44336"),
+        'word': ("DOC", "#2196F3"),
+        'text': ("TXT", "#9E9E9E"),
+        'image': ("🖼", "#FF5722"),
+        'video': ("🎬", "#9C27B0"),
+        'audio': ("🎵", "#673AB7"),
+        'cloud': ("☁", "#03A9F4"),
+        'sync': ("🔄", "#8BC34A"),
+        'star': ("★", "#FFC107")
+    }
+
+    # نوع MIME -> (آیکون، نام نوع)
+    mime_types = {
+        'application/vnd.google-apps.folder': ('folder', "Folder"),
+        'application/pdf': ('pdf', "PDF"),
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ('word', "Word"),
+    }
+    mime_prefixes = {
+        'image': ('image', "Image"),
+        'video': ('video', "Video"),
+        'audio': ('audio', "Audio"),
+        'text': ('text', "Text"),
+    }
+
+    def __init__(self, max_variants=128):
+        self.max_variants = max_variants
+        self._lock = threading.RLock()
+        self._base_images = {}  # name -> PIL Image
+        self._photos = {}  # name -> PhotoImage در اندازه اصلی
+        self._variants = OrderedDict()  # (name, size) -> PhotoImage
+        self._refcounts = {}
+        self._mime_cache = {}
+
+    @classmethod
+    def shared(cls):
+        """نمونه مشترک بین تمام پنجره‌ها"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def create_text_icon(text, color, size):
+        """ایجاد آیکون متنی با کیفیت بالا"""
+        img = Image.new('RGBA', size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+
+        try:
+            font = ImageFont.truetype("arial.ttf", int(size[0] * 0.7))
+        except:
+            font = ImageFont.load_default()
+
+        draw.text(
+            (size[0] // 2, size[1] // 2),
+            text,
+            fill=color,
+            font=font,
+            anchor="mm"
+        )
+
+        # اضافه کردن سایه برای زیبایی بیشتر
+        draw.text(
+            (size[0] // 2 + 1, size[1] // 2 + 1),
+            text,
+            fill=(0, 0, 0, 128),
+            font=font,
+            anchor="mm"
+        )
+
+        return img
+
+    def register(self, name, image):
+        """ثبت یک تصویر (PIL) به عنوان آیکون پایه"""
+        with self._lock:
+            self._base_images[name] = image.convert("RGBA")
+            self._photos.pop(name, None)
+            for key in [key for key in self._variants if key[0] == name]:
+                del self._variants[key]
+
+    def has(self, name):
+        return name in self._base_images or name in self.icon_definitions
+
+    def _base_image(self, name):
+        image = self._base_images.get(name)
+        if image is None and name in self.icon_definitions:
+            text, color = self.icon_definitions[name]
+            image = self._base_images[name] = self.create_text_icon(text, color, self.icon_size)
+        return image
+
+    def get(self, name, size=None):
+        """دریافت آیکون؛ هر (name, size) فقط یک بار ساخته می‌شود"""
+        with self._lock:
+            base = self._base_image(name)
+            if base is None:
+                return None
+
+            size = tuple(size) if size else None
+            if size is None or size == base.size:
+                photo = self._photos.get(name)
+                if photo is None:
+                    photo = self._photos[name] = ImageTk.PhotoImage(base)
+                return photo
+
+            key = (name, size)
+            photo = self._variants.get(key)
+            if photo is None:
+                photo = self._variants[key] = ImageTk.PhotoImage(base.resize(size, Image.LANCZOS))
+                self._evict()
+            else:
+                self._variants.move_to_end(key)
+            return photo
+
+    def acquire(self, name, size=None):
+        """دریافت آیکون و ثبت استفاده از آن تا زمان release حذف نشود"""
+        with self._lock:
+            photo = self.get(name, size)
+            if photo is not None and size:
+                key = (name, tuple(size))
+                self._refcounts[key] = self._refcounts.get(key, 0) + 1
+            return photo
+
+    def release(self, name, size=None):
+        with self._lock:
+            if not size:
+                return
+
+            key = (name, tuple(size))
+            count = self._refcounts.get(key, 0) - 1
+            if count > 0:
+                self._refcounts[key] = count
+            else:
+                self._refcounts.pop(key, None)
+                self._evict()
+
+    def _evict(self):
+        """حذف قدیمی‌ترین اندازه‌هایی که ارجاعی به آن‌ها ثبت نشده و در هیچ ویجتی نمایش داده نمی‌شوند"""
+        excess = len(self._variants) - self.max_variants
+        if excess <= 0:
+            return
+
+        evicted = []
+        for key, photo in self._variants.items():
+            if len(evicted) == excess:
+                break
+            if key not in self._refcounts and not self._in_use(photo):
+                evicted.append(key)
+
+        for key in evicted:
+            del self._variants[key]
+
+    @staticmethod
+    def _in_use(photo):
+        """آیا ویجتی (Label، Button، ردیف Treeview و ...) هنوز این تصویر را نشان می‌دهد"""
+        try:
+            return photo.tk.getboolean(photo.tk.call('image', 'inuse', str(photo)))
+        except tk.TclError:
+            return False
+
+    def describe(self, mime_type):
+        """نام آیکون و نوع خوانا برای یک نوع MIME (با جدول از پیش محاسبه شده)"""
+        result = self._mime_cache.get(mime_type)
+        if result is None:
+            result = self.mime_types.get(mime_type)
+            if result is None:
+                result = self.mime_prefixes.get(mime_type.split('/', 1)[0])
+            if result is None:
+                result = ('file', mime_type.split('/')[-1].title())
+            self._mime_cache[mime_type] = result
+        return result
+
+    def icon_for(self, mime_type, size=None):
+        return self.get(self.describe(mime_type)[0], size)
 
 
 class AppAssets:
@@ -159,78 +401,14 @@ class AppAssets:
         widget.geometry(original_geom)
 
     def load_menu_icons(self):
-        """بارگذاری آیکون‌های منو با کیفیت بالا"""
-        icon_definitions = {
-            'upload': ("↑", "#4CAF50"),
-            'download': ("↓", "#2196F3"),
-            'folder': ("📁", "#FFC107"),
-            'file': ("📄", "#9E9E9E"),
-            'google': ("G", "#4285F4"),
-            'refresh': ("↻", "#009688"),
-            'back': ("←", "#607D8B"),
-            'up': ("↑", "#795548"),
-            'user': ("👤", "#673AB7"),
-            'settings': ("⚙", "#607D8B"),
-            'info': ("ℹ", "#00BCD4"),
-            'search': ("🔍", "#FF9800"),
-            'share': ("↗", "#E91E63"),
-            'delete': ("🗑", "#F44336"),
-            'edit': ("✏", "#2196F3"),
-            'copy': ("⎘", "#009688"),
-            'paste': ("📋", "#FF9800"),
-            'link': ("🔗", "#3F51B5"),
-            'theme': ("🎨", "#9C27B0"),
-            'exit': ("⏻", "#F44336"),
-            'menu': ("☰", "#000000"),
-            'add': ("+", "#4CAF50"),
-            'success': ("✓", "#4CAF50"),
-            'error': ("✗", "#F44336"),
-            'warning': ("⚠", "#FFC107"),
-            'drive': ("💾", "#4285F4"),
-            'pdf': ("PDF", "#F44336"),
-            'word': ("DOC", "#2196F3"),
-            'text': ("TXT", "#9E9E9E"),
-            'image': ("🖼", "#FF5722"),
-            'video': ("🎬", "#9C27B0"),
-            'audio': ("🎵", "#673AB7"),
-            'cloud': ("☁", "#03A9F4"),
-            'sync': ("🔄", "#8BC34A"),
-            'star': ("★", "#FFC107")
-        }
-
-        for name, (text, color) in icon_definitions.items():
-            img = self.create_text_icon(text, color, (24, 24))  # اندازه بزرگتر برای کیفیت بهتر
-            self.images[name] = ImageTk.PhotoImage(img)
-            self._photo_images.append(self.images[name])
+        """بارگذاری آیکون‌های منو از ثبت مشترک آیکون‌ها (هر آیکون فقط یک بار رسم می‌شود)"""
+        registry = IconRegistry.shared()
+        for name in registry.icon_definitions:
+            self.images[name] = registry.get(name)
 
     def create_text_icon(self, text, color, size):
         """ایجاد آیکون متنی با کیفیت بالا"""
-        img = Image.new('RGBA', size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-
-        try:
-            font = ImageFont.truetype("arial.ttf", int(size[0] * 0.7))
-        except:
-            font = ImageFont.load_default()
-
-        draw.text(
-            (size[0] // 2, size[1] // 2),
-            text,
-            fill=color,
-            font=font,
-            anchor="mm"
-        )
-
-        # اضافه کردن سایه برای زیبایی بیشتر
-        draw.text(
-            (size[0] // 2 + 1, size[1] // 2 + 1),
-            text,
-            fill=(0, 0, 0, 128),
-            font=font,
-            anchor="mm"
-        )
-
-        return img
+        return IconRegistry.create_text_icon(text, color, size)
 
     def load_custom_images(self):
         """بارگذاری تصاویر سفارشی با کیفیت بالا"""
@@ -241,7 +419,12 @@ class AppAssets:
             'background': ('assets/bg_pattern.png', None)
         }
 
+        registry = IconRegistry.shared()
         for name, (path, size) in image_specs.items():
+            if registry.has(name):
+                self.images[name] = registry.get(name)
+                continue
+
             try:
                 base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
                 full_path = os.path.join(base_path, path)
@@ -252,9 +435,8 @@ class AppAssets:
                         img = img.resize(size, Image.LANCZOS)
 
                     # بهبود کیفیت تصاویر
-                    img = img.convert("RGBA")
-                    self.images[name] = ImageTk.PhotoImage(img)
-                    self._photo_images.append(self.images[name])
+                    registry.register(name, img)
+                    self.images[name] = registry.get(name)
                 else:
                     logger.warning(f"Image not found: {full_path}")
             except Exception as e:
@@ -278,8 +460,8 @@ class AppAssets:
             draw = ImageDraw.Draw(img)
             draw.ellipse((20, 20, 180, 180), fill='#1e3c72', outline='white', width=5)
             draw.text((100, 100), "SC", fill="white", font=ImageFont.load_default(size=72), anchor="mm")
-            self.images['logo'] = ImageTk.PhotoImage(img)
-            self._photo_images.append(self.images['logo'])
+            IconRegistry.shared().register('logo', img)
+            self.images['logo'] = IconRegistry.shared().get('logo')
 
             # تصویر splash پیش‌فرض با طراحی بهتر
             img = Image.new('RGB', (500, 300), color='#f8f9fa')
@@ -288,8 +470,8 @@ class AppAssets:
             draw.text((250, 40), "SfileCloud Professional", fill="white", font=ImageFont.load_default(size=24),
                       anchor="mm")
             draw.text((250, 170), "Loading...", fill="#4b6cb7", font=ImageFont.load_default(size=18), anchor="mm")
-            self.images['splash'] = ImageTk.PhotoImage(img)
-            self._photo_images.append(self.images['splash'])
+            IconRegistry.shared().register('splash', img)
+            self.images['splash'] = IconRegistry.shared().get('splash')
 
         except Exception as e:
             logger.error(f"Error creating fallback assets: {e}")
@@ -309,13 +491,10 @@ class AppAssets:
                 pass
 
     def get_icon(self, name, size=None):
-        """دریافت آیکون با امکان تغییر اندازه"""
-        if size and name in self.images:
-            img = ImageTk.getimage(self.images[name])
-            img = img.resize(size, Image.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
-            self._photo_images.append(photo)
-            return photo
+        """دریافت آیکون با امکان تغییر اندازه؛ اندازه‌های مختلف در ثبت مشترک نگه داشته می‌شوند"""
+        registry = IconRegistry.shared()
+        if registry.has(name):
+            return registry.get(name, size)
         return self.images.get(name)
 
     def copy_item(self, item=None):
@@ -416,6 +595,10 @@ class EnhancedLanguageManager:
         except Exception as e:
             logger.error(f"Error loading cloud translations: {e}")
 
+    def gettext(self, message):
+        """ترجمه متن به زبان فعلی؛ در نبود ترجمه خود متن برگردانده می‌شود"""
+        return self.translations.get(self.current_lang, lambda x: x)(message)
+
     def load_rtl_support(self):
         """بارگذاری تنظیمات راست به چپ"""
         self.rtl_languages = ["fa", "ar", "he"]
@@ -429,10 +612,10 @@ class EnhancedLanguageManager:
             self.current_lang = lang_code
             self.text_direction = "rtl" if lang_code in self.rtl_languages else "ltr"
 
-            if lang_code == "en":
-                self.en_trans.install()
-            else:
-                self.fa_trans.install()
+            # در نبود فایل‌های ترجمه فقط ترجمه پیش‌فرض وجود دارد
+            translation = getattr(self, f"{lang_code}_trans", None)
+            if translation is not None:
+                translation.install()
 
             self.apply_language_settings()
             return True
@@ -456,13 +639,8 @@ class EnhancedLanguageManager:
             size=font_settings["size"]
         )
 
-        # اعمال به تمام ویجت‌ها
-        widgets = [ttk.Label, ttk.Button, ttk.Entry, ttk.Checkbutton]
-        for widget in widgets:
-            widget.configure(font=default_font)
-
-        # تنظیم جهت متن
-        ttk.Style().configure('.', direction='rtl')
+        # اعمال به تمام ویجت‌ها و تنظیم جهت متن
+        ttk.Style().configure('.', font=default_font, direction='rtl')
 
     def apply_ltr_settings(self):
         """اعمال تنظیمات چپ به راست"""
@@ -472,11 +650,7 @@ class EnhancedLanguageManager:
             size=9
         )
 
-        widgets = [ttk.Label, ttk.Button, ttk.Entry, ttk.Checkbutton]
-        for widget in widgets:
-            widget.configure(font=default_font)
-
-        ttk.Style().configure('.', direction='ltr')
+        ttk.Style().configure('.', font=default_font, direction='ltr')
 
     def get_direction(self):
         """دریافت جهت متن فعلی"""
@@ -802,2667 +976,6975 @@ class ModernAboutWindow(tk.Toplevel):
         copyright_label.place(relx=0.5, rely=0.5, anchor="center")
 
 
-class EnhancedDriveFileManager:
-    """مدیریت فایل‌های گوگل درایو با بهینه‌سازی‌های پیشرفته"""
-
-    def __init__(self, client_config):
-        self.client_config = client_config
-        self.access_token = None
-        self.refresh_token = None
-        self.token_expiry = None
-        self.user_info = {}
-        self.current_folder_id = "root"
-        self.folder_stack = ["root"]
-        self.lang = EnhancedLanguageManager()
-        self._ = self.lang.gettext
-        self.file_cache = {}
-        self.cache_expiry = 300  # 5 دقیقه
-        self.setup_retry_strategy()
+class DriveHttpSession:
+    """لایه مشترک HTTP با connection pooling و keep-alive برای APIهای گوگل"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    # APIهای گوگل فقط برای user agentهای شامل «gzip» پاسخ فشرده ارسال می‌کنند
+    user_agent = "SfileCloud/1.0 (gzip)"
+
+    def __init__(self, pool_size=10, timeout=30, media_pool_size=18):
+        self.pool_size = pool_size
+        self.media_pool_size = media_pool_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._media_session = None
+
+    @classmethod
+    def shared(cls, pool_size=None):
+        """دریافت نمونه مشترک بین تمام بخش‌های برنامه"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(pool_size=pool_size or 10)
+            elif pool_size and pool_size != cls._shared.pool_size:
+                cls._shared.set_pool_size(pool_size)
+            return cls._shared
+
+    @property
+    def session(self):
+        """session اصلی که یک بار و به صورت thread-safe ساخته می‌شود"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session(self.pool_size, block=True)
+        return self._session
+
+    @property
+    def media_session(self):
+        """session جداگانه برای دانلودهای alt=media
+
+        اتصال‌های دانلود تا پایان فایل باز می‌مانند؛ با استخر جداگانه، درخواست‌های
+        کوتاه API (لیست‌ها، تغییرات، توکن) هرگز پشت دانلودها منتظر نمی‌مانند.
+        """
+        if self._media_session is None:
+            with self._lock:
+                if self._media_session is None:
+                    self._media_session = self._create_session(self.media_pool_size, block=False)
+        return self._media_session
+
+    def _create_session(self, pool_size, block):
+        """ایجاد session با استخر اتصال‌های قابل استفاده مجدد"""
+        session = requests.Session()
+
+        # هر میزبان (googleapis.com، oauth2 و ...) استخر جداگانه خود را دارد
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            pool_block=block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Connection': 'keep-alive',
+            'Accept-Encoding': 'gzip',
+            'User-Agent': self.user_agent
+        })
+        return session
+
+    def set_pool_size(self, pool_size):
+        """تغییر اندازه استخر اتصال‌ها"""
+        with self._lock:
+            self.pool_size = pool_size
+            old_session, self._session = self._session, None
+
+        if old_session is not None:
+            old_session.close()
+
+    def set_media_pool_size(self, pool_size):
+        """تغییر اندازه استخر دانلودها (دانلودهای همزمان × بخش‌های هر دانلود)"""
+        with self._lock:
+            if pool_size == self.media_pool_size:
+                return
+            self.media_pool_size = pool_size
+            old_session, self._media_session = self._media_session, None
+
+        if old_session is not None:
+            old_session.close()
+
+    def request(self, method, url, **kwargs):
+        """ارسال درخواست روی اتصال‌های باز استخر"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def media_get(self, url, **kwargs):
+        """دریافت محتوای فایل روی استخر دانلودها"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.media_session.get(url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """بستن تمام اتصال‌های باز"""
+        with self._lock:
+            sessions = (self._session, self._media_session)
+            self._session = self._media_session = None
+
+        for session in sessions:
+            if session is not None:
+                session.close()
+
+
+class CredentialsManager:
+    """مدیریت چرخه عمر توکن‌ها: تازه‌سازی پیش از انقضا، تازه‌سازی تکی و ذخیره refresh token
+
+    توکن دسترسی کمی پیش از انقضا با یک تایمر پس‌زمینه تازه می‌شود، پس
+    درخواست‌ها معمولاً به 401 نمی‌رسند. اگر چند thread همزمان 401 بگیرند فقط
+    یک درخواست تازه‌سازی ارسال می‌شود. refresh token در فایلی با دسترسی فقط
+    برای کاربر جاری ذخیره می‌شود تا در اجرای بعدی نیازی به ورود دوباره نباشد.
+    """
+
+    # فاصله تلاش دوباره پس از شکست تازه‌سازی پیش‌دستانه (ثانیه)، با دو برابر شدن تا سقف
+    retry_delay = 30
+    max_retry_delay = 600
+
+    def __init__(self, file_manager, path, refresh_margin=300):
+        self.file_manager = file_manager
+        self.path = path
+        self.refresh_margin = refresh_margin  # ثانیه پیش از انقضا
+        self._refresh_lock = threading.Lock()
+        self._timer = None
+        self._last_refresh = 0
+        self._next_retry_delay = self.retry_delay
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
 
-    def setup_retry_strategy(self):
-        """تنظیم استراتژی تلاش مجدد برای درخواست‌ها"""
-        self.retry_count = 3
-        self.retry_delay = 1  # ثانیه
+    def save(self):
+        """ذخیره refresh token و اطلاعات حساب؛ توکن دسترسی کوتاه‌مدت ذخیره نمی‌شود"""
+        file_manager = self.file_manager
+        if not file_manager.refresh_token:
+            return
 
-    def authenticate(self, auth_code):
-        """احراز هویت با کد مجوز"""
-        token_data = {
-            'code': auth_code,
-            'client_id': self.client_config["installed"]["client_id"],
-            'client_secret': self.client_config["installed"]["client_secret"],
-            'redirect_uri': self.client_config["installed"]["redirect_uris"][0],
-            'grant_type': 'authorization_code'
+        data = {
+            'refresh_token': file_manager.refresh_token,
+            'user_info': file_manager.user_info
         }
+        tmp_path = self.path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """بازیابی refresh token ذخیره شده؛ در صورت وجود True برمی‌گرداند"""
+        data = self._read()
+        if not data.get('refresh_token'):
+            return False
+
+        self.file_manager.refresh_token = data['refresh_token']
+        self.file_manager.user_info = data.get('user_info', {})
+        return True
+
+    def update(self, token_info):
+        """اعمال پاسخ سرور توکن و زمان‌بندی تازه‌سازی بعدی"""
+        file_manager = self.file_manager
+        file_manager.access_token = token_info['access_token']
+        file_manager.token_expiry = time.time() + token_info.get('expires_in', 3600)
+
+        # گوگل در تازه‌سازی معمولاً refresh token جدید نمی‌فرستد
+        if token_info.get('refresh_token'):
+            file_manager.refresh_token = token_info['refresh_token']
+            self.save()
+
+        self._last_refresh = time.time()
+        self._next_retry_delay = self.retry_delay
+        self.schedule()
+
+    def schedule(self):
+        """تنظیم تایمر تازه‌سازی برای کمی پیش از انقضای توکن فعلی"""
+        if not self.file_manager.token_expiry:
+            self.cancel()
+            return
+
+        self._start_timer(max(0, self.file_manager.token_expiry - self.refresh_margin - time.time()))
+
+    def _start_timer(self, delay):
+        self.cancel()
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        if self.refresh():
+            return
+        if not self.file_manager.refresh_token:
+            # refresh token باطل شده است؛ تلاش دوباره فایده‌ای ندارد
+            logger.error("Proactive token refresh failed; login required")
+            return
+
+        # خطای موقت (شبکه، 5xx)؛ تلاش دوباره با فاصله افزایشی
+        delay = self._next_retry_delay
+        self._next_retry_delay = min(delay * 2, self.max_retry_delay)
+        logger.error(f"Proactive token refresh failed; retrying in {delay} seconds")
+        self._start_timer(delay)
+
+    def refresh(self, stale_token=None):
+        """تازه‌سازی توکن دسترسی؛ درخواست‌های همزمان فقط یک بار به سرور می‌روند
+
+        stale_token توکنی است که فراخواننده با آن 401 گرفته است؛ اگر در این فاصله
+        توکن عوض شده باشد نیازی به تازه‌سازی دوباره نیست.
+        """
+        file_manager = self.file_manager
+        with self._refresh_lock:
+            if stale_token is not None and file_manager.access_token != stale_token:
+                return True
+            # فراخواننده‌هایی که منتظر قفل بوده‌اند از نتیجه تازه‌سازی قبلی استفاده می‌کنند
+            if stale_token is None and time.time() - self._last_refresh < 5 and file_manager.access_token:
+                return True
+            if not file_manager.refresh_token:
+                return False
+
+            token_data = {
+                'client_id': file_manager.client_config["installed"]["client_id"],
+                'client_secret': file_manager.client_config["installed"]["client_secret"],
+                'refresh_token': file_manager.refresh_token,
+                'grant_type': 'refresh_token'
+            }
 
-        for attempt in range(self.retry_count):
             try:
-                response = requests.post(
-                    self.client_config["installed"]["token_uri"],
+                response = file_manager.http.post(
+                    file_manager.client_config["installed"]["token_uri"],
                     data=token_data,
-                    timeout=10
+                    timeout=5
                 )
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error refreshing token: {e}")
+                return False
 
-                if response.status_code == 200:
-                    token_info = response.json()
-                    self.access_token = token_info['access_token']
-                    self.refresh_token = token_info.get('refresh_token')
-                    self.token_expiry = time.time() + token_info.get('expires_in', 3600)
-                    self.user_info = self._get_user_info()
-                    return True
-                else:
-                    error_msg = self._("Error getting token: {}\n").format(response.status_code)
-                    if response.status_code == 401:
-                        error_msg += self._("Authentication issue. Please check your Client ID and Client Secret.")
-                    else:
-                        error_msg += response.text
-                    raise Exception(error_msg)
+            if response.status_code == 200:
+                self.update(response.json())
+                return True
 
-            except requests.exceptions.RequestException as e:
-                if attempt == self.retry_count - 1:
-                    raise Exception(self._("Server connection error:\n{}").format(str(e)))
-                time.sleep(self.retry_delay)
+            logger.error(f"Error refreshing token: {response.status_code}")
+            if self._is_invalid_grant(response):
+                # refresh token باطل یا لغو شده است؛ ورود دوباره لازم است
+                self.clear()
+            return False
 
-    def _get_user_info(self):
-        """دریافت اطلاعات کاربر با تلاش مجدد"""
-        if not self.access_token:
-            return {}
+    @staticmethod
+    def _is_invalid_grant(response):
+        """فقط invalid_grant یعنی refresh token دیگر قابل استفاده نیست
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Accept': 'application/json'
-        }
+        سایر خطاهای 400/401 (مثلاً invalid_client یا خطای موقت سرور) نباید
+        اطلاعات ورود ذخیره شده را پاک کنند.
+        """
+        if response.status_code not in (400, 401):
+            return False
+        try:
+            data = response.json()
+        except ValueError:
+            return False
+        return isinstance(data, dict) and data.get('error') == 'invalid_grant'
 
-        for attempt in range(self.retry_count):
-            try:
-                response = requests.get(
-                    "https://www.googleapis.com/oauth2/v2/userinfo",
-                    headers=headers,
-                    timeout=5
-                )
+    def cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
 
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 401 and attempt < self.retry_count - 1:
-                    self._refresh_token()
-                    continue
-                else:
-                    logging.error(f"Error getting user info: {response.status_code}")
-                    break
+    def clear(self):
+        """حذف اطلاعات ورود ذخیره شده"""
+        self.cancel()
+        self.file_manager.refresh_token = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
 
-            except requests.exceptions.RequestException as e:
-                logging.error(f"Error getting user info: {e}")
-                if attempt == self.retry_count - 1:
-                    break
-                time.sleep(self.retry_delay)
 
-        return {}
+class UploadSessionStore:
+    """ذخیره آدرس نشست‌های آپلود روی دیسک برای ازسرگیری پس از قطعی"""
 
-    def _refresh_token(self):
-        """تازه‌سازی توکن دسترسی"""
-        if not self.refresh_token:
-            return False
+    # گوگل نشست‌های آپلود را حدود یک هفته نگه می‌دارد
+    session_lifetime = 6 * 24 * 3600
 
-        token_data = {
-            'client_id': self.client_config["installed"]["client_id"],
-            'client_secret': self.client_config["installed"]["client_secret"],
-            'refresh_token': self.refresh_token,
-            'grant_type': 'refresh_token'
-        }
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
 
+    def _read(self):
         try:
-            response = requests.post(
-                self.client_config["installed"]["token_uri"],
-                data=token_data,
-                timeout=5
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, sessions):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sessions, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        """دریافت آدرس نشست ذخیره شده در صورت معتبر بودن"""
+        with self._lock:
+            entry = self._read().get(key)
+
+        if entry and time.time() - entry['created'] < self.session_lifetime:
+            return entry['uri']
+        return None
+
+    def save(self, key, session_uri):
+        """ذخیره آدرس نشست جدید"""
+        with self._lock:
+            sessions = self._read()
+            now = time.time()
+            sessions = {k: v for k, v in sessions.items() if now - v['created'] < self.session_lifetime}
+            sessions[key] = {'uri': session_uri, 'created': now}
+            self._write(sessions)
+
+    def remove(self, key):
+        """حذف نشست تمام شده یا منقضی"""
+        with self._lock:
+            sessions = self._read()
+            if sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+
+class ResumableUpload:
+    """آپلود قابل ازسرگیری (uploadType=resumable) با ارسال تکه‌تکه فایل"""
+
+    upload_url = "https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable"
+
+    # اندازه تکه‌ها باید مضربی از 256KB باشد
+    chunk_alignment = 256 * 1024
+
+    def __init__(self, file_manager, file_path, metadata, chunk_size, session_store=None, on_complete=None):
+        self.file_manager = file_manager
+        self.file_path = file_path
+        self.metadata = metadata
+        self.chunk_size = max(self.chunk_alignment, chunk_size // self.chunk_alignment * self.chunk_alignment)
+        self.session_store = session_store
+        self.on_complete = on_complete
+        self.total_size = os.path.getsize(file_path)
+        self.session_uri = None
+        self.resumed_from = 0
+        self.result = None
+
+    @property
+    def session_key(self):
+        return self.make_session_key(self.file_path, self.metadata)
+
+    @staticmethod
+    def make_session_key(file_path, metadata):
+        """کلید یکتای نشست بر اساس فایل محلی و مقصد آن"""
+        stat = os.stat(file_path)
+        return json.dumps([
+            os.path.abspath(file_path),
+            stat.st_size,
+            int(stat.st_mtime),
+            metadata.get('name'),
+            metadata.get('parents', [])
+        ])
+
+    def _headers(self, extra=None):
+        headers = {'Authorization': f'Bearer {self.file_manager.access_token}'}
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _start_session(self):
+        """ایجاد نشست آپلود جدید و ذخیره آدرس آن"""
+        for attempt in range(self.file_manager.retry_count):
+            response = self.file_manager.http.post(
+                self.upload_url,
+                headers=self._headers({
+                    'Content-Type': 'application/json; charset=UTF-8',
+                    'X-Upload-Content-Type': self.metadata.get('mimeType', 'application/octet-stream'),
+                    'X-Upload-Content-Length': str(self.total_size)
+                }),
+                data=json.dumps(self.metadata),
+                timeout=10
             )
 
             if response.status_code == 200:
-                token_info = response.json()
-                self.access_token = token_info['access_token']
-                self.token_expiry = time.time() + token_info.get('expires_in', 3600)
-                return True
+                self.session_uri = response.headers['Location']
+                if self.session_store:
+                    self.session_store.save(self.session_key, self.session_uri)
+                return
+            elif response.status_code == 401 and attempt < self.file_manager.retry_count - 1:
+                self.file_manager._refresh_token()
+                continue
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error refreshing token: {e}")
+    def _query_offset(self, retry_auth=True):
+        """پرسیدن تعداد بایت‌های تایید شده از سرور؛ None یعنی نشست منقضی شده"""
+        response = self.file_manager.http.put(
+            self.session_uri,
+            headers=self._headers({
+                'Content-Length': '0',
+                'Content-Range': f'bytes */{self.total_size}'
+            }),
+            timeout=10
+        )
 
-        return False
+        if response.status_code in (200, 201):
+            self._finish(response)
+            return self.total_size
+        elif response.status_code == 308:
+            return self._parse_range(response)
+        elif response.status_code == 401 and retry_auth:
+            self.file_manager._refresh_token()
+            return self._query_offset(retry_auth=False)
+        elif response.status_code in (404, 410):
+            return None
+        raise Exception(f"Error {response.status_code}: {response.text}")
+
+    @classmethod
+    def _parse_range(cls, response):
+        return cls.parse_range_header(response.headers.get('Range'))
+
+    @staticmethod
+    def parse_range_header(byte_range):
+        """استخراج بایت بعدی از هدر Range پاسخ 308 (مثلاً bytes=0-524287)"""
+        if not byte_range:
+            return 0
+        return int(byte_range.rsplit('-', 1)[-1]) + 1
+
+    def _finish(self, response):
+        self.result = response.json()
+        if self.session_store:
+            self.session_store.remove(self.session_key)
+        if self.on_complete:
+            self.on_complete(self.result)
+
+    def _prepare(self):
+        """ازسرگیری نشست قبلی در صورت وجود، در غیر این صورت شروع نشست جدید"""
+        offset = None
+        if self.session_store:
+            self.session_uri = self.session_store.get(self.session_key)
+
+        if self.session_uri:
+            try:
+                offset = self._query_offset()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Could not query upload session: {e}")
 
-    def list_files(self, folder_id=None):
-        """لیست فایل‌ها با کشینگ و تلاش مجدد"""
-        folder_id = folder_id or self.current_folder_id
+            if offset is None and self.session_store:
+                self.session_store.remove(self.session_key)
 
-        # بررسی کش
-        if folder_id in self.file_cache:
-            cached_data, timestamp = self.file_cache[folder_id]
-            if time.time() - timestamp < self.cache_expiry:
-                return cached_data
+        if offset is None:
+            self._start_session()
+            offset = 0
 
-        # اگر در کش نبود، از سرور دریافت کنیم
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Accept': 'application/json'
-        }
+        self.resumed_from = offset
+        return offset
 
-        params = {
-            'pageSize': 100,
-            'fields': "files(id,name,size,mimeType,modifiedTime,shared,thumbnailLink,webContentLink)",
-            'q': f"'{folder_id}' in parents and trashed=false"
-        }
+    def _send_chunk(self, file, offset):
+        """ارسال یک تکه از فایل با تلاش مجدد؛ بازگرداندن بایت بعدی"""
+        file.seek(offset)
+        chunk = file.read(self.chunk_size)
 
-        for attempt in range(self.retry_count):
+        if self.total_size == 0:
+            content_range = 'bytes */0'
+        else:
+            content_range = f'bytes {offset}-{offset + len(chunk) - 1}/{self.total_size}'
+
+        last_attempt = self.file_manager.retry_count - 1
+        for attempt in range(self.file_manager.retry_count):
             try:
-                response = requests.get(
-                    "https://www.googleapis.com/drive/v3/files",
-                    headers=headers,
-                    params=params,
-                    timeout=10
+                response = self.file_manager.http.put(
+                    self.session_uri,
+                    headers=self._headers({
+                        'Content-Length': str(len(chunk)),
+                        'Content-Range': content_range
+                    }),
+                    data=chunk
                 )
-
-                if response.status_code == 200:
-                    files = response.json().get('files', [])
-                    self.file_cache[folder_id] = (files, time.time())
-                    return files
-                elif response.status_code == 401 and attempt < self.retry_count - 1:
-                    self._refresh_token()
-                    headers['Authorization'] = f'Bearer {self.access_token}'
-                    continue
-                else:
-                    raise Exception(f"Error {response.status_code}: {response.text}")
-
             except requests.exceptions.RequestException as e:
-                if attempt == self.retry_count - 1:
-                    if folder_id in self.file_cache:  # استفاده از داده‌های کش شده در صورت خطا
-                        return self.file_cache[folder_id][0]
+                if attempt == last_attempt:
                     raise Exception(str(e))
-                time.sleep(self.retry_delay)
+                response = None
+
+            if response is not None:
+                if response.status_code in (200, 201):
+                    self._finish(response)
+                    return self.total_size
+                elif response.status_code == 308:
+                    return self._parse_range(response)
+                elif response.status_code == 401 and attempt < last_attempt:
+                    self.file_manager._refresh_token()
+                    continue
+                elif response.status_code < 500 or attempt == last_attempt:
+                    raise Exception(f"Error {response.status_code}: {response.text}")
 
-    def upload_file(self, file_path, folder_id=None):
-        """آپلود فایل با نمایش پیشرفت"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+            # پس از قطعی یا خطای موقت سرور، فقط از آخرین بایت تایید شده ادامه می‌دهیم
+            time.sleep(self.file_manager.retry_delay * (2 ** attempt))
+            try:
+                acknowledged = self._query_offset()
+            except requests.exceptions.RequestException:
+                continue
+            if acknowledged is None:
+                raise Exception(self.file_manager._("Upload session expired, please try again"))
+            return acknowledged
 
-        if not os.path.exists(file_path):
-            raise Exception(self._("File does not exist"))
+    def upload(self):
+        """آپلود فایل به صورت generator با گزارش تعداد بایت‌های ارسال شده"""
+        offset = self._prepare()
+        yield offset, self.total_size
 
-        folder_id = folder_id or self.current_folder_id
-        file_name = os.path.basename(file_path)
-        mime_type = 'application/octet-stream'
+        if self.result is not None:
+            return
 
-        try:
-            import mimetypes
-            mime_type = mimetypes.guess_type(file_path)[0] or mime_type
-        except ImportError:
-            pass
+        with open(self.file_path, 'rb') as file:
+            while self.result is None:
+                offset = self._send_chunk(file, offset)
+                yield offset, self.total_size
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}'
-        }
 
-        metadata = {
-            'name': file_name,
-            'mimeType': mime_type
-        }
+class NameSearchIndex:
+    """ایندکس معکوس سه‌حرفی (trigram) روی نام فایل‌ها برای جستجوی فوری هنگام تایپ
 
-        if folder_id != "root":
-            metadata['parents'] = [folder_id]
+    برای هر سه حرف متوالی نام، مجموعه IDهای فایل‌های دارای آن نگهداری می‌شود.
+    کاندیداها از اشتراک کوچک‌ترین مجموعه‌ها به دست می‌آیند و فقط همان‌ها
+    با نام کامل مقایسه می‌شوند، پس هزینه جستجو به تعداد فایل‌ها وابسته نیست.
+    عبارت‌های یک یا دو حرفی با ایندکس پیشوند کلمات جستجو می‌شوند.
+    """
 
-        try:
-            with open(file_path, 'rb') as file:
-                files = {
-                    'data': ('metadata', json.dumps(metadata), 'application/json'),
-                    'file': (file_name, file, mime_type)
-                }
-
-                # آپلود با نمایش پیشرفت
-                response = requests.post(
-                    "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart",
-                    headers=headers,
-                    files=files,
-                    stream=True
-                )
+    word_pattern = re.compile(r'\w+')
 
-                if response.status_code == 200:
-                    # پاکسازی کش مربوط به این پوشه
-                    if folder_id in self.file_cache:
-                        del self.file_cache[folder_id]
-                    return response.json()
-                else:
-                    raise Exception(f"Error {response.status_code}: {response.text}")
+    def __init__(self):
+        self.names = {}  # file_id -> نام نرمال شده
+        self.postings = {}  # trigram -> set(file_id)
+        self.prefixes = {}  # یک یا دو حرف اول هر کلمه -> set(file_id)
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.casefold().split())
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @classmethod
+    def word_prefixes(cls, text):
+        words = cls.word_pattern.findall(text)
+        return {word[:1] for word in words} | {word[:2] for word in words if len(word) > 1}
+
+    def _index_keys(self, name):
+        return [(self.postings, self.trigrams(name)), (self.prefixes, self.word_prefixes(name))]
+
+    def add(self, file_id, name):
+        name = self.normalize(name or '')
+        if self.names.get(file_id) == name:
+            return
+
+        self.remove(file_id)
+        self.names[file_id] = name
+        for postings, keys in self._index_keys(name):
+            for key in keys:
+                postings.setdefault(key, set()).add(file_id)
+
+    def remove(self, file_id):
+        name = self.names.pop(file_id, None)
+        if name is None:
+            return
+
+        for postings, keys in self._index_keys(name):
+            for key in keys:
+                ids = postings.get(key)
+                if ids:
+                    ids.discard(file_id)
+                    if not ids:
+                        del postings[key]
+
+    def _candidates(self, terms):
+        empty = set()
+        sets = []
+        for term in terms:
+            if len(term) < 3:
+                # عبارت کوتاه فقط با ابتدای کلمات تطبیق داده می‌شود
+                sets.append(self.prefixes.get(term, empty))
+            else:
+                sets.extend(self.postings.get(gram, empty) for gram in self.trigrams(term))
+
+        sets.sort(key=len)
+        candidates = set(sets[0])
+        for ids in sets[1:]:
+            if not candidates:
+                break
+            candidates &= ids
+        return candidates
+
+    @staticmethod
+    def _rank(name, query, word_starts):
+        """امتیاز تطابق؛ عدد کمتر یعنی نتیجه بهتر
+
+        رتبه 2 یعنی هر کلمه جستجو در ابتدای یک کلمه نام (پس از فاصله یا علامت) آمده است.
+        """
+        if name == query:
+            return 0
+        if name.startswith(query):
+            return 1
+        if all(pattern.search(name) for pattern in word_starts):
+            return 2
+        return 3
+
+    def search(self, query, limit=200):
+        """IDهای فایل‌هایی که نامشان شامل تمام کلمات جستجو است، به ترتیب امتیاز"""
+        query = self.normalize(query)
+        terms = query.split()
+        if not terms:
+            return []
+
+        names = self.names
+        word_starts = [re.compile(r'(?<!\w)' + re.escape(term)) for term in terms]
+        long_terms = [term for term in terms if len(term) >= 3]
+        matches = (
+            (self._rank(names[file_id], query, word_starts), len(names[file_id]), names[file_id], file_id)
+            for file_id in self._candidates(terms)
+            if all(term in names[file_id] for term in long_terms)
+        )
+        return [file_id for *_, file_id in heapq.nsmallest(limit, matches)]
 
-        except Exception as e:
-            raise Exception(str(e))
+    def clear(self):
+        self.names.clear()
+        self.postings.clear()
+        self.prefixes.clear()
 
-    def download_file(self, file_id, save_path):
-        """دانلود فایل با نمایش پیشرفت"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}'
+class DriveMetadataIndex:
+    """ایندکس درون‌حافظه‌ای متادیتای فایل‌ها بر اساس ID با ایندکس‌های ثانویه"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.by_id = {}
+        self.by_parent_name = {}  # (parent_id, name) -> set(file_id)
+        self.by_mime_type = {}  # mime_type -> set(file_id)
+        self.names = NameSearchIndex()
+
+    def _link(self, record):
+        for parent_id in record.get('parents', []):
+            self.by_parent_name.setdefault((parent_id, record.get('name')), set()).add(record['id'])
+        self.by_mime_type.setdefault(record.get('mimeType'), set()).add(record['id'])
+        self.names.add(record['id'], record.get('name'))
+
+    def _unlink(self, record):
+        for parent_id in record.get('parents', []):
+            key = (parent_id, record.get('name'))
+            ids = self.by_parent_name.get(key)
+            if ids:
+                ids.discard(record['id'])
+                if not ids:
+                    del self.by_parent_name[key]
+
+        ids = self.by_mime_type.get(record.get('mimeType'))
+        if ids:
+            ids.discard(record['id'])
+            if not ids:
+                del self.by_mime_type[record.get('mimeType')]
+
+    def add(self, file, parent_id=None):
+        """افزودن یا به‌روزرسانی یک فایل؛ فیلدهای جدید با فیلدهای قبلی ادغام می‌شوند"""
+        with self._lock:
+            old_record = self.by_id.get(file['id'])
+            if old_record:
+                self._unlink(old_record)
+
+            record = dict(old_record or {})
+            record.update(file)
+            if parent_id:
+                record['parents'] = [parent_id]
+
+            self.by_id[record['id']] = record
+            self._link(record)
+            return record
+
+    def add_many(self, files, parent_id=None):
+        """افزودن گروهی فایل‌های یک لیست؛ رکوردهای ادغام شده برگردانده می‌شوند"""
+        with self._lock:
+            return [self.add(file, parent_id) for file in files]
+
+    def remove(self, file_id):
+        """حذف فایل از تمام ایندکس‌ها"""
+        with self._lock:
+            record = self.by_id.pop(file_id, None)
+            if record:
+                self._unlink(record)
+                self.names.remove(file_id)
+            return record
+
+    def add_missing(self, files):
+        """افزودن فایل‌هایی که هنوز در ایندکس نیستند؛ رکوردهای تازه‌تر موجود بازنویسی نمی‌شوند"""
+        with self._lock:
+            for file in files:
+                if file['id'] not in self.by_id:
+                    self.add(file)
+
+    def get(self, file_id):
+        """دریافت متادیتای فایل با ID"""
+        return self.by_id.get(file_id)
+
+    def find(self, parent_id, name):
+        """یافتن فایل‌ها با نام در یک پوشه (نام‌ها ممکن است تکراری باشند)"""
+        with self._lock:
+            return [self.by_id[file_id] for file_id in self.by_parent_name.get((parent_id, name), ())]
+
+    def find_by_mime_type(self, mime_type):
+        """یافتن تمام فایل‌های یک نوع"""
+        with self._lock:
+            return [self.by_id[file_id] for file_id in self.by_mime_type.get(mime_type, ())]
+
+    def search_names(self, query, limit=200):
+        """جستجوی فوری نام فایل‌ها در تمام فایل‌های شناخته شده"""
+        with self._lock:
+            return [self.by_id[file_id] for file_id in self.names.search(query, limit)]
+
+    def clear(self):
+        """پاکسازی ایندکس"""
+        with self._lock:
+            self.by_id.clear()
+            self.by_parent_name.clear()
+            self.by_mime_type.clear()
+            self.names.clear()
+
+
+class MetadataStore:
+    """ذخیره‌ساز دائمی متادیتا (SQLite) برای نمایش فوری آخرین وضعیت درایو در شروع برنامه"""
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS files (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS listings (
+            folder_id TEXT PRIMARY KEY,
+            file_ids TEXT NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS kv (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS thumbnails (
+            file_id TEXT PRIMARY KEY,
+            modified TEXT,
+            digest TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        """اتصال پایگاه داده که در اولین استفاده باز می‌شود"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(self.schema)
+            return self._conn
+
+    def save_listing(self, folder_id, files, updated=None):
+        """ذخیره لیست کامل یک پوشه"""
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (id, data) VALUES (?, ?)",
+                [(f['id'], json.dumps(f)) for f in files]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO listings (folder_id, file_ids, updated) VALUES (?, ?, ?)",
+                (folder_id, json.dumps([f['id'] for f in files]), updated or time.time())
+            )
+            self.conn.commit()
+
+    def load_listing(self, folder_id):
+        """بازیابی لیست ذخیره شده یک پوشه به صورت (files, updated)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT file_ids, updated FROM listings WHERE folder_id = ?",
+                (folder_id,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            file_ids = json.loads(row[0])
+            records = {}
+            # محدودیت تعداد پارامترهای SQLite
+            for i in range(0, len(file_ids), 500):
+                batch = file_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for file_id, data in self.conn.execute(
+                        f"SELECT id, data FROM files WHERE id IN ({placeholders})", batch):
+                    records[file_id] = json.loads(data)
+
+        # فایل‌های حذف شده نادیده گرفته می‌شوند
+        files = [records[file_id] for file_id in file_ids if file_id in records]
+        return files, row[1]
+
+    def load_listing_ids(self, folder_id):
+        """IDهای لیست ذخیره شده یک پوشه بدون خواندن رکوردها"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT file_ids FROM listings WHERE folder_id = ?",
+                (folder_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_listings_containing(self, file_ids):
+        """پوشه‌هایی که لیست ذخیره شده آن‌ها شامل این IDهاست؛ خروجی folder_id -> set(file_id)
+
+        جستجو با LIKE در خود SQLite انجام می‌شود و لیست‌های بدون تطابق رمزگشایی نمی‌شوند.
+        """
+        found = {}
+        with self._lock:
+            for file_id in file_ids:
+                for (folder_id,) in self.conn.execute(
+                        "SELECT folder_id FROM listings WHERE file_ids LIKE ?",
+                        (f'%{json.dumps(file_id)}%',)):
+                    found.setdefault(folder_id, set()).add(file_id)
+        return found
+
+    def update_listings(self, listing_ids, files=(), deleted_ids=()):
+        """نوشتن تغییرات در یک تراکنش: رکوردهای تغییر کرده، رکوردهای حذف شده و لیست IDهای پوشه‌ها
+
+        زمان به‌روزرسانی لیست‌ها تغییر نمی‌کند چون لیست دوباره از سرور دریافت نشده است.
+        """
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (id, data) VALUES (?, ?)",
+                [(f['id'], json.dumps(f)) for f in files]
+            )
+            self.conn.executemany(
+                "DELETE FROM files WHERE id = ?",
+                [(file_id,) for file_id in deleted_ids]
+            )
+            self.conn.executemany(
+                "UPDATE listings SET file_ids = ? WHERE folder_id = ?",
+                [(json.dumps(file_ids), folder_id) for folder_id, file_ids in listing_ids.items()]
+            )
+            self.conn.commit()
+
+    def save_file(self, file):
+        """ذخیره یا به‌روزرسانی متادیتای یک فایل"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (id, data) VALUES (?, ?)",
+                (file['id'], json.dumps(file))
+            )
+            self.conn.commit()
+
+    def delete_file(self, file_id):
+        """حذف متادیتای یک فایل"""
+        with self._lock:
+            self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            self.conn.commit()
+
+    def iter_all_files(self, batch_size=5000):
+        """تمام متادیتای ذخیره شده به صورت دسته‌ای"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, data FROM files WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [json.loads(data) for _, data in rows]
+
+    def get_thumbnail(self, file_id, modified):
+        """هش محتوای تصویر کوچک ذخیره شده؛ اگر فایل از آن زمان تغییر کرده باشد None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT digest FROM thumbnails WHERE file_id = ? AND modified IS ?",
+                (file_id, modified)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_thumbnail(self, file_id, modified, digest):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (file_id, modified, digest) VALUES (?, ?, ?)",
+                (file_id, modified, digest)
+            )
+            self.conn.commit()
+
+    def get_value(self, key, default=None):
+        """خواندن یک مقدار از جدول key/value"""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_value(self, key, value):
+        """ذخیره یک مقدار در جدول key/value"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+            self.conn.commit()
+
+    def bind_account(self, account):
+        """پاکسازی داده‌ها در صورت ورود با حساب کاربری دیگر"""
+        if not account:
+            return
+
+        with self._lock:
+            if self.get_value('account') != account:
+                self.clear()
+                self.set_value('account', account)
+
+    def clear(self):
+        """پاکسازی تمام داده‌های ذخیره شده"""
+        with self._lock:
+            self.conn.executescript(
+                "DELETE FROM files; DELETE FROM listings; DELETE FROM kv; DELETE FROM thumbnails;"
+            )
+            self.conn.commit()
+
+    def close(self):
+        """بستن اتصال پایگاه داده"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class DriveChangeTracker:
+    """پیگیری تغییرات درایو با Changes API و اعمال فقط تغییرات جدید روی کش"""
+
+    changes_url = "https://www.googleapis.com/drive/v3/changes"
+    change_fields = (
+        "nextPageToken,newStartPageToken,"
+        "changes(fileId,removed,file(id,name,mimeType,parents,trashed,modifiedTime,size,shared,"
+        "hasThumbnail))"
+    )
+
+    def __init__(self, file_manager, poll_interval=30):
+        self.file_manager = file_manager
+        self.poll_interval = poll_interval
+        self.listeners = []
+        self._poll_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._tracking_since = None
+        self._tracking_loaded = False
+        self.last_success = None  # زمان شروع آخرین poll موفق
+
+    @property
+    def tracking_since(self):
+        """زمان شروع پیگیری تغییرات؛ تغییرات لیست‌های جدیدتر از این زمان با poll اعمال می‌شوند
+
+        مقدار یک بار از پایگاه داده خوانده و در حافظه نگه داشته می‌شود.
+        """
+        if not self._tracking_loaded:
+            self._tracking_since = self.file_manager.store.get_value('changes_tracking_since')
+            self._tracking_loaded = True
+        return self._tracking_since
+
+    def _set_tracking_since(self, value):
+        self.file_manager.store.set_value('changes_tracking_since', value)
+        self._tracking_since = value
+        self._tracking_loaded = True
+
+    def reload_state(self):
+        """خواندن دوباره وضعیت پیگیری پس از پاک شدن پایگاه داده (مثلاً تغییر حساب)"""
+        self._tracking_loaded = False
+        self.last_success = None
+
+    def add_listener(self, callback):
+        """ثبت تابعی که لیست تغییرات اعمال شده را دریافت می‌کند (از thread پس‌زمینه)"""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {self.file_manager.access_token}',
+            'Accept': 'application/json'
         }
 
-        try:
-            with requests.get(
-                    f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media",
-                    headers=headers,
-                    stream=True,
-                    timeout=30
-            ) as response:
+    def _request(self, url, params):
+        """ارسال درخواست به Changes API با تلاش مجدد"""
+        for attempt in range(self.file_manager.retry_count):
+            try:
+                response = self.file_manager.http.get(url, headers=self._headers(), params=params, timeout=10)
 
                 if response.status_code == 200:
-                    total_size = int(response.headers.get('content-length', 0))
-                    downloaded = 0
-
-                    with open(save_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                                downloaded += len(chunk)
-                                yield downloaded, total_size
+                    return response.json()
+                elif response.status_code == 401 and attempt < self.file_manager.retry_count - 1:
+                    self.file_manager._refresh_token()
+                    continue
+                elif response.status_code in (400, 404, 410) and 'pageToken' in params:
+                    # توکن منقضی شده است؛ پیگیری از ابتدا شروع می‌شود
+                    logger.warning("Change token rejected, restarting change tracking")
+                    self.reset()
+                    raise Exception(f"Error {response.status_code}: {response.text}")
                 else:
                     raise Exception(f"Error {response.status_code}: {response.text}")
 
-        except Exception as e:
-            raise Exception(str(e))
-
-    def delete_file(self, file_id):
-        """حذف فایل با به‌روزرسانی کش"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+            except requests.exceptions.RequestException as e:
+                if attempt == self.file_manager.retry_count - 1:
+                    raise Exception(str(e))
+                time.sleep(self.file_manager.retry_delay)
+
+    def _get_start_token(self):
+        """دریافت توکن شروع ذخیره شده یا درخواست توکن جدید"""
+        store = self.file_manager.store
+        token = store.get_value('changes_page_token')
+        if token:
+            return token
+
+        data = self._request(self.changes_url + "/startPageToken", {})
+        token = data['startPageToken']
+        store.set_value('changes_page_token', token)
+        self._set_tracking_since(time.time())
+        return token
+
+    def reset(self):
+        """شروع دوباره پیگیری؛ لیست‌های قبلی دیگر تازه محسوب نمی‌شوند"""
+        self.file_manager.store.set_value('changes_page_token', None)
+        self._set_tracking_since(None)
+        self.last_success = None
+
+    def poll(self):
+        """دریافت و اعمال تغییرات از آخرین توکن؛ بازگرداندن لیست تغییرات اعمال شده"""
+        if not self.file_manager.access_token:
+            return []
+
+        applied = []
+        with self._poll_lock:
+            started = time.time()
+            self.file_manager.get_root_id()
+            token = self._get_start_token()
+
+            while token:
+                data = self._request(self.changes_url, {
+                    'pageToken': token,
+                    'pageSize': 1000,
+                    'includeRemoved': 'true',
+                    'spaces': 'drive',
+                    'fields': self.change_fields
+                })
+
+                # تغییرات هر صفحه یکجا و پیش از ذخیره توکن صفحه بعد نوشته می‌شوند
+                pending = self.file_manager.pending_changes()
+                for change in data.get('changes', []):
+                    delta = self.file_manager.apply_change(change, pending)
+                    if delta:
+                        applied.append(delta)
+                self.file_manager.flush_changes(pending)
+
+                if 'newStartPageToken' in data:
+                    self.file_manager.store.set_value('changes_page_token', data['newStartPageToken'])
+                    break
+                token = data.get('nextPageToken')
+                self.file_manager.store.set_value('changes_page_token', token)
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}'
-        }
+            # تمام تغییرات تا زمان شروع این poll روی کش اعمال شده‌اند
+            self.last_success = started
 
-        try:
-            # ابتدا اطلاعات فایل را دریافت می‌کنیم تا پوشه والد را بدانیم
-            file_info = self.get_file_info(file_id)
-            parent_id = file_info.get('parents', ['root'])[0]
+        if applied:
+            for listener in list(self.listeners):
+                try:
+                    listener(applied)
+                except Exception as e:
+                    logger.error(f"Error in change listener: {e}")
 
-            response = requests.delete(
-                f"https://www.googleapis.com/drive/v3/files/{file_id}",
-                headers=headers
-            )
+        return applied
 
-            if response.status_code == 204:
-                # پاکسازی کش مربوط به پوشه والد
-                if parent_id in self.file_cache:
-                    del self.file_cache[parent_id]
-            else:
-                raise Exception(f"Error {response.status_code}: {response.text}")
+    def start(self):
+        """شروع بررسی دوره‌ای تغییرات در پس‌زمینه"""
+        if self._thread and self._thread.is_alive():
+            return
 
-        except Exception as e:
-            raise Exception(str(e))
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
-    def get_file_info(self, file_id):
-        """دریافت اطلاعات یک فایل خاص"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+    def stop(self):
+        """توقف بررسی دوره‌ای تغییرات"""
+        self._stop_event.set()
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Accept': 'application/json'
-        }
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling drive changes: {e}")
+            self._stop_event.wait(self.poll_interval)
 
-        params = {
-            'fields': 'id,name,parents,mimeType'
-        }
 
-        try:
-            response = requests.get(
-                f"https://www.googleapis.com/drive/v3/files/{file_id}",
-                headers=headers,
-                params=params,
-                timeout=5
-            )
+class FolderTree:
+    """درخت پوشه‌ها بر پایه اشاره‌گرهای والد ایندکس متادیتا
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Error {response.status_code}: {response.text}")
+    نام و والد هر پوشه دیده شده از قبل در ایندکس وجود دارد، پس مسیر نمایشی
+    بدون درخواست شبکه ساخته می‌شود و تبدیل مسیر به ID برای بخش‌های شناخته
+    شده هزینه‌ای ندارد؛ فقط برای بخش‌های ناشناخته یک درخواست در هر سطح لازم است.
+    """
 
-        except Exception as e:
-            raise Exception(str(e))
+    folder_mime_type = 'application/vnd.google-apps.folder'
 
-    def rename_file(self, file_id, new_name):
-        """تغییر نام فایل با به‌روزرسانی کش"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+    def __init__(self, file_manager):
+        self.file_manager = file_manager
+        self.index = file_manager.index
+        self._ = file_manager._
+
+    def is_root(self, folder_id):
+        return folder_id == 'root' or (folder_id is not None and folder_id == self.file_manager.root_id)
+
+    def _fetch(self, folder_id):
+        """دریافت نام و والد یک پوشه ناشناخته و افزودن آن به ایندکس"""
+        self.file_manager.get_root_id()
+        info = self.file_manager.get_file_info(folder_id, fields='id,name,parents,mimeType')
+        info['parents'] = self.file_manager._normalize_parents(info.get('parents'))
+        return self.index.add(info)
+
+    def parent_of(self, folder_id, fetch=False):
+        """ID پوشه والد؛ اگر والد شناخته شده نباشد و fetch فعال نباشد None"""
+        if self.is_root(folder_id):
+            return None
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
+        record = self.index.get(folder_id)
+        if (record is None or not record.get('parents')) and fetch:
+            record = self._fetch(folder_id)
+        if not record or not record.get('parents'):
+            return None
 
-        data = {
-            'name': new_name
-        }
+        parent_id = record['parents'][0]
+        return 'root' if self.is_root(parent_id) else parent_id
+
+    def ancestors(self, folder_id, fetch=False):
+        """زنجیره (id, name) از پوشه تا ریشه؛ complete نشان می‌دهد که به ریشه رسیده‌ایم
+
+        خروجی (chain, complete) است و chain از ریشه به سمت پوشه مرتب شده است.
+        """
+        chain = []
+        seen = set()
+        while not self.is_root(folder_id):
+            if folder_id in seen:
+                return list(reversed(chain)), False
+            seen.add(folder_id)
+
+            record = self.index.get(folder_id)
+            if (record is None or 'name' not in record or not record.get('parents')) and fetch:
+                record = self._fetch(folder_id)
+            if record is None or 'name' not in record:
+                return list(reversed(chain)), False
+
+            chain.append((folder_id, record['name']))
+            if not record.get('parents'):
+                # پوشه اشتراکی یا خارج از My Drive
+                return list(reversed(chain)), False
+            folder_id = record['parents'][0]
+
+        return list(reversed(chain)), True
+
+    def breadcrumb(self, folder_id):
+        """مسیر نمایشی پوشه فقط از داده‌های کش شده؛ خروجی (names, complete)"""
+        chain, complete = self.ancestors(folder_id)
+        names = ["Drive"] + ([] if complete else ["…"])
+        return names + [name for _, name in chain], complete
+
+    def find_child(self, parent_id, name):
+        """یافتن زیرپوشه با نام؛ ابتدا در ایندکس و در صورت نبود با یک درخواست"""
+        for record in self.index.find(parent_id, name):
+            if record.get('mimeType') == self.folder_mime_type:
+                return record['id']
+
+        page = self.file_manager._request_files_page({
+            'q': (
+                f"'{parent_id}' in parents and name = {self.file_manager._quote_query_value(name)} "
+                f"and mimeType = '{self.folder_mime_type}' and trashed = false"
+            ),
+            'fields': 'files(id,name,mimeType,modifiedTime)',
+            'pageSize': 10
+        })
+        folders = (page or {}).get('files', [])
+        self.index.add_many(folders, parent_id)
+        return folders[0]['id'] if folders else None
+
+    def resolve_path(self, path, create=False):
+        """تبدیل مسیری مانند /Projects/2026/raw به ID پوشه
+
+        با create=True پوشه‌های موجود نبودن ساخته می‌شوند؛ در غیر این صورت خطا داده می‌شود.
+        """
+        segments = [segment for segment in path.strip().split('/') if segment]
+        folder_id = 'root'
+
+        for position, name in enumerate(segments):
+            child_id = self.find_child(folder_id, name)
+            if child_id is None:
+                if not create:
+                    raise Exception(
+                        self._("Folder not found: {}").format('/' + '/'.join(segments[:position + 1]))
+                    )
+                child_id = self.file_manager.create_folder(name, folder_id)['id']
+            folder_id = child_id
 
-        try:
-            # ابتدا اطلاعات فایل را دریافت می‌کنیم تا پوشه والد را بدانیم
-            file_info = self.get_file_info(file_id)
-            parent_id = file_info.get('parents', ['root'])[0]
+        return folder_id
 
-            response = requests.patch(
-                f"https://www.googleapis.com/drive/v3/files/{file_id}",
-                headers=headers,
-                json=data
-            )
 
-            if response.status_code == 200:
-                # پاکسازی کش مربوط به پوشه والد
-                if parent_id in self.file_cache:
-                    del self.file_cache[parent_id]
-                return response.json()
-            else:
-                raise Exception(f"Error {response.status_code}: {response.text}")
+class ListingPrefetcher:
+    """دریافت پیش‌دستانه لیست زیرپوشه‌ها پس از باز شدن یک پوشه
 
-        except Exception as e:
-            raise Exception(str(e))
+    کار در استخر کوچکی از threadها و در محدوده بودجه تعداد پوشه و حجم داده
+    انجام می‌شود و نتیجه در کش لیست‌ها قرار می‌گیرد تا ورود به زیرپوشه فوری باشد.
+    هر بارگذاری جدید در رابط کاربری دور قبلی را لغو می‌کند تا پهنای باند
+    درخواست اصلی کاربر گرفته نشود.
+    """
 
-    def share_file(self, file_id, share_type, email=None):
-        """اشتراک‌گذاری فایل با تنظیمات مختلف"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+    folder_mime_type = 'application/vnd.google-apps.folder'
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
+    def __init__(self, file_manager, max_folders=10, max_workers=2, max_bytes=2 * 1024 * 1024):
+        self.file_manager = file_manager
+        self.max_folders = max_folders
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._cancel_event = None
+        self._fetched_bytes = 0
+
+    def prefetch(self, folder_id, files):
+        """شروع دور جدید پیش‌دریافت برای زیرپوشه‌های یک لیست"""
+        self.cancel()
+        if not self.file_manager.access_token or self.max_folders <= 0:
+            return
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_event = cancel_event
+            self._fetched_bytes = 0
+
+        folders = [f['id'] for f in files if f.get('mimeType') == self.folder_mime_type]
+        for child_id in folders[:self.max_folders]:
+            self._executor.submit(self._fetch, child_id, cancel_event)
+
+    def _fetch(self, folder_id, cancel_event):
+        if cancel_event.is_set():
+            return
+
+        with self._lock:
+            if self._fetched_bytes >= self.max_bytes:
+                return
 
-        if share_type.lower() == 'public':
-            permission = {
-                'type': 'anyone',
-                'role': 'reader'
-            }
-        else:
-            if not email:
-                raise Exception(self._("Email address is required for user sharing"))
+        try:
+            # لیست تازه موجود در کش حافظه یا دیسک نیازی به دریافت ندارد
+            _, timestamp = self.file_manager.get_cached_listing(folder_id)
+            if self.file_manager.is_listing_fresh(timestamp):
+                return
 
-            permission = {
-                'type': 'user',
-                'role': 'reader',
-                'emailAddress': email
-            }
+            files = self.file_manager.list_files(folder_id, cancel_event=cancel_event)
+        except Exception as e:
+            logger.debug(f"Prefetch of folder {folder_id} failed: {e}")
+            return
 
-        try:
-            response = requests.post(
-                f"https://www.googleapis.com/drive/v3/files/{file_id}/permissions",
-                headers=headers,
-                json=permission
-            )
+        with self._lock:
+            # تخمین حجم پاسخ برای کنترل بودجه
+            self._fetched_bytes += len(json.dumps(files))
 
-            if response.status_code not in (200, 204):
-                raise Exception(f"Error {response.status_code}: {response.text}")
+    def cancel(self):
+        """لغو دور فعلی؛ درخواست‌های صف شده اجرا نمی‌شوند"""
+        with self._lock:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+                self._cancel_event = None
 
-        except Exception as e:
-            raise Exception(str(e))
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
 
-    def get_storage_info(self):
-        """دریافت اطلاعات فضای ذخیره‌سازی"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
 
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Accept': 'application/json'
-        }
+class DriveBatch:
+    """ارسال گروهی درخواست‌های Drive در یک درخواست multipart/mixed
 
-        try:
-            response = requests.get(
-                "https://www.googleapis.com/drive/v3/about?fields=storageQuota",
-                headers=headers,
-                timeout=5
-            )
+    عملیات‌ها با add اضافه و با execute ارسال می‌شوند. هر درخواست حداکثر
+    max_batch_size عملیات دارد و فقط بخش‌هایی که با خطای موقت (محدودیت نرخ،
+    خطای سرور یا توکن منقضی) مواجه شده‌اند دوباره ارسال می‌شوند.
+    """
 
-            if response.status_code == 200:
-                return response.json().get('storageQuota', {})
-            else:
-                raise Exception(f"Error {response.status_code}: {response.text}")
+    batch_url = "https://www.googleapis.com/batch/drive/v3"
+    max_batch_size = 100
+    retry_statuses = (401, 429, 500, 502, 503, 504)
 
-        except Exception as e:
-            raise Exception(str(e))
+    def __init__(self, file_manager):
+        self.file_manager = file_manager
+        self.operations = []
+
+    def add(self, method, path, body=None, params=None):
+        """افزودن یک عملیات؛ path نسبت به /drive/v3 است (مثلاً files/ID)"""
+        self.operations.append({'method': method, 'path': path, 'body': body, 'params': params})
+        return len(self.operations) - 1
+
+    def execute(self):
+        """ارسال تمام عملیات‌ها؛ خروجی لیست (status, data) به همان ترتیب add"""
+        results = [None] * len(self.operations)
+        pending = list(range(len(self.operations)))
+
+        for attempt in range(self.file_manager.retry_count):
+            failed = []
+            for start in range(0, len(pending), self.max_batch_size):
+                chunk = pending[start:start + self.max_batch_size]
+                for index, result in zip(chunk, self._send(chunk)):
+                    results[index] = result
+                    if self._should_retry(*result):
+                        failed.append(index)
+
+            if not failed or attempt == self.file_manager.retry_count - 1:
+                break
+
+            if any(results[index][0] == 401 for index in failed):
+                self.file_manager._refresh_token()
+            time.sleep(self.file_manager.retry_delay * (2 ** attempt))
+            pending = failed
+
+        return results
+
+    def _should_retry(self, status, data):
+        if status in self.retry_statuses:
+            return True
 
-    def create_folder(self, folder_name, parent_id=None):
-        """ایجاد پوشه جدید"""
-        if not self.access_token:
-            raise Exception(self._("You must authenticate first"))
+        # گوگل محدودیت نرخ کاربر را گاهی با 403 برمی‌گرداند
+        if status == 403 and isinstance(data, dict):
+            errors = data.get('error', {}).get('errors', [])
+            return any(e.get('reason') in ('rateLimitExceeded', 'userRateLimitExceeded') for e in errors)
+        return False
 
-        parent_id = parent_id or self.current_folder_id
+    def _send(self, indexes):
+        """ارسال یک درخواست batch؛ خطای کل درخواست برای همه بخش‌ها ثبت می‌شود"""
+        boundary = f"batch_{int(time.time() * 1000)}"
         headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
-
-        metadata = {
-            'name': folder_name,
-            'mimeType': 'application/vnd.google-apps.folder',
-            'parents': [parent_id]
+            'Authorization': f'Bearer {self.file_manager.access_token}',
+            'Content-Type': f'multipart/mixed; boundary={boundary}'
         }
 
         try:
-            response = requests.post(
-                "https://www.googleapis.com/drive/v3/files",
+            response = self.file_manager.http.post(
+                self.batch_url,
                 headers=headers,
-                json=metadata
+                data=self._build_body(indexes, boundary).encode('utf-8')
             )
+        except requests.exceptions.RequestException as e:
+            return [(503, {'error': {'message': str(e)}})] * len(indexes)
 
-            if response.status_code == 200:
-                # پاکسازی کش مربوط به پوشه والد
-                if parent_id in self.file_cache:
-                    del self.file_cache[parent_id]
-                return response.json()
+        if response.status_code != 200:
+            return [(response.status_code, {'error': {'message': response.text}})] * len(indexes)
+
+        parts = self._parse_response(response.headers.get('Content-Type', ''), response.text)
+        return [
+            parts.get(str(position), (500, {'error': {'message': 'Missing batch response part'}}))
+            for position in range(len(indexes))
+        ]
+
+    def _build_body(self, indexes, boundary):
+        lines = []
+        for position, index in enumerate(indexes):
+            operation = self.operations[index]
+            url = f"/drive/v3/{operation['path']}"
+            if operation['params']:
+                url += '?' + urlencode(operation['params'])
+
+            lines += [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item-{position}>",
+                "",
+                f"{operation['method']} {url} HTTP/1.1",
+            ]
+            if operation['body'] is not None:
+                lines += [
+                    "Content-Type: application/json; charset=UTF-8",
+                    "",
+                    json.dumps(operation['body'])
+                ]
             else:
-                raise Exception(f"Error {response.status_code}: {response.text}")
+                lines.append("")
+            lines.append("")
+
+        lines.append(f"--{boundary}--")
+        return "\r\n".join(lines)
+
+    @staticmethod
+    def _parse_response(content_type, text):
+        """تجزیه پاسخ multipart؛ خروجی دیکشنری شماره بخش -> (status, data)"""
+        boundary = content_type.split('boundary=')[-1].strip().strip('"')
+        text = text.replace('\r\n', '\n')
+        results = {}
+
+        for part in text.split(f"--{boundary}")[1:]:
+            if part.startswith('--'):
+                break
+
+            part_headers, _, http_response = part.strip('\n').partition('\n\n')
+            content_id = next(
+                (line.split(':', 1)[1].strip() for line in part_headers.split('\n')
+                 if line.lower().startswith('content-id')),
+                ''
+            )
+            position = content_id.strip('<>').rsplit('-', 1)[-1]
 
-        except Exception as e:
-            raise Exception(str(e))
+            status_line, _, rest = http_response.partition('\n')
+            # بخش بدون هدر: خط خالی بلافاصله پس از خط وضعیت می‌آید
+            _, _, body = ('\n' + rest).partition('\n\n')
+            try:
+                status = int(status_line.split()[1])
+            except (IndexError, ValueError):
+                continue
 
-    def clear_cache(self):
-        """پاکسازی کش"""
-        self.file_cache = {}
+            body = body.strip()
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = {'error': {'message': body}}
+            results[position] = (status, data)
 
+        return results
 
-class ModernFileBrowser(ttk.Frame):
-    """مرورگر فایل پیشرفته با قابلیت‌های جدید"""
 
-    def __init__(self, parent, file_manager, *args, **kwargs):
-        super().__init__(parent, *args, **kwargs)
-        self.file_manager = file_manager
-        self.assets = AppAssets(parent)
+class EnhancedDriveFileManager:
+    """مدیریت فایل‌های گوگل درایو با بهینه‌سازی‌های پیشرفته"""
+
+    # فیلدهای مورد نیاز هر مصرف‌کننده؛ نتایج نماهای مختلف در ایندکس با هم ادغام می‌شوند
+    field_masks = {
+        'list': "id,name,size,mimeType,modifiedTime,shared,hasThumbnail",
+        'thumbnails': "id,thumbnailLink",
+        'properties': (
+            "id,name,size,mimeType,createdTime,modifiedTime,shared,parents,"
+            "webViewLink,webContentLink,thumbnailLink"
+        ),
+    }
+    listing_fields = f"nextPageToken,files({field_masks['list']})"
+
+    @classmethod
+    def files_fields(cls, view):
+        """پارامتر fields برای files.list با فیلدهای یک نما"""
+        return f"nextPageToken,files({cls.field_masks[view]})"
+
+    def __init__(self, client_config, pool_size=10):
+        self.client_config = client_config
+        self.access_token = None
+        self.refresh_token = None
+        self.token_expiry = None
+        self.user_info = {}
+        self.current_folder_id = "root"
+        self.folder_stack = ["root"]
         self.lang = EnhancedLanguageManager()
         self._ = self.lang.gettext
-        self.selected_files = []
-        self.setup_ui()
-        self.setup_file_preview()
-        self.setup_drag_drop()
+        self.file_cache = {}
+        self.cache_expiry = 300  # 5 دقیقه
+        self.index = DriveMetadataIndex()
+        self.store = MetadataStore(os.path.join(get_cache_dir(), 'metadata.db'))
+        self.root_id = None
+        self.changes = DriveChangeTracker(self)
+        self.folders = FolderTree(self)
+        self.setup_retry_strategy()
+        self.setup_http_session(pool_size)
+        self.credentials = CredentialsManager(self, os.path.join(get_cache_dir(), 'credentials.json'))
+        self.setup_transfer_settings()
+        self.prefetcher = ListingPrefetcher(
+            self,
+            max_folders=self.prefetch_folders,
+            max_workers=self.prefetch_workers,
+            max_bytes=self.prefetch_bytes
+        )
 
-    def setup_ui(self):
-        """تنظیم رابط کاربری پیشرفته"""
-        self.pack(fill=tk.BOTH, expand=True)
+    def setup_retry_strategy(self):
+        """تنظیم استراتژی تلاش مجدد برای درخواست‌ها"""
+        self.retry_count = 3
+        self.retry_delay = 1  # ثانیه
 
-        # نوار ابزار پیشرفته
-        self.create_advanced_toolbar()
+    def setup_http_session(self, pool_size=10):
+        """تنظیم session مشترک HTTP تا همه درخواست‌ها از یک استخر اتصال استفاده کنند"""
+        self.pool_size = pool_size
+        self.http = DriveHttpSession.shared(pool_size)
+        self.max_in_flight = 100  # حداکثر درخواست همزمان در کلاینت asyncio
+        self._async_client = None
+        self._async_client_lock = threading.Lock()
+
+    def get_async_client(self):
+        """کلاینت asyncio مشترک؛ اگر aiohttp نصب نباشد None برمی‌گرداند"""
+        if aiohttp is None:
+            return None
 
-        # مرورگر فایل
-        self.create_modern_file_browser()
+        with self._async_client_lock:
+            if self._async_client is None:
+                self._async_client = AsyncDriveClient(self, self.max_in_flight)
+            return self._async_client
+
+    def setup_transfer_settings(self):
+        """تنظیمات انتقال فایل"""
+        self.upload_chunk_size = 8 * 1024 * 1024  # 8MB
+        self.upload_sessions = UploadSessionStore(os.path.join(get_cache_dir(), 'upload_sessions.json'))
+        self.max_parallel_downloads = 4
+        self.download_segments = 4
+        self.segment_threshold = 64 * 1024 * 1024  # فایل‌های بزرگ‌تر از 64MB چند بخشی دانلود می‌شوند
+        self.download_buffer_size = 1024 * 1024  # 1MB
+        self.progress_interval = 0.1  # ثانیه
+
+        # هر بخش یک اتصال طولانی دارد؛ دو اتصال اضافه برای دانلودهای کوچک همزمان
+        self.http.set_media_pool_size(self.max_parallel_downloads * self.download_segments + 2)
+        self.prefetch_folders = 10  # حداکثر زیرپوشه‌های پیش‌دریافت شده پس از هر بارگذاری
+        self.prefetch_workers = 2
+        self.prefetch_bytes = 2 * 1024 * 1024  # 2MB
 
-        # نوار وضعیت پیشرفته
-        self.create_enhanced_status_bar()
+    def authenticate(self, auth_code):
+        """احراز هویت با کد مجوز"""
+        token_data = {
+            'code': auth_code,
+            'client_id': self.client_config["installed"]["client_id"],
+            'client_secret': self.client_config["installed"]["client_secret"],
+            'redirect_uri': self.client_config["installed"]["redirect_uris"][0],
+            'grant_type': 'authorization_code'
+        }
 
-        # تنظیم رویدادها
-        self.setup_events()
+        for attempt in range(self.retry_count):
+            try:
+                response = self.http.post(
+                    self.client_config["installed"]["token_uri"],
+                    data=token_data,
+                    timeout=10
+                )
 
-    def create_advanced_toolbar(self):
-        """ایجاد نوار ابزار پیشرفته"""
+                if response.status_code == 200:
+                    self.credentials.update(response.json())
+                    self.user_info = self._get_user_info()
+                    self.store.bind_account(self.user_info.get('email'))
+                    self.changes.reload_state()
+                    self.credentials.save()
+                    return True
+                else:
+                    error_msg = self._("Error getting token: {}\n").format(response.status_code)
+                    if response.status_code == 401:
+                        error_msg += self._("Authentication issue. Please check your Client ID and Client Secret.")
+                    else:
+                        error_msg += response.text
+                    raise Exception(error_msg)
+
+            except requests.exceptions.RequestException as e:
+                if attempt == self.retry_count - 1:
+                    raise Exception(self._("Server connection error:\n{}").format(str(e)))
+                time.sleep(self.retry_delay)
+
+    def _get_user_info(self):
+        """دریافت اطلاعات کاربر با تلاش مجدد"""
+        if not self.access_token:
+            return {}
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json'
+        }
+
+        for attempt in range(self.retry_count):
+            try:
+                response = self.http.get(
+                    "https://www.googleapis.com/oauth2/v2/userinfo",
+                    headers=headers,
+                    timeout=5
+                )
+
+                if response.status_code == 200:
+                    return response.json()
+                elif response.status_code == 401 and attempt < self.retry_count - 1:
+                    self._refresh_token()
+                    continue
+                else:
+                    logging.error(f"Error getting user info: {response.status_code}")
+                    break
+
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error getting user info: {e}")
+                if attempt == self.retry_count - 1:
+                    break
+                time.sleep(self.retry_delay)
+
+        return {}
+
+    def _refresh_token(self, stale_token=None):
+        """تازه‌سازی توکن دسترسی از طریق CredentialsManager (یک درخواست برای تمام threadها)"""
+        return self.credentials.refresh(stale_token)
+
+    def restore_session(self):
+        """ورود خودکار با refresh token ذخیره شده؛ در صورت موفقیت True برمی‌گرداند"""
+        if not self.credentials.load():
+            return False
+        return self.credentials.refresh()
+
+    def list_files(self, folder_id=None, cancel_event=None):
+        """لیست کامل فایل‌ها (تمام صفحات) با کشینگ و تلاش مجدد"""
+        files = []
+        for page in self.iter_files(folder_id, cancel_event=cancel_event):
+            files.extend(page)
+        return files
+
+    def iter_files(self, folder_id=None, page_size=1000, cancel_event=None):
+        """لیست فایل‌ها به صورت generator؛ هر صفحه به محض دریافت بازگردانده می‌شود
+
+        با تنظیم cancel_event دریافت صفحات بعدی و تلاش‌های مجدد متوقف می‌شود
+        و لیست ناقص در کش ذخیره نمی‌شود.
+        """
+        folder_id = folder_id or self.current_folder_id
+
+        # بررسی کش
+        if folder_id in self.file_cache:
+            cached_data, timestamp = self.file_cache[folder_id]
+            if self.is_listing_fresh(timestamp):
+                yield cached_data
+                return
+
+        # اگر در کش نبود، از سرور دریافت کنیم
+        params = {
+            'pageSize': page_size,
+            'fields': self.listing_fields,
+            'q': f"'{folder_id}' in parents and trashed=false",
+            'orderBy': 'folder,name'
+        }
+
+        files = []
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+
+            try:
+                page = self._request_files_page(params, cancel_event)
+            except Exception:
+                # استفاده از داده‌های کش شده در صورت خطا
+                if not files and folder_id in self.file_cache:
+                    yield self.file_cache[folder_id][0]
+                    return
+                raise
+
+            if page is None:
+                # درخواست لغو شد
+                return
+
+            # رکوردهای ادغام شده؛ فیلدهای نماهای دیگر که قبلاً دریافت شده‌اند حفظ می‌شوند
+            page_files = self.index.add_many(page.get('files', []), folder_id)
+            files.extend(page_files)
+            yield page_files
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+            params['pageToken'] = page_token
+
+        self.file_cache[folder_id] = (files, time.time())
+        self.store.save_listing(folder_id, files)
+
+    def load_projection(self, folder_id, view, cancel_event=None):
+        """دریافت فیلدهای یک نما برای فایل‌های یک پوشه و ادغام با لیست کش شده
+
+        فقط فیلدهای همان نما درخواست می‌شوند؛ خروجی دیکشنری file_id -> رکورد ادغام شده است.
+        """
+        params = {
+            'pageSize': 1000,
+            'fields': self.files_fields(view),
+            'q': f"'{folder_id}' in parents and trashed=false"
+        }
+
+        records = {}
+        while True:
+            page = self._request_files_page(params, cancel_event)
+            if page is None:
+                return None
+
+            for record in self.index.add_many(page.get('files', [])):
+                records[record['id']] = record
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+            params['pageToken'] = page_token
+
+        cached = self.file_cache.get(folder_id)
+        if cached is not None:
+            files = [records.get(f['id'], f) for f in cached[0]]
+            self.file_cache[folder_id] = (files, cached[1])
+            self.store.save_listing(folder_id, files, cached[1])
+        return records
+
+    def get_file_projection(self, file_id, view):
+        """دریافت فیلدهای یک نما برای یک فایل و ادغام با رکورد موجود در ایندکس"""
+        info = self.get_file_info(file_id, fields=self.field_masks[view])
+        if 'parents' in info:
+            info['parents'] = self._normalize_parents(info['parents'])
+        return self.index.add(info)
+
+    def get_memory_listing(self, folder_id=None):
+        """لیست رمزگشایی شده پوشه فقط از حافظه؛ خروجی (files, timestamp) یا None
+
+        برخلاف get_cached_listing به SQLite دسترسی ندارد و در thread رابط کاربری امن است.
+        """
+        return self.file_cache.get(folder_id or self.current_folder_id)
+
+    def get_cached_listing(self, folder_id=None):
+        """آخرین لیست شناخته شده پوشه از حافظه یا دیسک بدون درخواست شبکه؛ خروجی (files, timestamp)
+
+        خواندن از دیسک شامل json.loads کل لیست است؛ از thread رابط کاربری فراخوانی نشود.
+        """
+        folder_id = folder_id or self.current_folder_id
+
+        if folder_id in self.file_cache:
+            return self.file_cache[folder_id]
+
+        try:
+            stored = self.store.load_listing(folder_id)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading metadata store: {e}")
+            return None, None
+
+        if stored is None:
+            return None, None
+
+        files, updated = stored
+        # IDهای افزوده شده با تغییرات در انتهای لیست ذخیره شده قرار دارند
+        files.sort(key=self.listing_sort_key)
+        self.index.add_many(files, folder_id)
+        self.file_cache[folder_id] = (files, updated)
+        return files, updated
+
+    def warm_index(self):
+        """بارگذاری تمام متادیتای ذخیره شده در ایندکس تا جستجوی محلی کل درایو را پوشش دهد"""
+        count = 0
+        try:
+            for files in self.store.iter_all_files():
+                self.index.add_missing(files)
+                count += len(files)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading metadata store: {e}")
+        logger.info(f"Search index warmed with {count} stored files")
+
+    def is_listing_fresh(self, timestamp):
+        """بررسی تازه بودن لیست کش شده
+
+        لیستی که پس از شروع پیگیری تغییرات دریافت شده تا زمان آخرین poll موفق
+        به‌روز است، پس TTL از همان زمان حساب می‌شود؛ اگر pollها (مثلاً در حالت
+        آفلاین) شکست بخورند لیست پس از cache_expiry دوباره قدیمی محسوب می‌شود.
+        """
+        if timestamp is None:
+            return False
+
+        changes = self.changes
+        tracking_since = changes.tracking_since
+        if tracking_since is not None and timestamp >= tracking_since and changes.last_success:
+            timestamp = max(timestamp, changes.last_success)
+
+        return time.time() - timestamp < self.cache_expiry
+
+    @staticmethod
+    def listing_sort_key(file):
+        """ترتیب لیست سرور (orderBy=folder,name): پوشه‌ها اول و سپس بر اساس نام"""
+        return file.get('mimeType') != 'application/vnd.google-apps.folder', file.get('name', '').casefold()
+
+    def get_root_id(self):
+        """دریافت ID واقعی پوشه ریشه (My Drive) که در parents فایل‌ها برگردانده می‌شود"""
+        if self.root_id:
+            return self.root_id
+
+        self.root_id = self.store.get_value('root_id')
+        if not self.root_id and self.access_token:
+            self.root_id = self.get_file_info('root')['id']
+            self.store.set_value('root_id', self.root_id)
+        return self.root_id
+
+    def _normalize_parents(self, parents):
+        """تبدیل ID واقعی ریشه به 'root' تا با کلید لیست‌های کش شده یکسان باشد"""
+        return ['root' if parent_id == self.root_id else parent_id for parent_id in parents or []]
+
+    @staticmethod
+    def pending_changes():
+        """مجموعه خالی تغییرات برای جمع‌آوری و نوشتن یکجا با flush_changes
+
+        unlocated فایل‌هایی است که والد قبلی آن‌ها شناخته شده نیست و باید با ID
+        از تمام لیست‌های کش شده (به جز والدهای جدید) حذف شوند.
+        """
+        return {'files': {}, 'deleted': set(), 'listings': {}, 'unlocated': set()}
+
+    def apply_change(self, change, pending=None):
+        """اعمال یک تغییر روی ایندکس؛ نوشتن در کش و پایگاه داده تا flush_changes جمع می‌شود
+
+        بدون pending تغییر بلافاصله نوشته می‌شود.
+        """
+        flush = pending is None
+        if flush:
+            pending = self.pending_changes()
+
+        file_id = change['fileId']
+        old_record = self.index.get(file_id)
+        old_parents = old_record.get('parents', []) if old_record else []
+        file = change.get('file')
+
+        if old_record is None:
+            pending['unlocated'].add(file_id)
+
+        if change.get('removed') or not file or file.get('trashed'):
+            self.index.remove(file_id)
+            pending['files'].pop(file_id, None)
+            pending['deleted'].add(file_id)
+            for parent_id in old_parents:
+                pending['listings'].setdefault(parent_id, {})[file_id] = None
+            delta = {'action': 'removed', 'file_id': file_id, 'old_parents': old_parents, 'parents': []}
+
+        else:
+            file = dict(file)
+            file.pop('trashed', None)
+            file['parents'] = self._normalize_parents(file.get('parents'))
+            record = self.index.add(file)
+            pending['deleted'].discard(file_id)
+            pending['files'][file_id] = record
+
+            for parent_id in old_parents:
+                if parent_id not in record['parents']:
+                    pending['listings'].setdefault(parent_id, {})[file_id] = None
+            for parent_id in record['parents']:
+                pending['listings'].setdefault(parent_id, {})[file_id] = record
+
+            if old_record is None:
+                action = 'added'
+            elif set(old_parents) != set(record['parents']):
+                action = 'moved'
+            else:
+                action = 'updated'
+
+            delta = {'action': action, 'file_id': file_id, 'file': record,
+                     'old_parents': old_parents, 'parents': record['parents']}
+
+        if flush:
+            self.flush_changes(pending)
+        return delta
+
+    def flush_changes(self, pending):
+        """اعمال تغییرات جمع شده روی لیست‌های کش شده و نوشتن آن‌ها در یک تراکنش
+
+        برای هر پوشه فقط لیست IDها به‌روز می‌شود و فقط رکوردهای تغییر کرده نوشته
+        می‌شوند، پس هزینه به تعداد تغییرات وابسته است نه به اندازه پوشه‌ها.
+        """
+        if pending['unlocated']:
+            self._locate_removed(pending)
+
+        listing_ids = {}
+        for folder_id, changes in pending['listings'].items():
+            cached = self.file_cache.get(folder_id)
+            if cached is not None:
+                files, timestamp = cached
+                files = [f for f in files if f['id'] not in changes]
+                files.extend(record for record in changes.values() if record is not None)
+                # لیست تقریباً مرتب است، پس مرتب‌سازی دوباره تقریباً خطی است
+                files.sort(key=self.listing_sort_key)
+                self.file_cache[folder_id] = (files, timestamp)
+                listing_ids[folder_id] = [f['id'] for f in files]
+                continue
+
+            try:
+                file_ids = self.store.load_listing_ids(folder_id)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading metadata store: {e}")
+                continue
+            if file_ids is not None:
+                # پوشه فقط روی دیسک کش شده است
+                listing_ids[folder_id] = [i for i in file_ids if i not in changes] + [
+                    file_id for file_id, record in changes.items() if record is not None
+                ]
+
+        self.store.update_listings(listing_ids, pending['files'].values(), pending['deleted'])
+
+    def _find_listing_holders(self, file_ids):
+        """لیست‌های کش شده (حافظه و دیسک) که این فایل‌ها را دارند؛ خروجی folder_id -> set(file_id)"""
+        holders = {}
+        for folder_id, (files, _) in list(self.file_cache.items()):
+            for f in files:
+                if f['id'] in file_ids:
+                    holders.setdefault(folder_id, set()).add(f['id'])
+
+        try:
+            for folder_id, found in self.store.find_listings_containing(file_ids).items():
+                holders.setdefault(folder_id, set()).update(found)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading metadata store: {e}")
+        return holders
+
+    def _locate_removed(self, pending):
+        """حذف فایل‌های بدون والد شناخته شده از تمام لیست‌های کش شده‌ای که آن‌ها را دارند"""
+        holders = self._find_listing_holders(pending['unlocated'])
+        for folder_id, file_ids in holders.items():
+            changes = pending['listings'].setdefault(folder_id, {})
+            for file_id in file_ids:
+                # اگر این پوشه والد جدید فایل باشد رکورد جدید حفظ می‌شود
+                changes.setdefault(file_id, None)
+
+    def _update_cached_listing(self, folder_id, file_id, record):
+        """حذف، افزودن یا جایگزینی یک فایل در لیست کش شده پوشه (در صورت وجود)
+
+        اگر والد شناخته شده نباشد (folder_id برابر None)، فایل با ID در تمام
+        لیست‌های کش شده‌ای که آن را دارند حذف یا جایگزین می‌شود.
+        """
+        pending = self.pending_changes()
+        if folder_id is None:
+            for holder_id in self._find_listing_holders({file_id}):
+                pending['listings'][holder_id] = {file_id: record}
+        else:
+            pending['listings'][folder_id] = {file_id: record}
+        if record is not None:
+            pending['files'][file_id] = record
+        self.flush_changes(pending)
+
+    search_fields = f"nextPageToken,files({field_masks['list']},parents)"
+    search_types = {
+        'folder': "mimeType = 'application/vnd.google-apps.folder'",
+        'document': "mimeType = 'application/vnd.google-apps.document'",
+        'spreadsheet': "mimeType = 'application/vnd.google-apps.spreadsheet'",
+        'presentation': "mimeType = 'application/vnd.google-apps.presentation'",
+        'pdf': "mimeType = 'application/pdf'",
+        'image': "mimeType contains 'image/'",
+        'video': "mimeType contains 'video/'",
+        'audio': "mimeType contains 'audio/'",
+        'text': "mimeType contains 'text/'",
+    }
+
+    @staticmethod
+    def _quote_query_value(value):
+        """قرار دادن مقدار در رشته کوتیشن‌دار زبان جستجوی درایو"""
+        return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+    # کلمه یا عبارت داخل "..." (کوتیشن بسته نشده تا انتهای متن ادامه دارد)؛
+    # آپاستروف جزئی از کلمه است تا نام‌هایی مثل O'Brien درست جستجو شوند
+    _search_token_pattern = re.compile(r'(?:[^\s"]+|"[^"]*"?)+')
+
+    @classmethod
+    def split_search_terms(cls, text):
+        """جداسازی متن جستجو با فاصله؛ فقط کوتیشن دوتایی عبارت چندکلمه‌ای می‌سازد"""
+        tokens = (token.replace('"', '') for token in cls._search_token_pattern.findall(text))
+        return [token for token in tokens if token]
+
+    def build_search_query(self, text):
+        """تبدیل متن جستجو به عبارت q درایو
+
+        کلمات عادی با name contains جستجو می‌شوند و فیلترهای زیر پشتیبانی می‌شوند:
+        text:کلمه (جستجو در محتوا)، type:image|video|audio|pdf|folder|...،
+        after:YYYY-MM-DD و before:YYYY-MM-DD (تاریخ آخرین تغییر).
+        خروجی (q, full_text) است؛ full_text یعنی مرتب‌سازی سمت سرور ممکن نیست.
+        """
+        tokens = self.split_search_terms(text)
+
+        clauses = ["trashed = false"]
+        full_text = False
+
+        for token in tokens:
+            key, sep, value = token.partition(':')
+            key = key.lower()
+            if not sep or not value or key not in ('text', 'type', 'after', 'before'):
+                clauses.append(f"name contains {self._quote_query_value(token)}")
+            elif key == 'text':
+                clauses.append(f"fullText contains {self._quote_query_value(value)}")
+                full_text = True
+            elif key == 'type':
+                clause = self.search_types.get(value.lower())
+                if clause is None:
+                    raise Exception(self._("Unknown file type: {}").format(value))
+                clauses.append(clause)
+            else:
+                try:
+                    date = datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise Exception(self._("Invalid date: {}").format(value))
+                operator = '>=' if key == 'after' else '<'
+                clauses.append(f"modifiedTime {operator} '{date.strftime('%Y-%m-%dT%H:%M:%S')}'")
+
+        return " and ".join(clauses), full_text
+
+    def iter_search(self, text, page_size=200, cancel_event=None):
+        """جستجو در کل درایو؛ هر صفحه از نتایج به محض دریافت بازگردانده می‌شود"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        query, full_text = self.build_search_query(text)
+        params = {
+            'pageSize': page_size,
+            'fields': self.search_fields,
+            'q': query,
+        }
+        if not full_text:
+            # درایو برای جستجوی fullText مرتب‌سازی را پشتیبانی نمی‌کند
+            params['orderBy'] = 'folder,modifiedTime desc'
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+
+            page = self._request_files_page(params, cancel_event)
+            if page is None:
+                return
+
+            page_files = page.get('files', [])
+            for file in page_files:
+                file['parents'] = self._normalize_parents(file.get('parents'))
+            self.index.add_many(page_files)
+            yield page_files
+
+            next_page_token = page.get('nextPageToken')
+            if not next_page_token:
+                return
+            params['pageToken'] = next_page_token
+
+    def _request_files_page(self, params, cancel_event=None):
+        """دریافت یک صفحه از files.list با تلاش مجدد؛ در صورت لغو None برمی‌گرداند"""
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json'
+        }
+
+        for attempt in range(self.retry_count):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            try:
+                response = self.http.get(
+                    "https://www.googleapis.com/drive/v3/files",
+                    headers=headers,
+                    params=params,
+                    timeout=10
+                )
+
+                if response.status_code == 200:
+                    return response.json()
+                elif response.status_code == 401 and attempt < self.retry_count - 1:
+                    self._refresh_token()
+                    headers['Authorization'] = f'Bearer {self.access_token}'
+                    continue
+                else:
+                    raise Exception(f"Error {response.status_code}: {response.text}")
+
+            except requests.exceptions.RequestException as e:
+                if attempt == self.retry_count - 1:
+                    raise Exception(str(e))
+                if cancel_event is not None:
+                    if cancel_event.wait(self.retry_delay):
+                        return None
+                else:
+                    time.sleep(self.retry_delay)
+
+    def get_upload_metadata(self, file_path, folder_id=None, file_name=None):
+        """متادیتای فایل جدید برای آپلود؛ خروجی (metadata, folder_id)"""
+        if not os.path.exists(file_path):
+            raise Exception(self._("File does not exist"))
+
+        folder_id = folder_id or self.current_folder_id
+        file_name = file_name or os.path.basename(file_path)
+        mime_type = 'application/octet-stream'
+
+        try:
+            import mimetypes
+            mime_type = mimetypes.guess_type(file_path)[0] or mime_type
+        except ImportError:
+            pass
+
+        metadata = {
+            'name': file_name,
+            'mimeType': mime_type
+        }
+
+        if folder_id != "root":
+            metadata['parents'] = [folder_id]
+
+        return metadata, folder_id
+
+    def create_upload(self, file_path, folder_id=None, file_name=None, chunk_size=None):
+        """ایجاد آپلود قابل ازسرگیری؛ در صورت وجود نشست قبلی از همان نقطه ادامه می‌دهد"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        metadata, folder_id = self.get_upload_metadata(file_path, folder_id, file_name)
+
+        def on_complete(result):
+            # افزودن فایل جدید به لیست کش شده پوشه (حافظه و دیسک)
+            self._update_cached_listing(folder_id, result['id'], self.index.add(result, folder_id))
+
+        return ResumableUpload(
+            self,
+            file_path,
+            metadata,
+            chunk_size or self.upload_chunk_size,
+            session_store=self.upload_sessions,
+            on_complete=on_complete
+        )
+
+    def upload_file(self, file_path, folder_id=None, file_name=None):
+        """آپلود کامل فایل با روش resumable و بازگرداندن اطلاعات فایل ایجاد شده"""
+        upload = self.create_upload(file_path, folder_id, file_name)
+
+        try:
+            for _ in upload.upload():
+                pass
+        except Exception as e:
+            raise Exception(str(e))
+
+        return upload.result
+
+    def download_file(self, file_id, save_path, segments=None):
+        """دانلود فایل در فایل .part با امکان ازسرگیری؛ فایل‌های بزرگ به صورت چند بخشی دانلود می‌شوند"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        part_path = save_path + '.part'
+        segments = segments or self.download_segments
+
+        try:
+            file_info = self.get_file_info(file_id, fields='id,size,modifiedTime')
+            size = int(file_info.get('size', 0))
+
+            state = self._load_part_state(part_path, file_info)
+            if state is None:
+                # فایل روی سرور تغییر کرده یا دانلود تازه است
+                self.discard_partial_download(save_path)
+                state = {'id': file_id, 'size': size, 'modifiedTime': file_info.get('modifiedTime')}
+
+            if size >= self.segment_threshold and segments > 1:
+                yield from self._download_segmented(file_id, part_path, state, segments)
+            else:
+                yield from self._download_stream(file_id, part_path, state)
+
+            os.replace(part_path, save_path)
+            self._discard_part_state(part_path)
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    @staticmethod
+    def _load_part_state(part_path, file_info):
+        """خواندن وضعیت دانلود ناتمام؛ اگر فایل روی سرور تغییر کرده باشد None برمی‌گرداند"""
+        try:
+            with open(part_path + '.json', 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if (state.get('id') != file_info['id'] or
+                state.get('size') != int(file_info.get('size', 0)) or
+                state.get('modifiedTime') != file_info.get('modifiedTime') or
+                not os.path.exists(part_path)):
+            return None
+        return state
+
+    @staticmethod
+    def _save_part_state(part_path, state):
+        tmp_path = part_path + '.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, part_path + '.json')
+
+    @staticmethod
+    def _discard_part_state(part_path):
+        for path in (part_path + '.json', part_path + '.json.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def discard_partial_download(self, save_path):
+        """حذف فایل .part و وضعیت ذخیره شده یک دانلود"""
+        part_path = save_path + '.part'
+        self._discard_part_state(part_path)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    def _download_stream(self, file_id, part_path, state):
+        """دانلود پیوسته با ادامه از انتهای فایل .part با هدر Range"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        total_size = state['size']
+        self._save_part_state(part_path, state)
+
+        if total_size and offset >= total_size:
+            yield total_size, total_size
+            return
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept-Encoding': 'identity'
+        }
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+
+        with self.http.media_get(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media",
+                headers=headers,
+                stream=True,
+                timeout=30
+        ) as response:
+
+            if response.status_code == 206:
+                mode = 'ab'
+            elif response.status_code == 200:
+                # سرور Range را نادیده گرفته است؛ از ابتدا دانلود می‌کنیم
+                offset = 0
+                mode = 'wb'
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+            total_size = total_size or offset + int(response.headers.get('content-length', 0))
+            downloaded = offset
+            last_report = 0
+
+            with open(part_path, mode, buffering=0) as f:
+                for chunk in self._iter_body(response):
+                    self._write_all(f, chunk)
+                    downloaded += len(chunk)
+
+                    now = time.monotonic()
+                    if now - last_report >= self.progress_interval:
+                        last_report = now
+                        yield downloaded, total_size
+
+            yield downloaded, total_size
+
+    def _iter_body(self, response):
+        """خواندن بدنه پاسخ در یک بافر ثابت که بین قطعه‌ها دوباره استفاده می‌شود
+
+        این روش zero-copy نیست: readinto در urllib3 داده را ابتدا در bytes خودش
+        می‌خواند و سپس در بافر کپی می‌کند. مزیت آن فقط حذف ساخت یک شیء bytes
+        جدید برای هر قطعه در این لایه است؛ از raw._fp استفاده نمی‌شود تا
+        رمزگشایی Content-Encoding و بررسی طول پاسخ توسط urllib3 حفظ شود.
+        خطاهای urllib3 مانند iter_content به خطاهای requests تبدیل می‌شوند.
+        """
+        buffer = bytearray(self.download_buffer_size)
+        view = memoryview(buffer)
+        while True:
+            try:
+                length = response.raw.readinto(buffer)
+            except ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e)
+            if not length:
+                break
+            yield view[:length]
+
+    @staticmethod
+    def _write_all(f, data):
+        """نوشتن کامل داده در فایل بدون بافر"""
+        view = memoryview(data)
+        while view:
+            written = f.write(view)
+            view = view[written:]
+
+    @staticmethod
+    def _split_segments(size, count):
+        """تقسیم فایل به بازه‌های بایتی [start, end] با موقعیت فعلی هر بازه"""
+        segment_size = -(-size // count)
+        return [
+            {'start': start, 'end': min(start + segment_size, size) - 1, 'pos': start}
+            for start in range(0, size, segment_size)
+        ]
+
+    @staticmethod
+    def _write_at(fd, data, position):
+        """نوشتن در موقعیت مشخص فایل بدون جابجایی اشاره‌گر مشترک"""
+        view = memoryview(data)
+        if hasattr(os, 'pwrite'):
+            while view:
+                written = os.pwrite(fd, view, position)
+                view = view[written:]
+                position += written
+        else:
+            # ویندوز os.pwrite ندارد؛ جابجایی اشاره‌گر زیر قفل فراخواننده انجام می‌شود
+            os.lseek(fd, position, os.SEEK_SET)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+
+    def _download_segment(self, file_id, fd, segment, lock, stop_event):
+        """دانلود یک بازه بایتی با تلاش مجدد از موقعیت ذخیره شده همان بازه
+
+        اگر تلاش‌های بازه تمام شوند stop_event تنظیم می‌شود تا بخش‌های دیگر هم متوقف شوند.
+        """
+        for attempt in range(self.retry_count):
+            try:
+                self._fetch_segment(file_id, fd, segment, lock, stop_event)
+                return
+            except requests.exceptions.RequestException as e:
+                if stop_event.is_set():
+                    return
+                if attempt == self.retry_count - 1:
+                    stop_event.set()
+                    raise Exception(str(e))
+                logger.warning(f"Segment {segment['start']}-{segment['end']} failed, retrying: {e}")
+                if stop_event.wait(self.retry_delay * (2 ** attempt)):
+                    return
+            except Exception:
+                stop_event.set()
+                raise
+
+    def _fetch_segment(self, file_id, fd, segment, lock, stop_event):
+        """یک تلاش برای دانلود باقیمانده بازه و نوشتن آن در جای خود در فایل .part"""
+        if segment['pos'] > segment['end']:
+            return
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept-Encoding': 'identity',
+            'Range': f"bytes={segment['pos']}-{segment['end']}"
+        }
+
+        with self.http.media_get(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media",
+                headers=headers,
+                stream=True,
+                timeout=30
+        ) as response:
+            if response.status_code == 401:
+                self._refresh_token()
+                raise requests.exceptions.HTTPError(f"Error {response.status_code}", response=response)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise requests.exceptions.HTTPError(f"Error {response.status_code}: {response.text}", response=response)
+            if response.status_code != 206:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+            for chunk in self._iter_body(response):
+                if stop_event.is_set():
+                    return
+                with lock:
+                    self._write_at(fd, chunk, segment['pos'])
+                    segment['pos'] += len(chunk)
+
+        if segment['pos'] <= segment['end']:
+            raise requests.exceptions.ChunkedEncodingError("Segment response ended early")
+
+    def _download_segmented(self, file_id, part_path, state, segment_count):
+        """دانلود همزمان چند بازه بایتی در فایل از پیش رزرو شده"""
+        size = state['size']
+        if 'segments' not in state or not os.path.exists(part_path):
+            state['segments'] = self._split_segments(size, segment_count)
+
+            # رزرو فضای کامل فایل؛ هر بخش در جای خود نوشته می‌شود
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+
+        self._save_part_state(part_path, state)
+        segments = state['segments']
+
+        def downloaded_bytes():
+            return sum(segment['pos'] - segment['start'] for segment in segments)
+
+        lock = threading.Lock()
+        stop_event = threading.Event()
+        fd = os.open(part_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+        executor = ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix='segment')
+        last_saved = time.time()
+
+        try:
+            futures = [
+                executor.submit(self._download_segment, file_id, fd, segment, lock, stop_event)
+                for segment in segments
+            ]
+
+            # با شکست نهایی یک بخش، stop_event بقیه را متوقف می‌کند
+            while not all(future.done() for future in futures) and not stop_event.is_set():
+                time.sleep(self.progress_interval)
+                with lock:
+                    downloaded = downloaded_bytes()
+                    if time.time() - last_saved > 1:
+                        self._save_part_state(part_path, state)
+                        last_saved = time.time()
+                yield downloaded, size
+
+            # ابتدا خطای بخش شکست خورده گزارش می‌شود، نه انتظار برای بقیه
+            for future in futures:
+                if future.done() and future.exception() is not None:
+                    future.result()
+            for future in futures:
+                future.result()
+
+            yield downloaded_bytes(), size
+
+        finally:
+            # در صورت توقف، خطا یا لغو، پیشرفت هر بخش برای ازسرگیری ذخیره می‌شود
+            stop_event.set()
+            executor.shutdown(wait=True)
+            os.close(fd)
+            if os.path.exists(part_path):
+                self._save_part_state(part_path, state)
+
+    def delete_file(self, file_id):
+        """حذف فایل با به‌روزرسانی کش"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}'
+        }
+
+        try:
+            parent_id = self.get_parent_id(file_id)
+
+            response = self.http.delete(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}",
+                headers=headers
+            )
+
+            if response.status_code == 204:
+                self.index.remove(file_id)
+                self.store.delete_file(file_id)
+
+                # حذف از لیست کش شده پوشه والد
+                self._update_cached_listing(parent_id, file_id, None)
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def get_parent_id(self, file_id):
+        """پوشه والد فایل از ایندکس؛ فقط برای فایل‌های ناشناخته درخواست شبکه ارسال می‌شود"""
+        parent_id = self.get_parent_id_cached(file_id)
+        if parent_id:
+            return parent_id
+
+        # ID واقعی ریشه به 'root' تبدیل می‌شود تا لیست کش شده ریشه به‌روز شود؛
+        # فایل بدون والد (مثلاً اشتراک گذاشته شده با کاربر) None برمی‌گرداند
+        self.get_root_id()
+        parents = self._normalize_parents(self.get_file_info(file_id).get('parents'))
+        return parents[0] if parents else None
+
+    def get_file_info(self, file_id, fields='id,name,parents,mimeType'):
+        """دریافت اطلاعات یک فایل خاص"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json'
+        }
+
+        params = {
+            'fields': fields
+        }
+
+        try:
+            response = self.http.get(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}",
+                headers=headers,
+                params=params,
+                timeout=5
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def rename_file(self, file_id, new_name):
+        """تغییر نام فایل با به‌روزرسانی کش"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        data = {
+            'name': new_name
+        }
+
+        try:
+            parent_id = self.get_parent_id(file_id)
+
+            response = self.http.patch(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}",
+                headers=headers,
+                json=data
+            )
+
+            if response.status_code == 200:
+                result = self.index.add(response.json())
+
+                # جایگزینی رکورد در لیست کش شده پوشه والد
+                self._update_cached_listing(parent_id, file_id, result)
+                return result
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def share_file(self, file_id, share_type, email=None):
+        """اشتراک‌گذاری فایل با تنظیمات مختلف"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        if share_type.lower() == 'public':
+            permission = {
+                'type': 'anyone',
+                'role': 'reader'
+            }
+        else:
+            if not email:
+                raise Exception(self._("Email address is required for user sharing"))
+
+            permission = {
+                'type': 'user',
+                'role': 'reader',
+                'emailAddress': email
+            }
+
+        try:
+            response = self.http.post(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}/permissions",
+                headers=headers,
+                json=permission
+            )
+
+            if response.status_code not in (200, 204):
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def batch_delete(self, file_ids):
+        """حذف گروهی فایل‌ها؛ خروجی دیکشنری file_id -> پیام خطا (None در صورت موفقیت)"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        batch = DriveBatch(self)
+        for file_id in file_ids:
+            batch.add('DELETE', f"files/{file_id}")
+
+        errors = {}
+        for file_id, (status, data) in zip(file_ids, batch.execute()):
+            if status != 204:
+                errors[file_id] = self._batch_error(status, data)
+                continue
+
+            errors[file_id] = None
+            parent_id = self.get_parent_id_cached(file_id)
+            self.index.remove(file_id)
+            self.store.delete_file(file_id)
+            self._update_cached_listing(parent_id, file_id, None)
+
+        return errors
+
+    def batch_rename(self, renames):
+        """تغییر نام گروهی؛ renames لیست (file_id, new_name) است"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        batch = DriveBatch(self)
+        for file_id, new_name in renames:
+            batch.add('PATCH', f"files/{file_id}", body={'name': new_name})
+
+        errors = {}
+        for (file_id, _), (status, data) in zip(renames, batch.execute()):
+            if status != 200:
+                errors[file_id] = self._batch_error(status, data)
+                continue
+
+            errors[file_id] = None
+            result = self.index.add(data)
+            self._update_cached_listing(self.get_parent_id_cached(file_id), file_id, result)
+
+        return errors
+
+    def batch_share(self, file_ids, share_type, email=None):
+        """اشتراک‌گذاری گروهی فایل‌ها با یک مجوز یکسان"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        if share_type.lower() == 'public':
+            permission = {
+                'type': 'anyone',
+                'role': 'reader'
+            }
+        else:
+            if not email:
+                raise Exception(self._("Email address is required for user sharing"))
+
+            permission = {
+                'type': 'user',
+                'role': 'reader',
+                'emailAddress': email
+            }
+
+        batch = DriveBatch(self)
+        for file_id in file_ids:
+            batch.add('POST', f"files/{file_id}/permissions", body=permission)
+
+        return {
+            file_id: None if status in (200, 204) else self._batch_error(status, data)
+            for file_id, (status, data) in zip(file_ids, batch.execute())
+        }
+
+    def get_parent_id_cached(self, file_id):
+        """پوشه والد فایل فقط از ایندکس (بدون درخواست شبکه)"""
+        record = self.index.get(file_id)
+        parents = record.get('parents') if record else None
+        return parents[0] if parents else None
+
+    @staticmethod
+    def _batch_error(status, data):
+        message = data.get('error', {}).get('message') if isinstance(data, dict) else None
+        return f"Error {status}: {message or data}"
+
+    def get_storage_info(self):
+        """دریافت اطلاعات فضای ذخیره‌سازی"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json'
+        }
+
+        try:
+            response = self.http.get(
+                "https://www.googleapis.com/drive/v3/about?fields=storageQuota",
+                headers=headers,
+                timeout=5
+            )
+
+            if response.status_code == 200:
+                quota = response.json().get('storageQuota', {})
+                self.store.set_value('storage_quota', quota)
+                return quota
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def create_folder(self, folder_name, parent_id=None):
+        """ایجاد پوشه جدید"""
+        if not self.access_token:
+            raise Exception(self._("You must authenticate first"))
+
+        parent_id = parent_id or self.current_folder_id
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        metadata = {
+            'name': folder_name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent_id]
+        }
+
+        try:
+            response = self.http.post(
+                "https://www.googleapis.com/drive/v3/files",
+                headers=headers,
+                json=metadata
+            )
+
+            if response.status_code == 200:
+                result = self.index.add(response.json(), parent_id)
+
+                # افزودن پوشه جدید به لیست کش شده پوشه والد
+                self._update_cached_listing(parent_id, result['id'], result)
+                return result
+            else:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+
+        except Exception as e:
+            raise Exception(str(e))
+
+    def get_cached_storage_info(self):
+        """آخرین اطلاعات فضای ذخیره‌سازی ذخیره شده روی دیسک"""
+        try:
+            return self.store.get_value('storage_quota', {})
+        except sqlite3.Error:
+            return {}
+
+    def clear_cache(self):
+        """پاکسازی کش"""
+        self.file_cache = {}
+
+
+class AsyncDriveClient:
+    """کلاینت asyncio برای Drive API که صدها درخواست همزمان را روی یک event loop اجرا می‌کند
+
+    event loop در یک thread جداگانه اجرا می‌شود. توکن‌ها، ایندکس و پایگاه داده
+    با EnhancedDriveFileManager مشترک هستند و نتیجه هر عملیات از طریق submit
+    (و در صورت دادن UiDispatcher، در thread رابط کاربری) تحویل داده می‌شود.
+    """
+
+    api_url = "https://www.googleapis.com/drive/v3"
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, file_manager, max_in_flight=100):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for AsyncDriveClient")
+
+        self.file_manager = file_manager
+        self.max_in_flight = max_in_flight
+        self.loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._refresh_lock = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """راه‌اندازی event loop در thread پس‌زمینه (فقط یک بار)"""
+        with self._start_lock:
+            if self.loop is not None:
+                return
+
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                args=(ready,),
+                name='drive-async',
+                daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._refresh_lock = asyncio.Lock()
+        self.loop = loop
+        ready.set()
+
+        try:
+            loop.run_forever()
+            loop.run_until_complete(self._close_session())
+        finally:
+            loop.close()
+
+    def submit(self, coro, on_done=None, on_error=None, ui=None):
+        """زمان‌بندی coroutine روی event loop و بازگرداندن concurrent.futures.Future
+
+        callbackها با نتیجه یا خطا فراخوانی می‌شوند؛ اگر ui داده شود از طریق
+        UiDispatcher در thread رابط کاربری اجرا می‌شوند.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        if on_done is not None or on_error is not None:
+            def deliver(done_future):
+                try:
+                    result = done_future.result()
+                except Exception as e:
+                    if on_error is not None:
+                        self._dispatch(ui, on_error, e)
+                    else:
+                        logger.error(f"Async Drive operation failed: {e}")
+                    return
+
+                if on_done is not None:
+                    self._dispatch(ui, on_done, result)
+
+            future.add_done_callback(deliver)
+
+        return future
+
+    @staticmethod
+    def _dispatch(ui, callback, value):
+        if ui is not None:
+            ui.post(callback, value)
+        else:
+            callback(value)
+
+    def run(self, coro, timeout=None):
+        """اجرای coroutine و انتظار برای نتیجه؛ فقط از threadهای پس‌زمینه فراخوانی شود"""
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        """بستن اتصال‌ها و توقف event loop"""
+        with self._start_lock:
+            loop, self.loop = self.loop, None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+
+    async def _close_session(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+                headers={'Accept-Encoding': 'gzip', 'User-Agent': DriveHttpSession.user_agent}
+            )
+        return self._session
+
+    @staticmethod
+    async def _in_thread(func, *args):
+        """اجرای عملیات مسدودکننده (دیسک، SQLite) بدون متوقف کردن event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _refresh_token(self, stale_token):
+        """تازه‌سازی توکن فقط یک بار برای تمام درخواست‌هایی که همزمان 401 گرفته‌اند"""
+        async with self._refresh_lock:
+            if self.file_manager.access_token != stale_token:
+                return True
+            return await self._in_thread(self.file_manager._refresh_token, stale_token)
+
+    async def _backoff(self, attempt):
+        await asyncio.sleep(self.file_manager.retry_delay * (2 ** attempt))
+
+    async def _send(self, method, url, expected=(200,), headers=None, **kwargs):
+        """ارسال درخواست با محدودیت همزمانی، تازه‌سازی توکن و تلاش مجدد؛ خروجی (status, headers, body)"""
+        if not self.file_manager.access_token:
+            raise Exception(self.file_manager._("You must authenticate first"))
+
+        session = await self._get_session()
+        headers = dict(headers or {})
+        retry_count = self.file_manager.retry_count
+
+        for attempt in range(retry_count):
+            token = self.file_manager.access_token
+            headers['Authorization'] = f'Bearer {token}'
+
+            try:
+                async with self._semaphore:
+                    async with session.request(method, url, headers=headers, **kwargs) as response:
+                        status = response.status
+                        body = await response.read()
+                        if status in expected:
+                            return status, response.headers, body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retry_count - 1:
+                    raise Exception(str(e))
+                await self._backoff(attempt)
+                continue
+
+            if attempt < retry_count - 1:
+                if status == 401 and await self._refresh_token(token):
+                    continue
+                if status in self.retry_statuses:
+                    await self._backoff(attempt)
+                    continue
+
+            raise Exception(f"Error {status}: {body.decode('utf-8', 'replace')}")
+
+    async def _request(self, method, url, expected=(200,), **kwargs):
+        """مانند _send اما بدنه پاسخ را به صورت JSON برمی‌گرداند"""
+        _, _, body = await self._send(method, url, expected, **kwargs)
+        return json.loads(body) if body else None
+
+    async def list_files(self, folder_id=None, page_size=1000):
+        """دریافت تمام صفحات لیست یک پوشه و به‌روزرسانی ایندکس و کش"""
+        file_manager = self.file_manager
+        folder_id = folder_id or file_manager.current_folder_id
+        params = {
+            'pageSize': page_size,
+            'fields': file_manager.listing_fields,
+            'q': f"'{folder_id}' in parents and trashed=false",
+            'orderBy': 'folder,name'
+        }
+
+        files = []
+        while True:
+            page = await self._request('GET', f"{self.api_url}/files", params=params)
+            files.extend(page.get('files', []))
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+            params['pageToken'] = page_token
+
+        files = file_manager.index.add_many(files, folder_id)
+        file_manager.file_cache[folder_id] = (files, time.time())
+        await self._in_thread(file_manager.store.save_listing, folder_id, files)
+        return files
+
+    async def list_tree(self, folder_ids):
+        """دریافت همزمان لیست تمام زیرپوشه‌ها؛ خروجی دیکشنری folder_id -> files"""
+        listings = {}
+        pending = set(folder_ids)
+
+        while pending:
+            pending_ids = list(pending)
+            results = await asyncio.gather(*(self.list_files(folder_id) for folder_id in pending_ids))
+
+            pending = set()
+            for folder_id, files in zip(pending_ids, results):
+                listings[folder_id] = files
+                pending.update(
+                    f['id'] for f in files
+                    if f['mimeType'] == 'application/vnd.google-apps.folder' and f['id'] not in listings
+                )
+
+        return listings
+
+    async def get_file_info(self, file_id, fields='id,name,parents,mimeType'):
+        """دریافت اطلاعات یک فایل خاص"""
+        return await self._request(
+            'GET',
+            f"{self.api_url}/files/{file_id}",
+            params={'fields': fields},
+            headers={'Accept': 'application/json'}
+        )
+
+    async def rename_file(self, file_id, new_name):
+        """تغییر نام فایل با به‌روزرسانی ایندکس و کش"""
+        file_manager = self.file_manager
+        parent_id = file_manager.get_parent_id_cached(file_id)
+
+        result = await self._request('PATCH', f"{self.api_url}/files/{file_id}", json={'name': new_name})
+        result = file_manager.index.add(result)
+        await self._in_thread(file_manager._update_cached_listing, parent_id, file_id, result)
+        return result
+
+    async def delete_file(self, file_id):
+        """حذف فایل با به‌روزرسانی ایندکس و کش"""
+        file_manager = self.file_manager
+        parent_id = file_manager.get_parent_id_cached(file_id)
+
+        await self._send('DELETE', f"{self.api_url}/files/{file_id}", expected=(204,))
+        file_manager.index.remove(file_id)
+        await self._in_thread(file_manager.store.delete_file, file_id)
+        await self._in_thread(file_manager._update_cached_listing, parent_id, file_id, None)
+
+    async def share_file(self, file_id, share_type, email=None):
+        """اشتراک‌گذاری فایل با تنظیمات مختلف"""
+        if share_type.lower() == 'public':
+            permission = {
+                'type': 'anyone',
+                'role': 'reader'
+            }
+        else:
+            if not email:
+                raise Exception(self.file_manager._("Email address is required for user sharing"))
+
+            permission = {
+                'type': 'user',
+                'role': 'reader',
+                'emailAddress': email
+            }
+
+        return await self._request(
+            'POST',
+            f"{self.api_url}/files/{file_id}/permissions",
+            expected=(200, 204),
+            json=permission
+        )
+
+    async def create_folder(self, folder_name, parent_id=None):
+        """ایجاد پوشه جدید"""
+        file_manager = self.file_manager
+        parent_id = parent_id or file_manager.current_folder_id
+        metadata = {
+            'name': folder_name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent_id]
+        }
+
+        result = await self._request('POST', f"{self.api_url}/files", json=metadata)
+        result = file_manager.index.add(result, parent_id)
+        await self._in_thread(file_manager._update_cached_listing, parent_id, result['id'], result)
+        return result
+
+    async def get_storage_info(self):
+        """دریافت اطلاعات فضای ذخیره‌سازی"""
+        result = await self._request('GET', f"{self.api_url}/about", params={'fields': 'storageQuota'})
+        quota = result.get('storageQuota', {})
+        await self._in_thread(self.file_manager.store.set_value, 'storage_quota', quota)
+        return quota
+
+
+class UiDispatcher:
+    """پل امن بین threadهای پس‌زمینه و حلقه اصلی Tk
+
+    threadها فقط رویداد را در صف قرار می‌دهند و حلقه اصلی در هر تیک after()
+    تعداد محدودی از آن‌ها را اجرا می‌کند. رویدادهای پرتکرار مانند پیشرفت با
+    post_coalesced ارسال می‌شوند تا در هر تیک فقط آخرین مقدار اعمال شود.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, root, interval=30, max_batch=100):
+        self.root = root
+        self.interval = interval  # میلی‌ثانیه
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._coalesced = {}
+        self._coalesced_lock = threading.Lock()
+        self._stopped = False
+        self.root.after(self.interval, self._drain)
+
+    @classmethod
+    def shared(cls, widget):
+        """dispatcher مشترک پنجره اصلی که ویجت به آن تعلق دارد"""
+        root = widget._root()
+        with cls._instances_lock:
+            dispatcher = cls._instances.get(root)
+            if dispatcher is None or dispatcher._stopped:
+                dispatcher = cls._instances[root] = cls(root)
+            return dispatcher
+
+    def post(self, callback, *args):
+        """اجرای callback در thread رابط کاربری؛ از هر threadی قابل فراخوانی است"""
+        self._queue.put((callback, args))
+
+    def post_coalesced(self, key, callback, *args):
+        """مانند post، اما از چند رویداد با کلید یکسان فقط آخرین آن‌ها اجرا می‌شود"""
+        with self._coalesced_lock:
+            self._coalesced[key] = (callback, args)
+
+    def _drain(self):
+        """اجرای رویدادهای صف در حلقه اصلی با محدودیت تعداد در هر تیک"""
+        if self._stopped:
+            return
+
+        with self._coalesced_lock:
+            coalesced, self._coalesced = self._coalesced, {}
+
+        for callback, args in coalesced.values():
+            self._invoke(callback, args)
+
+        for _ in range(self.max_batch):
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._invoke(callback, args)
+
+        # اگر صف هنوز خالی نشده، بلافاصله پس از رسیدگی به رویدادهای Tk ادامه می‌دهیم
+        delay = 1 if not self._queue.empty() else self.interval
+        try:
+            self.root.after(delay, self._drain)
+        except tk.TclError:
+            # پنجره اصلی بسته شده است
+            self._stopped = True
+
+    @staticmethod
+    def _invoke(callback, args):
+        try:
+            callback(*args)
+        except tk.TclError as e:
+            # ویجت مقصد پیش از اجرای رویداد بسته شده است
+            logger.debug(f"UI callback skipped: {e}")
+        except Exception as e:
+            logger.error(f"Error in UI callback {getattr(callback, '__name__', callback)}: {e}")
+
+    def stop(self):
+        self._stopped = True
+
+
+class DownloadJob:
+    """یک انتقال در صف دانلود"""
+
+    def __init__(self, job_id, file, save_path):
+        self.id = job_id
+        self.file = file
+        self.save_path = save_path
+        self.total = int(file.get('size', 0))
+        self.downloaded = 0
+        self.state = 'queued'  # queued, running, paused, cancelled, completed, failed
+        self.error = None
+        self.pause_requested = False
+        self.cancel_requested = False
+
+    @property
+    def progress(self):
+        """درصد پیشرفت این انتقال"""
+        if not self.total:
+            return 100.0 if self.state == 'completed' else 0.0
+        return self.downloaded * 100.0 / self.total
+
+    @property
+    def is_active(self):
+        return self.state in ('queued', 'running')
+
+
+class DownloadManager:
+    """مدیریت دانلود همزمان چند فایل و پوشه با استخر thread محدود"""
+
+    invalid_name_chars = '<>:"/\\|?*'
+
+    def __init__(self, file_manager, max_workers=4):
+        self.file_manager = file_manager
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='download')
+        self.jobs = []
+        self._job_ids = itertools.count(1)
+        self._reserved_paths = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def safe_name(cls, name):
+        """تبدیل نام فایل درایو به نام معتبر در سیستم فایل محلی"""
+        for char in cls.invalid_name_chars:
+            name = name.replace(char, '_')
+        return name.strip() or '_'
+
+    def _unique_path(self, path):
+        """جلوگیری از بازنویسی فایل‌های هم‌نام در مقصد"""
+        base, ext = os.path.splitext(path)
+        candidate = path
+        counter = 1
+        while candidate in self._reserved_paths or os.path.exists(candidate):
+            candidate = f"{base} ({counter}){ext}"
+            counter += 1
+        self._reserved_paths.add(candidate)
+        return candidate
+
+    def enqueue(self, file, save_path):
+        """افزودن یک فایل به صف دانلود"""
+        with self._lock:
+            if save_path not in self._reserved_paths:
+                self._reserved_paths.add(save_path)
+            job = DownloadJob(next(self._job_ids), file, save_path)
+            self.jobs.append(job)
+
+        self.executor.submit(self._run, job)
+        return job
+
+    def add_selection(self, files, target_dir):
+        """افزودن فایل‌ها و پوشه‌های انتخاب شده؛ پوشه‌ها در پس‌زمینه به صورت بازگشتی پیمایش می‌شوند"""
+        threading.Thread(
+            target=self._enqueue_tree,
+            args=(files, target_dir),
+            daemon=True
+        ).start()
+
+    def _crawl_folders(self, files):
+        """دریافت همزمان لیست تمام زیرپوشه‌ها با کلاینت asyncio (در صورت نصب بودن aiohttp)"""
+        folder_ids = [f['id'] for f in files if f['mimeType'] == 'application/vnd.google-apps.folder']
+        client = self.file_manager.get_async_client()
+        if not folder_ids or client is None:
+            return {}
+
+        try:
+            return client.run(client.list_tree(folder_ids))
+        except Exception as e:
+            logger.error(f"Error crawling folders, listing them one by one: {e}")
+            return {}
+
+    def _enqueue_tree(self, files, target_dir, listings=None):
+        if listings is None:
+            listings = self._crawl_folders(files)
+
+        for file in files:
+            try:
+                if file['mimeType'] == 'application/vnd.google-apps.folder':
+                    folder_dir = os.path.join(target_dir, self.safe_name(file['name']))
+                    os.makedirs(folder_dir, exist_ok=True)
+
+                    children = listings.get(file['id'])
+                    if children is None:
+                        children = self.file_manager.list_files(file['id'])
+                    self._enqueue_tree(children, folder_dir, listings)
+                elif file['mimeType'].startswith('application/vnd.google-apps.'):
+                    # اسناد گوگل محتوای باینری ندارند و باید export شوند
+                    logger.warning(f"Skipping Google Docs file: {file['name']}")
+                else:
+                    with self._lock:
+                        save_path = self._unique_path(os.path.join(target_dir, self.safe_name(file['name'])))
+                    self.enqueue(file, save_path)
+            except Exception as e:
+                logger.error(f"Error adding {file.get('name')} to download queue: {e}")
+
+    def _run(self, job):
+        """اجرای یک انتقال روی یکی از threadهای استخر"""
+        if job.cancel_requested or job.pause_requested:
+            job.state = 'cancelled' if job.cancel_requested else 'paused'
+            return
+
+        job.state = 'running'
+        transfer = self.file_manager.download_file(job.file['id'], job.save_path)
+        try:
+            for downloaded, total in transfer:
+                job.downloaded, job.total = downloaded, total
+
+                if job.cancel_requested or job.pause_requested:
+                    break
+            else:
+                job.state = 'completed'
+                return
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+            logger.error(f"Error downloading {job.file['name']}: {e}")
+            return
+        finally:
+            transfer.close()
+
+        if job.cancel_requested:
+            job.state = 'cancelled'
+            self.file_manager.discard_partial_download(job.save_path)
+        else:
+            job.state = 'paused'
+
+    def get_job(self, job_id):
+        with self._lock:
+            return next((job for job in self.jobs if job.id == job_id), None)
+
+    def pause(self, job_id):
+        """توقف موقت انتقال و آزاد کردن thread آن برای انتقال‌های دیگر"""
+        job = self.get_job(job_id)
+        if job and job.is_active:
+            job.pause_requested = True
+
+    def resume(self, job_id):
+        """ادامه انتقال متوقف شده یا ناموفق"""
+        job = self.get_job(job_id)
+        if job and job.state in ('paused', 'failed'):
+            job.pause_requested = False
+            job.error = None
+            job.state = 'queued'
+            self.executor.submit(self._run, job)
+
+    def cancel(self, job_id):
+        """لغو انتقال"""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        job.cancel_requested = True
+        if job.state in ('paused', 'failed'):
+            job.state = 'cancelled'
+            self.file_manager.discard_partial_download(job.save_path)
+
+    def clear_finished(self):
+        """حذف انتقال‌های تمام شده از صف"""
+        with self._lock:
+            finished = [job for job in self.jobs if job.state in ('completed', 'cancelled')]
+            for job in finished:
+                self._reserved_paths.discard(job.save_path)
+            self.jobs = [job for job in self.jobs if job not in finished]
+
+    def aggregate_progress(self):
+        """مجموع پیشرفت تمام انتقال‌های صف به صورت (downloaded, total)"""
+        with self._lock:
+            jobs = [job for job in self.jobs if job.state != 'cancelled']
+        return sum(job.downloaded for job in jobs), sum(job.total for job in jobs)
+
+    def shutdown(self):
+        """لغو انتقال‌های باقیمانده و بستن استخر"""
+        with self._lock:
+            for job in self.jobs:
+                if job.is_active:
+                    job.pause_requested = True
+        self.executor.shutdown(wait=False)
+
+
+class DownloadQueueWindow(tk.Toplevel):
+    """نمای صف دانلود با پیشرفت هر انتقال و پیشرفت کلی"""
+
+    refresh_interval = 250  # میلی‌ثانیه
+
+    def __init__(self, parent, download_manager):
+        super().__init__(parent)
+        self.download_manager = download_manager
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
+        self.title(self._("Downloads"))
+        self.geometry("700x400")
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.refresh()
+
+    def create_widgets(self):
+        """ایجاد ویجت‌های پنجره"""
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(
+            main_frame,
+            columns=("name", "progress", "size", "state"),
+            show="headings",
+            selectmode="extended"
+        )
+        columns = {
+            "name": {"text": self._("Name"), "width": 300, "anchor": tk.W},
+            "progress": {"text": self._("Progress"), "width": 80, "anchor": tk.CENTER},
+            "size": {"text": self._("Size"), "width": 160, "anchor": tk.CENTER},
+            "state": {"text": self._("State"), "width": 100, "anchor": tk.CENTER}
+        }
+        for col, config in columns.items():
+            self.tree.heading(col, text=config["text"], anchor=config["anchor"])
+            self.tree.column(col, width=config["width"], anchor=config["anchor"])
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        # پیشرفت کلی
+        self.total_progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, mode='determinate')
+        self.total_progress.pack(fill=tk.X, pady=(10, 2))
+
+        self.total_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.total_var, anchor=tk.CENTER).pack(fill=tk.X)
+
+        # دکمه‌ها
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X, pady=(10, 0))
+
+        ttk.Button(btn_frame, text=self._("Pause"), bootstyle="warning",
+                   command=lambda: self.apply_to_selection(self.download_manager.pause)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text=self._("Resume"), bootstyle="success",
+                   command=lambda: self.apply_to_selection(self.download_manager.resume)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text=self._("Cancel"), bootstyle="danger",
+                   command=lambda: self.apply_to_selection(self.download_manager.cancel)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text=self._("Clear Finished"), bootstyle="secondary",
+                   command=self.download_manager.clear_finished).pack(side=tk.RIGHT, padx=2)
+
+    def apply_to_selection(self, action):
+        """اجرای عملیات روی انتقال‌های انتخاب شده"""
+        for item in self.tree.selection():
+            action(int(item))
+
+    def refresh(self):
+        """به‌روزرسانی دوره‌ای وضعیت صف"""
+        if not self.winfo_exists():
+            return
+
+        with self.download_manager._lock:
+            jobs = list(self.download_manager.jobs)
+
+        existing = set(self.tree.get_children())
+        for job in jobs:
+            iid = str(job.id)
+            values = (
+                job.file['name'],
+                f"{job.progress:.0f}%",
+                f"{self.format_size(job.downloaded)} / {self.format_size(job.total)}",
+                self._(job.state.title()) if not job.error else f"{self._('Failed')}: {job.error}"
+            )
+            if iid in existing:
+                self.tree.item(iid, values=values)
+                existing.discard(iid)
+            else:
+                self.tree.insert('', tk.END, iid=iid, values=values)
+
+        for iid in existing:
+            self.tree.delete(iid)
+
+        downloaded, total = self.download_manager.aggregate_progress()
+        self.total_progress['value'] = downloaded * 100.0 / total if total else 0
+        active = sum(1 for job in jobs if job.is_active)
+        self.total_var.set(self._("{} active | {} / {}").format(
+            active,
+            self.format_size(downloaded),
+            self.format_size(total)
+        ))
+
+        self.after(self.refresh_interval, self.refresh)
+
+    @staticmethod
+    def format_size(size_bytes):
+        """قالب‌بندی اندازه فایل"""
+        if not size_bytes:
+            return "0 B"
+
+        size_bytes = int(size_bytes)
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.1f} PB"
+
+
+class VirtualTreeview:
+    """نمایش مجازی لیست‌های بزرگ در Treeview
+
+    رکوردها در یک لیست پشتیبان نگه داشته می‌شوند و فقط ردیف‌های قابل مشاهده
+    به علاوه یک حاشیه (overscan) در Treeview ساخته می‌شوند. اسکرول‌بار به جای
+    Treeview به موقعیت در لیست پشتیبان متصل است و انتخاب‌ها با ID فایل در
+    selected_ids نگه داشته می‌شوند تا با خارج شدن ردیف از دید از بین نروند.
+    """
+
+    def __init__(self, tree, scrollbar, row_factory, overscan=50):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_factory = row_factory  # file -> (values, tags, image)
+        self.overscan = overscan
+        self.records = []
+        self.positions = {}
+        self.selected_ids = set()
+        self.first = 0
+        self.block = (0, 0)
+
+        # تخمین اولیه از استایل؛ پس از اولین نمایش با bbox ردیف واقعی جایگزین می‌شود
+        style = ttk.Style()
+        style_name = str(tree.cget('style')) or 'Treeview'
+        self.row_height = int(style.lookup(style_name, 'rowheight') or 20)
+        self.border = int(style.lookup(style_name, 'borderwidth') or 0)
+        headings = 'headings' in str(tree.cget('show'))
+        self.top_offset = self.border + (self.row_height if headings else 0)
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<Configure>", lambda e: self.render(), add='+')
+        self.tree.bind("<<TreeviewSelect>>", self._sync_selection, add='+')
+        self.tree.bind("<ButtonPress-1>", self._on_click, add='+')
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+        for sequence, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", 'page-up'),
+                                ("<Next>", 'page-down'), ("<Home>", 'home'), ("<End>", 'end')):
+            self.tree.bind(sequence, lambda e, d=delta: self._on_key(d))
+
+    @property
+    def visible_count(self):
+        """تعداد ردیف‌هایی که کامل دیده می‌شوند (بدون سرستون و حاشیه)"""
+        height = self.tree.winfo_height() - self.top_offset - self.border
+        return max(1, height // self.row_height)
+
+    def _measure_rows(self):
+        """اندازه‌گیری ارتفاع ردیف و فاصله بالای اولین ردیف (سرستون) از bbox؛ در صورت تغییر True"""
+        if not self.records:
+            return False
+
+        bbox = self.tree.bbox(self.records[self.first]['id'])
+        if not bbox or bbox[3] <= 0:
+            return False
+
+        top_offset, row_height = bbox[1], bbox[3]
+        if (top_offset, row_height) == (self.top_offset, self.row_height):
+            return False
+
+        self.top_offset, self.row_height = top_offset, row_height
+        return True
+
+    def __len__(self):
+        return len(self.records)
+
+    def contains(self, file_id):
+        return file_id in self.positions
+
+    def _reindex(self, start=0):
+        for position in range(start, len(self.records)):
+            self.positions[self.records[position]['id']] = position
+
+    def set_records(self, files, keep_position=False):
+        """جایگزینی کامل لیست؛ زمان اجرا به اندازه پوشه وابسته نیست (فقط پنجره قابل مشاهده ساخته می‌شود)"""
+        self.records = list(files)
+        self.positions = {}
+        self._reindex()
+        self.selected_ids &= self.positions.keys()
+        if not keep_position:
+            self.first = 0
+        self.render(force=True)
+
+    def append(self, files):
+        """افزودن رکوردها به انتهای لیست"""
+        start = len(self.records)
+        self.records.extend(files)
+        self._reindex(start)
+
+        # فقط اگر انتهای لیست در پنجره فعلی باشد ردیف جدید ساخته می‌شود
+        self.render(force=self.block[1] >= start)
+
+    def update(self, file):
+        """جایگزینی یک رکورد و به‌روزرسانی ردیف آن در صورت نمایش"""
+        position = self.positions.get(file['id'])
+        if position is None:
+            return
+
+        self.records[position] = file
+        if self.tree.exists(file['id']):
+            values, tags, image = self.row_factory(file)
+            self.tree.item(file['id'], values=values, tags=tags, image=image)
+
+    def remove(self, file_id):
+        position = self.positions.pop(file_id, None)
+        if position is None:
+            return
+
+        del self.records[position]
+        self.selected_ids.discard(file_id)
+        self._reindex(position)
+        self.render(force=True)
+
+    def clear(self):
+        self.set_records([])
+
+    def get(self, file_id):
+        position = self.positions.get(file_id)
+        return self.records[position] if position is not None else None
+
+    def selection(self):
+        """ID رکوردهای انتخاب شده به ترتیب لیست (شامل ردیف‌های خارج از دید)"""
+        return tuple(sorted(
+            (file_id for file_id in self.selected_ids if file_id in self.positions),
+            key=self.positions.get
+        ))
+
+    def select_only(self, file_id):
+        self.selected_ids = {file_id}
+        self._apply_selection()
+
+    def select_all(self):
+        self.selected_ids = set(self.positions)
+        self._apply_selection()
+
+    def _apply_selection(self):
+        rendered = self.tree.get_children()
+        self.tree.selection_set([item for item in rendered if item in self.selected_ids])
+
+    def _on_click(self, event):
+        """کلیک بدون Shift/Ctrl انتخاب ردیف‌های خارج از دید را هم پاک می‌کند"""
+        if not event.state & 0x0005:
+            self.selected_ids = set()
+
+    def _sync_selection(self, event=None):
+        """همگام‌سازی انتخاب کاربر در ردیف‌های نمایش داده شده با selected_ids"""
+        rendered = set(self.tree.get_children())
+        self.selected_ids = (self.selected_ids - rendered) | set(self.tree.selection())
+
+    def yview(self, *args):
+        """فرمان اسکرول‌بار: نگاشت موقعیت اسکرول به اندیس رکورد"""
+        if not args:
+            return
+
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * len(self.records))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_count
+            first = self.first + amount
+        else:
+            return
+
+        self.scroll_to(first)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, len(self.records) - self.visible_count))
+        self.render()
+
+    def see(self, file_id):
+        """اسکرول تا نمایش رکورد مشخص"""
+        position = self.positions.get(file_id)
+        if position is None:
+            return
+
+        visible = self.visible_count
+        if position < self.first:
+            self.scroll_to(position)
+        elif position >= self.first + visible:
+            self.scroll_to(position - visible + 1)
+
+    def render(self, force=False):
+        """ساخت ردیف‌های پنجره فعلی؛ تا زمانی که دید داخل حاشیه باشد ردیف‌ها بازسازی نمی‌شوند"""
+        total = len(self.records)
+        visible = self.visible_count
+        self.first = max(0, min(self.first, total - visible))
+        start, end = self.block
+        margin = self.overscan // 4
+
+        needs_render = (
+            force or
+            self.first < start or self.first + visible > end or
+            (start > 0 and self.first - start < margin) or
+            (end < total and end - (self.first + visible) < margin)
+        )
+
+        if needs_render:
+            start = max(0, self.first - self.overscan)
+            end = min(total, self.first + visible + self.overscan)
+            self.tree.delete(*self.tree.get_children())
+
+            for file in self.records[start:end]:
+                values, tags, image = self.row_factory(file)
+                self.tree.insert('', tk.END, iid=file['id'], values=values, tags=tags, image=image)
+
+            self.block = (start, end)
+            self._apply_selection()
+
+        # قرار دادن رکورد first در بالای Treeview
+        rendered = end - start
+        if rendered:
+            self.tree.yview_moveto((self.first - start) / rendered)
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+        # با ارتفاع واقعی، تعداد ردیف‌های قابل مشاهده و حد اسکرول دوباره محاسبه می‌شود
+        if self._measure_rows():
+            self.render()
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            amount = -3
+        elif event.num == 5:
+            amount = 3
+        else:
+            amount = -3 if event.delta > 0 else 3
+
+        self.scroll_to(self.first + amount)
+        return "break"
+
+    def _on_key(self, delta):
+        """حرکت با صفحه کلید روی لیست پشتیبان به جای ردیف‌های ساخته شده"""
+        if not self.records:
+            return "break"
+
+        focus = self.tree.focus()
+        position = self.positions.get(focus, self.first)
+        visible = self.visible_count
+
+        if delta == 'page-up':
+            position -= visible
+        elif delta == 'page-down':
+            position += visible
+        elif delta == 'home':
+            position = 0
+        elif delta == 'end':
+            position = len(self.records) - 1
+        else:
+            position += delta
+
+        position = max(0, min(position, len(self.records) - 1))
+        file_id = self.records[position]['id']
+        self.see(file_id)
+        self.select_only(file_id)
+        self.tree.focus(file_id)
+        return "break"
+
+
+class PreviewService:
+    """پیش‌نمایش تصاویر هنگام hover
+
+    درخواست‌ها با تاخیر (debounce) ارسال می‌شوند تا حرکت سریع ماوس روی لیست
+    باعث دانلود نشود، تصویر در thread پس‌زمینه دریافت و کوچک می‌شود و
+    PhotoImageهای ساخته شده در یک LRU محدود به حجم با کلید
+    (file_id, modifiedTime) نگه داشته می‌شوند.
+    """
+
+    def __init__(self, widget, file_manager, on_ready, delay=300,
+                 max_bytes=32 * 1024 * 1024, preview_size=(200, 200)):
+        self.widget = widget
+        self.file_manager = file_manager
+        self.on_ready = on_ready  # callback(file, photo) در thread رابط کاربری
+        self.delay = delay  # میلی‌ثانیه
+        self.max_bytes = max_bytes
+        self.preview_size = preview_size
+        self.ui = UiDispatcher.shared(widget)
+        self._cache = OrderedDict()  # key -> (photo, nbytes)
+        self._cache_bytes = 0
+        self._pending = None
+        self._current_key = None
+        self._in_flight = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='preview')
+
+    @staticmethod
+    def cache_key(file):
+        return file['id'], file.get('modifiedTime')
+
+    def request(self, file):
+        """درخواست پیش‌نمایش فایل زیر ماوس؛ از کش یا پس از تاخیر از شبکه"""
+        key = self.cache_key(file)
+        if key == self._current_key:
+            return
+
+        self.cancel()
+        self._current_key = key
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.on_ready(file, cached[0])
+            return
+
+        self._pending = self.widget.after(self.delay, self._start_fetch, file, key)
+
+    def cancel(self):
+        """لغو درخواست در انتظار (مثلاً با خروج ماوس از ردیف)"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self._current_key = None
+
+    def _start_fetch(self, file, key):
+        self._pending = None
+        if key in self._in_flight:
+            return
+
+        self._in_flight.add(key)
+        self._executor.submit(self._fetch, file, key)
+
+    def _fetch(self, file, key):
+        """دریافت و کوچک کردن تصویر در thread پس‌زمینه"""
+        image = None
+        try:
+            image = self.load_image(file)
+        except Exception as e:
+            logger.debug(f"Preview unavailable for {file.get('name')}: {e}")
+        self.ui.post(self._deliver, file, key, image)
+
+    def load_image(self, file):
+        """دانلود تصویر کوچک گوگل و تبدیل آن به تصویر PIL در اندازه پیش‌نمایش"""
+        url = file.get('thumbnailLink')
+        if url is None:
+            # رکوردهای نمای لیست thumbnailLink ندارند؛ فقط همین فیلد برای فایل زیر ماوس دریافت می‌شود
+            url = self.file_manager.get_file_projection(file['id'], 'thumbnails').get('thumbnailLink')
+        if not url:
+            raise Exception("No thumbnail available")
+
+        headers = {}
+        if self.file_manager.access_token:
+            headers['Authorization'] = f'Bearer {self.file_manager.access_token}'
+
+        response = self.file_manager.http.get(url, headers=headers, timeout=5)
+        if response.status_code != 200:
+            raise Exception(f"Error {response.status_code}")
+
+        image = Image.open(io.BytesIO(response.content))
+        image.thumbnail(self.preview_size)
+        return image.convert("RGBA")
+
+    def _deliver(self, file, key, image):
+        """ساخت PhotoImage در thread رابط کاربری، ذخیره در کش و نمایش در صورت نیاز"""
+        self._in_flight.discard(key)
+        if image is None:
+            return
+
+        photo = ImageTk.PhotoImage(image)
+        self._put(key, photo, image.width * image.height * 4)
+
+        if key == self._current_key:
+            self.on_ready(file, photo)
+
+    def _put(self, key, photo, nbytes):
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_bytes -= old[1]
+
+        self._cache[key] = (photo, nbytes)
+        self._cache_bytes += nbytes
+
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, (_, evicted_bytes) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_bytes
+
+    def clear(self):
+        self._cache.clear()
+        self._cache_bytes = 0
+
+
+def decode_thumbnail(data, size):
+    """کوچک کردن تصویر و تبدیل آن به PNG؛ در process جداگانه اجرا می‌شود"""
+    image = Image.open(io.BytesIO(data))
+    image.draft('RGB', size)
+    image.thumbnail(size)
+
+    output = io.BytesIO()
+    image.convert("RGBA").save(output, format='PNG')
+    return output.getvalue()
+
+
+class ThumbnailPipeline:
+    """دریافت، کوچک‌سازی و کش تصاویر کوچک فایل‌ها برای نمای تصاویر کوچک
+
+    تصاویر با استخر محدودی از threadها دریافت و در یک process pool کوچک
+    می‌شوند. نتیجه به صورت PNG با نام هش محتوا روی دیسک ذخیره و با کلید
+    (file_id, modifiedTime) در پایگاه داده متادیتا ثبت می‌شود، پس با تغییر
+    فایل تصویر جدید دریافت می‌شود و بازدید دوباره از پوشه نیازی به شبکه ندارد.
+    """
+
+    def __init__(self, widget, file_manager, size=(96, 72), max_workers=6, memory_items=300):
+        self.file_manager = file_manager
+        self.size = size
+        self.memory_items = memory_items
+        self.ui = UiDispatcher.shared(widget)
+        self.cache_dir = os.path.join(get_cache_dir(), 'thumbnails')
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._photos = OrderedDict()  # key -> PhotoImage
+        self._in_flight = {}  # key -> [callbacks]
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._decode_pool = None
+        self._decode_lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(file):
+        return file['id'], file.get('modifiedTime')
+
+    def request(self, file, on_ready):
+        """درخواست تصویر کوچک؛ on_ready(file_id, photo) در thread رابط کاربری فراخوانی می‌شود"""
+        if not file.get('thumbnailLink'):
+            return
+
+        key = self.cache_key(file)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            on_ready(file['id'], photo)
+            return
+
+        callbacks = self._in_flight.get(key)
+        if callbacks is not None:
+            callbacks.append(on_ready)
+            return
+
+        self._in_flight[key] = [on_ready]
+        self._fetch_pool.submit(self._load, file, key)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest + '.png')
+
+    def _load(self, file, key):
+        """خواندن از کش دیسک یا دریافت و کوچک‌سازی؛ در thread پس‌زمینه اجرا می‌شود"""
+        data = None
+        try:
+            data = self._read_cached(key)
+            if data is None:
+                data = self._decode(self._download(file))
+                self._write_cached(key, data)
+        except Exception as e:
+            logger.debug(f"Thumbnail unavailable for {file.get('name')}: {e}")
+
+        self.ui.post(self._deliver, file['id'], key, data)
+
+    def _read_cached(self, key):
+        store = self.file_manager.store
+        try:
+            digest = store.get_thumbnail(*key)
+        except sqlite3.Error:
+            return None
+        if not digest:
+            return None
+
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_cached(self, key, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        # تصاویر یکسان فقط یک بار ذخیره می‌شوند
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        self.file_manager.store.save_thumbnail(key[0], key[1], digest)
+
+    def _download(self, file):
+        headers = {}
+        if self.file_manager.access_token:
+            headers['Authorization'] = f'Bearer {self.file_manager.access_token}'
+
+        response = self.file_manager.http.get(file['thumbnailLink'], headers=headers, timeout=10)
+        if response.status_code != 200:
+            raise Exception(f"Error {response.status_code}")
+        return response.content
+
+    def _decode(self, data):
+        """کوچک‌سازی در process pool تا GIL و thread رابط کاربری درگیر نشوند"""
+        with self._decode_lock:
+            if self._decode_pool is None:
+                self._decode_pool = ProcessPoolExecutor(max_workers=2)
+            pool = self._decode_pool
+
+        try:
+            return pool.submit(decode_thumbnail, data, self.size).result()
+        except BrokenProcessPool:
+            with self._decode_lock:
+                self._decode_pool = None
+            return decode_thumbnail(data, self.size)
+
+    def _deliver(self, file_id, key, data):
+        """ساخت PhotoImage در thread رابط کاربری و اطلاع به تمام درخواست‌کنندگان"""
+        callbacks = self._in_flight.pop(key, [])
+        if data is None:
+            return
+
+        photo = ImageTk.PhotoImage(Image.open(io.BytesIO(data)))
+        self._photos[key] = photo
+        while len(self._photos) > self.memory_items:
+            self._photos.popitem(last=False)
+
+        for callback in callbacks:
+            callback(file_id, photo)
+
+    def shutdown(self):
+        self._fetch_pool.shutdown(wait=False)
+        if self._decode_pool is not None:
+            self._decode_pool.shutdown(wait=False)
+
+
+class ThumbnailGrid(ttk.Frame):
+    """نمای شبکه‌ای تصاویر کوچک با مجموعه ثابتی از سلول‌های قابل استفاده مجدد
+
+    تعداد سلول‌ها به اندازه ناحیه قابل مشاهده است. با اسکرول، داده‌ها به همان
+    سلول‌ها متصل می‌شوند و ویجت جدیدی ساخته نمی‌شود.
+    """
+
+    cell_width = 120
+    cell_height = 110
+
+    def __init__(self, parent, icon_factory, on_open=None, image_loader=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.icon_factory = icon_factory  # file -> (icon name, size)
+        self.icons = IconRegistry.shared()
+        self.on_open = on_open
+        self.image_loader = image_loader  # (file, on_ready) -> None
+        self.files = []
+        self.cells = []
+        self.columns = 1
+        self.rows = 1
+        self.first_row = 0
+
+        self.body = ttk.Frame(self)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_scroll(self.body)
+
+    def _bind_scroll(self, widget):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._on_mousewheel)
+
+    def _create_cell(self):
+        """ساخت یک سلول (فقط هنگام بزرگ شدن ناحیه قابل مشاهده)"""
+        cell = ttk.Frame(self.body, width=self.cell_width, height=self.cell_height)
+        cell.grid_propagate(False)
+        cell.pack_propagate(False)
+
+        cell.icon_label = ttk.Label(cell, anchor=tk.CENTER)
+        cell.icon_label.pack(pady=(5, 0))
+        cell.name_label = ttk.Label(cell, wraplength=self.cell_width - 10, justify=tk.CENTER, anchor=tk.CENTER)
+        cell.name_label.pack(fill=tk.X)
+        cell.file_id = None
+        cell.icon_key = None
+
+        for widget in (cell, cell.icon_label, cell.name_label):
+            self._bind_scroll(widget)
+            widget.bind("<Double-1>", lambda e, c=cell: self._open(c))
+        return cell
+
+    def _open(self, cell):
+        if cell.file_id and self.on_open:
+            self.on_open(cell.file_id)
+
+    def _on_resize(self, event):
+        columns = max(1, event.width // self.cell_width)
+        rows = max(1, event.height // self.cell_height) + 1
+        if (columns, rows) == (self.columns, self.rows) and self.cells:
+            return
+
+        self.columns, self.rows = columns, rows
+        while len(self.cells) < columns * rows:
+            self.cells.append(self._create_cell())
+
+        for position, cell in enumerate(self.cells):
+            if position < columns * rows:
+                cell.grid(row=position // columns, column=position % columns, padx=2, pady=2)
+            else:
+                cell.grid_remove()
+
+        self.render()
+
+    @property
+    def total_rows(self):
+        return -(-len(self.files) // self.columns)
+
+    def set_files(self, files):
+        """نمایش لیست جدید از ابتدا"""
+        self.files = list(files)
+        self.first_row = 0
+        self.render()
+
+    def update_files(self, files):
+        """جایگزینی رکوردهای همان لیست (مثلاً پس از دریافت فیلدهای بیشتر) بدون تغییر موقعیت"""
+        self.files = list(files)
+        for cell in self.cells:
+            # اتصال دوباره سلول‌ها تا تصاویر تازه قابل دریافت درخواست شوند
+            cell.file_id = None
+        self.render()
+
+    def yview(self, *args):
+        if not args:
+            return
+
+        if args[0] == 'moveto':
+            first_row = int(float(args[1]) * self.total_rows)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, self.rows - 1)
+            first_row = self.first_row + amount
+        else:
+            return
+
+        self.scroll_to(first_row)
+
+    def scroll_to(self, first_row):
+        last_first_row = max(0, self.total_rows - (self.rows - 1))
+        first_row = max(0, min(first_row, last_first_row))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.render()
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            amount = -1
+        elif event.num == 5:
+            amount = 1
+        else:
+            amount = -1 if event.delta > 0 else 1
+
+        self.scroll_to(self.first_row + amount)
+        return "break"
+
+    def render(self):
+        """اتصال فایل‌های ناحیه قابل مشاهده به سلول‌های موجود"""
+        start = self.first_row * self.columns
+        visible = self.columns * self.rows
+
+        for position, cell in enumerate(self.cells[:visible]):
+            index = start + position
+            if index < len(self.files):
+                self.bind_cell(cell, self.files[index])
+            else:
+                self.bind_cell(cell, None)
+
+        total_rows = self.total_rows
+        if total_rows:
+            self.scrollbar.set(self.first_row / total_rows, min(1.0, (self.first_row + self.rows - 1) / total_rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def bind_cell(self, cell, file):
+        """اتصال داده یک فایل به سلول؛ سلول بدون داده خالی نمایش داده می‌شود"""
+        if file is not None and cell.file_id == file['id'] and cell.name_label.cget('text') == file['name']:
+            return
+
+        # آزاد کردن آیکون قبلی سلول تا در صورت نیاز از ثبت آیکون‌ها حذف شود
+        if cell.icon_key is not None:
+            self.icons.release(*cell.icon_key)
+            cell.icon_key = None
+
+        if file is None:
+            cell.file_id = None
+            cell.icon_label.configure(image='')
+            cell.icon_label.image = None
+            cell.name_label.configure(text='')
+            return
+
+        cell.icon_key = self.icon_factory(file)
+        icon = self.icons.acquire(*cell.icon_key)
+        cell.file_id = file['id']
+        cell.icon_label.configure(image=icon)
+        cell.icon_label.image = icon
+        cell.name_label.configure(text=file['name'])
+
+        # تصویر واقعی پس از آماده شدن جایگزین آیکون می‌شود
+        if self.image_loader is not None:
+            self.image_loader(file, self.set_image)
+
+    def set_image(self, file_id, image):
+        """جایگزینی تصویر سلولی که در حال نمایش فایل مشخص است (مثلاً پس از دریافت تصویر کوچک)"""
+        for cell in self.cells:
+            if cell.file_id == file_id:
+                cell.icon_label.configure(image=image)
+                cell.icon_label.image = image
+
+
+class ModernFileBrowser(ttk.Frame):
+    """مرورگر فایل پیشرفته با قابلیت‌های جدید"""
+
+    def __init__(self, parent, file_manager, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.file_manager = file_manager
+        self.assets = AppAssets(parent)
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
+        self.selected_files = []
+        self.download_manager = DownloadManager(file_manager, file_manager.max_parallel_downloads)
+        self.download_window = None
+        self.ui = UiDispatcher.shared(self)
+        self._load_generation = 0
+        self._load_cancel = None
+        self._type_ahead_job = None
+        self._type_ahead_query = ''
+        self._thumbnail_links_generation = None
+        self.setup_ui()
+        self.setup_file_preview()
+        self.setup_drag_drop()
+
+        # نمایش فوری آخرین وضعیت شناخته شده درایو
+        self.after_idle(self.show_cached_files)
+        threading.Thread(target=self.file_manager.warm_index, daemon=True).start()
+
+        # اعمال تغییرات دریافتی از Changes API روی نما
+        self.file_manager.changes.add_listener(self._on_drive_changes)
+
+    def setup_ui(self):
+        """تنظیم رابط کاربری پیشرفته"""
+        self.pack(fill=tk.BOTH, expand=True)
+
+        # نوار ابزار پیشرفته
+        self.create_advanced_toolbar()
+
+        # مرورگر فایل
+        self.create_modern_file_browser()
+
+        # نوار وضعیت پیشرفته
+        self.create_enhanced_status_bar()
+
+        # تنظیم رویدادها
+        self.setup_events()
+
+    def create_advanced_toolbar(self):
+        """ایجاد نوار ابزار پیشرفته"""
         toolbar = ttk.Frame(self, style="primary.TFrame")
         toolbar.pack(fill=tk.X, padx=5, pady=5)
 
-        # دکمه‌های ناوبری
-        nav_frame = ttk.Frame(toolbar)
-        nav_frame.pack(side=tk.LEFT)
+        # دکمه‌های ناوبری
+        nav_frame = ttk.Frame(toolbar)
+        nav_frame.pack(side=tk.LEFT)
+
+        self.back_btn = ttk.Button(
+            nav_frame,
+            text=self._("← Back"),
+            bootstyle="light",
+            image=self.assets.get_icon('back'),
+            compound=tk.LEFT,
+            command=self.navigate_back,
+            state=tk.DISABLED
+        )
+        self.back_btn.pack(side=tk.LEFT, padx=2)
+        ToolTip(self.back_btn, text=self._("Go back to previous folder"))
+
+        self.up_btn = ttk.Button(
+            nav_frame,
+            text=self._("↑ Up"),
+            bootstyle="light",
+            image=self.assets.get_icon('up'),
+            compound=tk.LEFT,
+            command=self.navigate_up,
+            state=tk.DISABLED
+        )
+        self.up_btn.pack(side=tk.LEFT, padx=2)
+        ToolTip(self.up_btn, text=self._("Go up to parent folder"))
+
+        self.refresh_btn = ttk.Button(
+            nav_frame,
+            bootstyle="light",
+            image=self.assets.get_icon('refresh'),
+            command=self.refresh_files,
+        )
+        self.refresh_btn.pack(side=tk.LEFT, padx=2)
+        ToolTip(self.refresh_btn, text=self._("Refresh file list"))
+
+        # نمایش مسیر
+        self.path_var = tk.StringVar()
+        path_entry = ttk.Entry(
+            toolbar,
+            textvariable=self.path_var,
+            state="readonly",
+            width=50,
+            style="info.TEntry"
+        )
+        path_entry.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+
+        # جستجوی پیشرفته
+        search_frame = ttk.Frame(toolbar)
+        search_frame.pack(side=tk.RIGHT)
+
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            width=25,
+            style="info.TEntry"
+        )
+        search_entry.pack(side=tk.LEFT, padx=2)
+        search_entry.insert(0, self._("Search Files..."))
+        search_entry.bind("<FocusIn>", lambda e: search_entry.delete(0, tk.END) if search_entry.get() == self._(
+            "Search Files...") else None)
+        search_entry.bind("<FocusOut>", lambda e: search_entry.insert(0, self._(
+            "Search Files...")) if not search_entry.get() else None)
+        search_entry.bind("<Return>", lambda e: self.search_files())
+        search_entry.bind("<KeyRelease>", self.schedule_type_ahead)
+
+        search_btn = ttk.Button(
+            search_frame,
+            bootstyle="info",
+            image=self.assets.get_icon('search'),
+            command=self.search_files
+        )
+        search_btn.pack(side=tk.LEFT)
+        ToolTip(search_btn, text=self._("Search files in current folder"))
+
+        # دکمه‌های عملیاتی
+        action_frame = ttk.Frame(toolbar)
+        action_frame.pack(side=tk.RIGHT, padx=5)
+
+        self.upload_btn = ttk.Button(
+            action_frame,
+            bootstyle="success",
+            image=self.assets.get_icon('upload'),
+            command=self.show_upload_dialog
+        )
+        self.upload_btn.pack(side=tk.LEFT, padx=2)
+        ToolTip(self.upload_btn, text=self._("Upload files"))
+
+        self.download_btn = ttk.Button(
+            action_frame,
+            bootstyle="info",
+            image=self.assets.get_icon('download'),
+            command=self.download_selected
+        )
+        self.download_btn.pack(side=tk.LEFT, padx=2)
+        ToolTip(self.download_btn, text=self._("Download selected files"))
+
+    def create_modern_file_browser(self):
+        """ایجاد مرورگر فایل مدرن"""
+        # نوت‌بوک برای نمایش مختلف فایل‌ها
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        # نمای لیست
+        self.list_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.list_frame, text=self._("List View"), image=self.assets.get_icon('list'),
+                          compound=tk.LEFT)
+
+        # Treeview پیشرفته
+        self.tree = ttk.Treeview(
+            self.list_frame,
+            columns=("name", "size", "type", "modified", "shared"),
+            show="headings",
+            style="modern.Treeview",
+            selectmode="extended"
+        )
+
+        # تنظیم ستون‌ها
+        columns = {
+            "name": {"text": self._("Name"), "width": 300, "anchor": tk.W},
+            "size": {"text": self._("Size"), "width": 100, "anchor": tk.CENTER},
+            "type": {"text": self._("Type"), "width": 100, "anchor": tk.CENTER},
+            "modified": {"text": self._("Modified"), "width": 150, "anchor": tk.CENTER},
+            "shared": {"text": self._("Shared"), "width": 80, "anchor": tk.CENTER}
+        }
+
+        for col, config in columns.items():
+            self.tree.heading(col, text=config["text"], anchor=config["anchor"])
+            self.tree.column(col, width=config["width"], anchor=config["anchor"])
+
+        # اسکرول‌بارها؛ اسکرول عمودی به لیست مجازی متصل است نه مستقیماً به Treeview
+        y_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL)
+        x_scroll = ttk.Scrollbar(self.list_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scroll.set)
+
+        # فقط ردیف‌های قابل مشاهده ساخته می‌شوند
+        self.file_list = VirtualTreeview(self.tree, y_scroll, self.get_row)
+
+        # چیدمان
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+
+        # تنظیم وزن‌های گرید
+        self.list_frame.grid_rowconfigure(0, weight=1)
+        self.list_frame.grid_columnconfigure(0, weight=1)
+
+        # نمای تصاویر کوچک
+        self.thumb_frame = ttk.Frame(self.notebook)
+        self.thumbnails = ThumbnailPipeline(self, self.file_manager)
+        self.thumb_grid = ThumbnailGrid(
+            self.thumb_frame,
+            icon_factory=self.get_thumbnail_icon,
+            on_open=self.open_item,
+            image_loader=self.thumbnails.request
+        )
+        self.thumb_grid.pack(fill=tk.BOTH, expand=True)
+        self.notebook.add(self.thumb_frame, text=self._("Thumbnail View"), image=self.assets.get_icon('image'),
+                          compound=tk.LEFT)
+
+        # نمای جزئیات
+        self.details_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.details_frame, text=self._("Details View"), image=self.assets.get_icon('info'),
+                          compound=tk.LEFT)
+
+        # نماهای تصاویر کوچک و جزئیات فقط هنگام فعال شدن تب ساخته می‌شوند
+        self.view_files = []
+        self.dirty_views = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_view_changed)
+
+    def create_enhanced_status_bar(self):
+        """ایجاد نوار وضعیت پیشرفته"""
+        status_bar = ttk.Frame(self, style="info.TFrame")
+        status_bar.pack(fill=tk.X, padx=5, pady=(0, 5))
+
+        # پیام وضعیت
+        self.status_var = tk.StringVar(value=self._("Ready"))
+        status_label = ttk.Label(
+            status_bar,
+            textvariable=self.status_var,
+            bootstyle="inverse",
+            anchor=tk.W
+        )
+        status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        # اطلاعات ذخیره‌سازی
+        self.storage_var = tk.StringVar(value="")
+        storage_label = ttk.Label(
+            status_bar,
+            textvariable=self.storage_var,
+            bootstyle="inverse",
+            width=30
+        )
+        storage_label.pack(side=tk.RIGHT)
+
+        # اطلاعات انتخاب
+        self.selection_var = tk.StringVar(value="0 items selected")
+        selection_label = ttk.Label(
+            status_bar,
+            textvariable=self.selection_var,
+            bootstyle="inverse",
+            width=20
+        )
+        selection_label.pack(side=tk.RIGHT)
+
+        # نشانگر بارگذاری پوشه (فقط هنگام دریافت لیست نمایش داده می‌شود)
+        self.loading_bar = ttk.Progressbar(
+            status_bar,
+            mode='indeterminate',
+            bootstyle="info-striped",
+            length=80
+        )
+
+        # به‌روزرسانی اطلاعات ذخیره‌سازی
+        self.update_storage_info()
+
+    def setup_file_preview(self):
+        """تنظیم پیش‌نمایش فایل"""
+        self.preview_window = tk.Toplevel(self)
+        self.preview_window.withdraw()
+        self.preview_window.overrideredirect(True)
+        self.preview_window.attributes('-alpha', 0.9)
+
+        self.preview_label = ttk.Label(self.preview_window)
+        self.preview_label.pack()
+
+        self.preview = PreviewService(self, self.file_manager, self.display_preview)
+        self.preview_position = (0, 0)
+
+        self.tree.bind("<Motion>", self.show_file_preview)
+        self.tree.bind("<Leave>", self.hide_file_preview)
+
+    def show_file_preview(self, event):
+        """نمایش پیش‌نمایش فایل هنگام hover؛ دریافت تصویر در پس‌زمینه انجام می‌شود"""
+        self.preview_position = (event.x_root + 20, event.y_root + 20)
+        item = self.tree.identify_row(event.y)
+        file = self.get_file(item) if item else None
+
+        if not file or 'image/' not in file['mimeType']:
+            self.hide_file_preview(event)
+            return
+
+        self.preview.request(file)
+        if self.preview_window.winfo_viewable():
+            self.preview_window.geometry("+{}+{}".format(*self.preview_position))
+
+    def display_preview(self, file, photo):
+        """نمایش تصویر آماده شده در پنجره پیش‌نمایش"""
+        self.preview_label.configure(image=photo)
+        self.preview_label.image = photo
+
+        self.preview_window.deiconify()
+        self.preview_window.geometry("+{}+{}".format(*self.preview_position))
+
+    def hide_file_preview(self, event=None):
+        """پنهان کردن پیش‌نمایش فایل"""
+        self.preview.cancel()
+        self.preview_window.withdraw()
+
+    def setup_drag_drop(self):
+        """تنظیم قابلیت کشیدن و رها کردن"""
+        self.tree.bind("<ButtonPress-1>", self.on_drag_start, add='+')
+        self.tree.bind("<B1-Motion>", self.on_drag_motion)
+        self.tree.bind("<ButtonRelease-1>", self.on_drag_end)
+
+        self.drag_data = {"item": None, "x": 0, "y": 0}
+
+    def on_drag_start(self, event):
+        """شروع عملیات کشیدن"""
+        item = self.tree.identify_row(event.y)
+        if item:
+            self.drag_data["item"] = item
+            self.drag_data["x"] = event.x
+            self.drag_data["y"] = event.y
+
+    def on_drag_motion(self, event):
+        """حرکت در حین کشیدن"""
+        if self.drag_data["item"]:
+            # می‌توانید اینجا افکت‌های بصری اضافه کنید
+            pass
+
+    def on_drag_end(self, event):
+        """پایان عملیات کشیدن"""
+        if self.drag_data["item"]:
+            target_item = self.tree.identify_row(event.y)
+            if target_item and self.drag_data["item"] != target_item:
+                # انجام عملیات جابجایی
+                self.move_item(self.drag_data["item"], target_item)
+
+            self.drag_data["item"] = None
+
+    def move_item(self, source_item, target_item):
+        """جابجایی فایل/پوشه"""
+        # آیتم‌های Treeview همان ID فایل‌ها در درایو هستند
+        source_file = self.get_file(source_item)
+        target_file = self.get_file(target_item)
+
+        if source_file and target_file:
+            if target_file['mimeType'] == 'application/vnd.google-apps.folder':
+                # جابجایی به پوشه مقصد
+                try:
+                    # ابتدا فایل را از پوشه فعلی حذف می‌کنیم
+                    self.file_manager.remove_parent(source_file['id'], self.file_manager.current_folder_id)
+
+                    # سپس به پوشه جدید اضافه می‌کنیم
+                    self.file_manager.add_parent(source_file['id'], target_file['id'])
+
+                    # به‌روزرسانی لیست فایل‌ها
+                    self.load_files()
+
+                    self.status_var.set(self._("Moved '{}' to '{}'").format(source_file['name'], target_file['name']))
+                except Exception as e:
+                    self.status_var.set(self._("Error moving file: {}").format(str(e)))
+            else:
+                self.status_var.set(self._("Can only move to folders"))
+
+    def setup_events(self):
+        """تنظیم رویدادهای مختلف"""
+        self.tree.bind("<Double-1>", self.on_item_double_click)
+        self.tree.bind("<Button-3>", self.show_context_menu)
+        self.tree.bind("<<TreeviewSelect>>", self.update_selection_count, add='+')
 
-        self.back_btn = ttk.Button(
-            nav_frame,
-            text=self._("← Back"),
-            bootstyle="light",
-            image=self.assets.get_icon('back'),
+        # ایجاد منوی زمینه
+        self.create_context_menu()
+
+        # تنظیمات کشیدن و رها کردن
+        self.setup_drag_drop()
+
+    def create_context_menu(self):
+        """ایجاد منوی زمینه پیشرفته"""
+        self.context_menu = tk.Menu(self, tearoff=0, font=self.lang.get_font())
+
+        self.context_menu.add_command(
+            label=self._("Open"),
+            image=self.assets.get_icon('file'),
             compound=tk.LEFT,
-            command=self.navigate_back,
-            state=tk.DISABLED
+            command=self.open_selected,
+            accelerator="Enter"
         )
-        self.back_btn.pack(side=tk.LEFT, padx=2)
-        ToolTip(self.back_btn, text=self._("Go back to previous folder"))
 
-        self.up_btn = ttk.Button(
-            nav_frame,
-            text=self._("↑ Up"),
-            bootstyle="light",
-            image=self.assets.get_icon('up'),
+        self.context_menu.add_command(
+            label=self._("Download"),
+            image=self.assets.get_icon('download'),
             compound=tk.LEFT,
-            command=self.navigate_up,
-            state=tk.DISABLED
+            command=self.download_selected,
+            accelerator="Ctrl+D"
         )
-        self.up_btn.pack(side=tk.LEFT, padx=2)
-        ToolTip(self.up_btn, text=self._("Go up to parent folder"))
 
-        self.refresh_btn = ttk.Button(
-            nav_frame,
-            bootstyle="light",
-            image=self.assets.get_icon('refresh'),
-            command=self.refresh_files,
+        self.context_menu.add_command(
+            label=self._("Rename"),
+            image=self.assets.get_icon('edit'),
+            compound=tk.LEFT,
+            command=self.rename_selected,
+            accelerator="F2"
         )
-        self.refresh_btn.pack(side=tk.LEFT, padx=2)
-        ToolTip(self.refresh_btn, text=self._("Refresh file list"))
 
-        # نمایش مسیر
-        self.path_var = tk.StringVar()
-        path_entry = ttk.Entry(
-            toolbar,
-            textvariable=self.path_var,
-            state="readonly",
-            width=50,
-            style="info.TEntry"
+        self.context_menu.add_command(
+            label=self._("Share"),
+            image=self.assets.get_icon('share'),
+            compound=tk.LEFT,
+            command=self.share_selected,
+            accelerator="Ctrl+S"
         )
-        path_entry.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
 
-        # جستجوی پیشرفته
-        search_frame = ttk.Frame(toolbar)
-        search_frame.pack(side=tk.RIGHT)
+        self.context_menu.add_separator()
 
-        self.search_var = tk.StringVar()
-        search_entry = ttk.Entry(
-            search_frame,
-            textvariable=self.search_var,
-            width=25,
-            style="info.TEntry"
+        self.context_menu.add_command(
+            label=self._("Delete"),
+            image=self.assets.get_icon('delete'),
+            compound=tk.LEFT,
+            command=self.delete_selected,
+            accelerator="Del"
         )
-        search_entry.pack(side=tk.LEFT, padx=2)
-        search_entry.insert(0, self._("Search Files..."))
-        search_entry.bind("<FocusIn>", lambda e: search_entry.delete(0, tk.END) if search_entry.get() == self._(
-            "Search Files...") else None)
-        search_entry.bind("<FocusOut>", lambda e: search_entry.insert(0, self._(
-            "Search Files...")) if not search_entry.get() else None)
-        search_entry.bind("<Return>", lambda e: self.search_files())
 
-        search_btn = ttk.Button(
-            search_frame,
-            bootstyle="info",
-            image=self.assets.get_icon('search'),
-            command=self.search_files
+        self.context_menu.add_separator()
+
+        self.context_menu.add_command(
+            label=self._("Properties"),
+            image=self.assets.get_icon('info'),
+            compound=tk.LEFT,
+            command=self.show_properties,
+            accelerator="Alt+Enter"
         )
-        search_btn.pack(side=tk.LEFT)
-        ToolTip(search_btn, text=self._("Search files in current folder"))
 
-        # دکمه‌های عملیاتی
-        action_frame = ttk.Frame(toolbar)
-        action_frame.pack(side=tk.RIGHT, padx=5)
+    def update_selection_count(self, event):
+        """به‌روزرسانی تعداد فایل‌های انتخاب شده"""
+        selected = len(self.file_list.selection())
+        self.selection_var.set(f"{selected} items selected")
+
+    def load_files(self, revalidate=False):
+        """بارگذاری فایل‌ها؛ آخرین لیست شناخته شده فوراً نمایش داده و لیست جدید در پس‌زمینه دریافت می‌شود"""
+        folder_id = self.file_manager.current_folder_id
+        generation, cancel_event = self._begin_load()
+
+        # فقط لیست‌های موجود در حافظه در همین thread نمایش داده می‌شوند؛ خواندن SQLite در پس‌زمینه است
+        cached = self.file_manager.get_memory_listing(folder_id)
+        if cached is not None:
+            self._show_cached_listing(generation, cancel_event, folder_id, *cached, revalidate)
+            return
+
+        self.status_var.set(self._("Loading files..."))
+        self.file_list.clear()
+        self._set_loading(True)
+
+        threading.Thread(
+            target=self._load_listing,
+            args=(folder_id, generation, cancel_event, revalidate),
+            daemon=True
+        ).start()
+
+    def _load_listing(self, folder_id, generation, cancel_event, revalidate):
+        """خواندن لیست ذخیره شده روی دیسک در پس‌زمینه؛ در نبود آن لیست از سرور دریافت می‌شود"""
+        cached_files, timestamp = self.file_manager.get_cached_listing(folder_id)
+        if cancel_event.is_set():
+            return
+
+        if cached_files is None:
+            self._fetch_listing(folder_id, generation, cancel_event)
+            return
+
+        self.ui.post(
+            self._show_cached_listing, generation, cancel_event, folder_id, cached_files, timestamp, revalidate
+        )
 
-        self.upload_btn = ttk.Button(
-            action_frame,
-            bootstyle="success",
-            image=self.assets.get_icon('upload'),
-            command=self.show_upload_dialog
+    def _show_cached_listing(self, generation, cancel_event, folder_id, cached_files, timestamp, revalidate):
+        """نمایش لیست کش شده و در صورت قدیمی بودن، دریافت نسخه جدید در پس‌زمینه"""
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.update_file_list(cached_files)
+        self.status_var.set(self._("Loaded {} items").format(len(cached_files)))
+
+        stale = revalidate or not self.file_manager.is_listing_fresh(timestamp)
+        if not stale:
+            self.file_manager.prefetcher.prefetch(folder_id, cached_files)
+        elif self.file_manager.access_token:
+            self.status_var.set(self._("Showing cached items, refreshing..."))
+            self._set_loading(True)
+            threading.Thread(
+                target=self._revalidate_listing,
+                args=(folder_id, generation, cancel_event),
+                daemon=True
+            ).start()
+
+    def _begin_load(self):
+        """لغو بارگذاری در جریان و شروع یک نسل جدید؛ پاسخ‌های نسل‌های قبلی دور ریخته می‌شوند"""
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        self.file_manager.prefetcher.cancel()
+
+        self._load_generation += 1
+        self._load_cancel = threading.Event()
+        self._set_loading(False)
+        return self._load_generation, self._load_cancel
+
+    def _is_current_load(self, generation):
+        return generation == self._load_generation
+
+    def _set_loading(self, loading):
+        """نمایش یا پنهان کردن حالت بارگذاری"""
+        if loading:
+            self.loading_bar.pack(side=tk.RIGHT, padx=5)
+            self.loading_bar.start(15)
+        else:
+            self.loading_bar.stop()
+            self.loading_bar.pack_forget()
+
+    def _fetch_listing(self, folder_id, generation, cancel_event):
+        """دریافت صفحات لیست در پس‌زمینه و ارسال هر صفحه به thread رابط کاربری"""
+        files = []
+        try:
+            for page in self.file_manager.iter_files(folder_id, cancel_event=cancel_event):
+                if cancel_event.is_set():
+                    return
+                files.extend(page)
+                self.ui.post(self._append_loaded_page, generation, page, len(files))
+        except Exception as e:
+            if not cancel_event.is_set():
+                self.ui.post(self._on_listing_failed, generation, str(e))
+            return
+
+        if not cancel_event.is_set():
+            self.ui.post(self._on_listing_loaded, generation, files)
+
+    def _append_loaded_page(self, generation, page, loaded_count):
+        """افزودن یک صفحه دریافت شده در صورتی که کاربر هنوز در همان پوشه باشد"""
+        if not self._is_current_load(generation):
+            return
+
+        self.append_file_list(page)
+        self.status_var.set(self._("Loading files... {} items").format(loaded_count))
+
+    def _on_listing_loaded(self, generation, files):
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.refresh_views(files)
+        self.status_var.set(self._("Loaded {} items").format(len(files)))
+        self.file_manager.prefetcher.prefetch(self.file_manager.current_folder_id, files)
+
+    def _on_listing_failed(self, generation, error):
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.status_var.set(self._("Error: {}").format(error))
+        Messagebox.show_error(error, self._("Error loading files"))
+
+    def show_cached_files(self):
+        """نمایش آخرین لیست ذخیره شده در شروع برنامه بدون نیاز به شبکه؛ لیست در پس‌زمینه خوانده می‌شود"""
+        self.update_navigation_buttons()
+        generation, cancel_event = self._begin_load()
+        threading.Thread(
+            target=self._read_cached_files,
+            args=(self.file_manager.current_folder_id, generation, cancel_event),
+            daemon=True
+        ).start()
+
+    def _read_cached_files(self, folder_id, generation, cancel_event):
+        cached_files, _ = self.file_manager.get_cached_listing(folder_id)
+        if cached_files is not None and not cancel_event.is_set():
+            self.ui.post(self._show_startup_files, generation, cached_files)
+
+    def _show_startup_files(self, generation, cached_files):
+        if not self._is_current_load(generation):
+            return
+
+        self.update_file_list(cached_files)
+        self.status_var.set(self._("Showing {} cached items").format(len(cached_files)))
+
+    def _revalidate_listing(self, folder_id, generation, cancel_event):
+        """دریافت نسخه جدید لیست در پس‌زمینه"""
+        try:
+            # حذف نسخه قدیمی از کش حافظه تا لیست از سرور دریافت شود
+            self.file_manager.file_cache.pop(folder_id, None)
+            files = self.file_manager.list_files(folder_id, cancel_event=cancel_event)
+        except Exception as e:
+            logger.error(f"Error revalidating folder {folder_id}: {e}")
+            self.ui.post(self._on_revalidate_failed, generation)
+            return
+
+        if not cancel_event.is_set():
+            self.ui.post(self._apply_revalidated_listing, generation, files)
+
+    def _on_revalidate_failed(self, generation):
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.status_var.set(self._("Offline: showing cached items"))
+
+    def _apply_revalidated_listing(self, generation, files):
+        """اعمال لیست به‌روز شده در صورتی که کاربر هنوز در همان پوشه باشد"""
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.update_file_list(files)
+        self.status_var.set(self._("Loaded {} items").format(len(files)))
+        self.file_manager.prefetcher.prefetch(self.file_manager.current_folder_id, files)
+
+    def update_file_list(self, files):
+        """به‌روزرسانی لیست فایل‌ها با اطلاعات جدید"""
+        self.file_list.set_records(self.folders_first(files))
+
+        # نماهای تصاویر کوچک و جزئیات
+        self.refresh_views(files)
+
+    def refresh_views(self, files):
+        """ثبت لیست جدید برای نماهای دیگر؛ فقط تب فعال بلافاصله بازسازی می‌شود"""
+        self.view_files = files
+        self.dirty_views = {'thumbnails', 'details'}
+        self.render_active_view()
+
+    def active_view(self):
+        """نام نمای تب فعال نوت‌بوک"""
+        selected = self.notebook.select()
+        if selected == str(self.thumb_frame):
+            return 'thumbnails'
+        if selected == str(self.details_frame):
+            return 'details'
+        return 'list'
+
+    def on_view_changed(self, event=None):
+        """بازسازی تب تازه فعال شده در صورتی که از آخرین تغییر لیست ساخته نشده باشد"""
+        self.render_active_view()
+
+    def render_active_view(self):
+        view = self.active_view()
+        if view not in self.dirty_views:
+            return
+
+        self.dirty_views.discard(view)
+        if view == 'thumbnails':
+            self.update_thumbnail_view(self.view_files)
+        else:
+            self.update_details_view(self.view_files)
+
+    def append_file_list(self, files):
+        """افزودن یک صفحه از فایل‌ها به انتهای لیست"""
+        self.file_list.append(self.folders_first(files))
+
+    @staticmethod
+    def folders_first(files):
+        """پوشه‌ها اول نمایش داده می‌شوند و سپس فایل‌ها"""
+        folders = [f for f in files if f['mimeType'] == 'application/vnd.google-apps.folder']
+        other_files = [f for f in files if f['mimeType'] != 'application/vnd.google-apps.folder']
+        return folders + other_files
+
+    def get_row(self, file):
+        """مقادیر، تگ‌ها و آیکون یک ردیف؛ فقط برای ردیف‌های قابل مشاهده فراخوانی می‌شود"""
+        if file['mimeType'] == 'application/vnd.google-apps.folder':
+            return self.get_row_values(file), ('folder',), self.assets.get_icon('folder')
+        return self.get_row_values(file), ('file',), self.get_file_icon(file['mimeType'])
+
+    def get_row_values(self, file):
+        """مقادیر ستون‌های یک ردیف از لیست"""
+        if file['mimeType'] == 'application/vnd.google-apps.folder':
+            size = ""
+            file_type = self._("Folder")
+        else:
+            size = self.format_size(int(file.get('size', 0)))
+            file_type = self.get_file_type(file['mimeType'])
+
+        return (
+            file['name'],
+            size,
+            file_type,
+            self.format_date(file['modifiedTime']),
+            self._("Yes") if file.get('shared', False) else self._("No")
         )
-        self.upload_btn.pack(side=tk.LEFT, padx=2)
-        ToolTip(self.upload_btn, text=self._("Upload files"))
 
-        self.download_btn = ttk.Button(
-            action_frame,
-            bootstyle="info",
-            image=self.assets.get_icon('download'),
-            command=self.download_selected
+    def _on_drive_changes(self, changes):
+        """دریافت تغییرات از thread پیگیری و ارسال به thread رابط کاربری"""
+        self.ui.post(self.apply_drive_changes, changes)
+
+    def apply_drive_changes(self, changes):
+        """اعمال تغییرات (افزودن، حذف، تغییر نام و جابجایی) روی نمای فعلی بدون دریافت مجدد لیست"""
+        folder_id = self.file_manager.current_folder_id
+        applied = 0
+
+        for change in changes:
+            file_id = change['file_id']
+            in_folder = folder_id in change['parents']
+
+            if self.file_list.contains(file_id):
+                if in_folder:
+                    self.file_list.update(change['file'])
+                else:
+                    self.file_list.remove(file_id)
+                applied += 1
+            elif in_folder:
+                self.append_file_list([change['file']])
+                applied += 1
+
+        if applied:
+            # رکوردهای نمای لیست همین حالا به‌روز شده‌اند؛ نیازی به خواندن کش نیست
+            self.refresh_views(list(self.file_list.records))
+            self.status_var.set(self._("{} changes applied").format(applied))
+
+    def update_thumbnail_view(self, files):
+        """به‌روزرسانی نمای تصاویر کوچک؛ سلول‌های موجود دوباره استفاده می‌شوند"""
+        self.thumb_grid.set_files(self.folders_first(files))
+        self.load_thumbnail_links(files)
+
+    def load_thumbnail_links(self, files):
+        """دریافت thumbnailLink فقط وقتی نمای تصاویر کوچک نمایش داده می‌شود"""
+        if self._thumbnail_links_generation == self._load_generation:
+            return
+        if not self.file_manager.access_token:
+            return
+        if not any(f.get('hasThumbnail') and 'thumbnailLink' not in f for f in files):
+            return
+
+        self._thumbnail_links_generation = self._load_generation
+        threading.Thread(
+            target=self._fetch_thumbnail_links,
+            args=(self.file_manager.current_folder_id, self._load_generation, self._load_cancel),
+            daemon=True
+        ).start()
+
+    def _fetch_thumbnail_links(self, folder_id, generation, cancel_event):
+        try:
+            records = self.file_manager.load_projection(folder_id, 'thumbnails', cancel_event)
+        except Exception as e:
+            logger.error(f"Error loading thumbnail links for {folder_id}: {e}")
+            return
+
+        if records:
+            self.ui.post(self._apply_thumbnail_links, generation, records)
+
+    def _apply_thumbnail_links(self, generation, records):
+        if not self._is_current_load(generation):
+            return
+
+        self.view_files = [records.get(f['id'], f) for f in self.view_files]
+        self.thumb_grid.update_files(self.folders_first(self.view_files))
+
+    @staticmethod
+    def get_thumbnail_icon(file):
+        """کلید آیکون بزرگ یک سلول در نمای تصاویر کوچک"""
+        return IconRegistry.shared().describe(file['mimeType'])[0], (64, 64)
+
+    def update_details_view(self, files):
+        """به‌روزرسانی نمای جزئیات"""
+        # پاکسازی ویجت‌های قبلی
+        for widget in self.details_frame.winfo_children():
+            widget.destroy()
+
+        # ایجاد جدول جزئیات
+        columns = [
+            {"text": "Name", "stretch": True},
+            {"text": "Size", "stretch": False},
+            {"text": "Type", "stretch": False},
+            {"text": "Modified", "stretch": False},
+            {"text": "Shared", "stretch": False}
+        ]
+
+        rows = []
+        for file in files:
+            rows.append((
+                file['name'],
+                self.format_size(int(file.get('size', 0))),
+                self.get_file_type(file['mimeType']),
+                self.format_date(file['modifiedTime']),
+                "Yes" if file.get('shared', False) else "No"
+            ))
+
+        self.details_table = Tableview(
+            self.details_frame,
+            coldata=columns,
+            rowdata=rows,
+            paginated=True,
+            pagesize=20,
+            height=20,
+            searchable=True,
+            bootstyle="info"
         )
-        self.download_btn.pack(side=tk.LEFT, padx=2)
-        ToolTip(self.download_btn, text=self._("Download selected files"))
+        self.details_table.pack(fill=tk.BOTH, expand=True)
 
-    def create_modern_file_browser(self):
-        """ایجاد مرورگر فایل مدرن"""
-        # نوت‌بوک برای نمایش مختلف فایل‌ها
-        self.notebook = ttk.Notebook(self)
-        self.notebook.pack(fill=tk.BOTH, expand=True)
+    def on_item_double_click(self, event):
+        """رویداد دابل کلیک روی آیتم"""
+        selected = self.file_list.selection()
+        if selected:
+            self.open_item(selected[0])
 
-        # نمای لیست
-        self.list_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.list_frame, text=self._("List View"), image=self.assets.get_icon('list'),
-                          compound=tk.LEFT)
+    def open_item(self, item):
+        """باز کردن آیتم انتخاب شده"""
+        file = self.get_file(item)
+        if not file:
+            return
 
-        # Treeview پیشرفته
-        self.tree = ttk.Treeview(
-            self.list_frame,
-            columns=("name", "size", "type", "modified", "shared"),
-            show="headings",
-            style="modern.Treeview",
-            selectmode="extended"
+        if file['mimeType'] == 'application/vnd.google-apps.folder':
+            try:
+                self.navigate_to(file['id'])
+            except Exception as e:
+                self.status_var.set(self._("Error: {}").format(str(e)))
+        else:
+            webbrowser.open(f"https://drive.google.com/file/d/{file['id']}/view")
+
+    def navigate_to(self, folder_id):
+        """رفتن به یک پوشه و افزودن آن به تاریخچه"""
+        self.file_manager.current_folder_id = folder_id
+        self.file_manager.folder_stack.append(folder_id)
+        self.load_files()
+        self.update_navigation_buttons()
+
+    def navigate_back(self):
+        """بازگشت به پوشه قبلی"""
+        if len(self.file_manager.folder_stack) > 1:
+            self.file_manager.folder_stack.pop()
+            self.file_manager.current_folder_id = self.file_manager.folder_stack[-1]
+            self.load_files()
+            self.update_navigation_buttons()
+
+    def navigate_up(self):
+        """رفتن به پوشه والد واقعی؛ اگر والد در کش نباشد در پس‌زمینه دریافت می‌شود"""
+        folders = self.file_manager.folders
+        folder_id = self.file_manager.current_folder_id
+        if folders.is_root(folder_id):
+            return
+
+        parent_id = folders.parent_of(folder_id)
+        if parent_id is not None:
+            self.navigate_to(parent_id)
+            return
+
+        threading.Thread(target=self._fetch_parent, args=(folder_id,), daemon=True).start()
+
+    def _fetch_parent(self, folder_id):
+        try:
+            parent_id = self.file_manager.folders.parent_of(folder_id, fetch=True)
+        except Exception as e:
+            self.ui.post(self.status_var.set, self._("Error: {}").format(str(e)))
+            return
+
+        # پوشه‌های خارج از My Drive والدی ندارند؛ به ریشه می‌رویم
+        self.ui.post(self._navigate_up_to, folder_id, parent_id or 'root')
+
+    def _navigate_up_to(self, folder_id, parent_id):
+        # کاربر در این فاصله به پوشه دیگری رفته است
+        if self.file_manager.current_folder_id == folder_id:
+            self.navigate_to(parent_id)
+
+    def refresh_files(self):
+        """به‌روزرسانی از طریق Changes API؛ به جای دریافت کامل لیست فقط تغییرات دریافت می‌شود"""
+        if not self.file_manager.access_token:
+            self.load_files()
+            return
+
+        self.status_var.set(self._("Checking for changes..."))
+        threading.Thread(target=self._refresh_from_changes, daemon=True).start()
+
+    def _refresh_from_changes(self):
+        """دریافت تغییرات در پس‌زمینه؛ تغییرات از طریق listener روی نما اعمال می‌شوند"""
+        try:
+            changes = self.file_manager.changes.poll()
+        except Exception as e:
+            logger.error(f"Error polling changes, falling back to full refresh: {e}")
+            self.ui.post(self._full_refresh)
+            return
+
+        self.ui.post(self._on_refresh_done, len(changes))
+
+    def _on_refresh_done(self, change_count):
+        """پایان به‌روزرسانی؛ پوشه‌هایی که پیش از شروع پیگیری لیست شده‌اند دوباره دریافت می‌شوند"""
+        cached = self.file_manager.get_memory_listing()
+        if cached is None or not self.file_manager.is_listing_fresh(cached[1]):
+            self.load_files()
+            return
+
+        self.status_var.set(self._("Up to date ({} changes)").format(change_count))
+
+    def _full_refresh(self):
+        """دریافت کامل لیست پوشه فعلی"""
+        self.file_manager.clear_cache()
+        self.load_files(revalidate=True)
+
+    def update_navigation_buttons(self):
+        """به‌روزرسانی وضعیت دکمه‌های ناوبری و مسیر نمایشی"""
+        folder_id = self.file_manager.current_folder_id
+        self.back_btn['state'] = tk.NORMAL if len(self.file_manager.folder_stack) > 1 else tk.DISABLED
+        self.up_btn['state'] = tk.DISABLED if self.file_manager.folders.is_root(folder_id) else tk.NORMAL
+        self.update_breadcrumb()
+
+    def update_breadcrumb(self):
+        """نمایش مسیر کامل پوشه فعلی از کش؛ بخش‌های ناشناخته در پس‌زمینه دریافت می‌شوند"""
+        folder_id = self.file_manager.current_folder_id
+        names, complete = self.file_manager.folders.breadcrumb(folder_id)
+        self.path_var.set(" > ".join(names))
+
+        if not complete and self.file_manager.access_token:
+            threading.Thread(target=self._fetch_ancestors, args=(folder_id,), daemon=True).start()
+
+    def _fetch_ancestors(self, folder_id):
+        try:
+            _, complete = self.file_manager.folders.ancestors(folder_id, fetch=True)
+        except Exception as e:
+            logger.error(f"Error resolving path of {folder_id}: {e}")
+            return
+
+        if complete:
+            self.ui.post(self._refresh_breadcrumb, folder_id)
+
+    def _refresh_breadcrumb(self, folder_id):
+        if self.file_manager.current_folder_id == folder_id:
+            self.update_breadcrumb()
+
+    def show_context_menu(self, event):
+        """نمایش منوی زمینه"""
+        item = self.tree.identify_row(event.y)
+        if item:
+            self.file_list.select_only(item)
+            try:
+                self.context_menu.tk_popup(event.x_root, event.y_root)
+            finally:
+                self.context_menu.grab_release()
+
+    def open_selected(self):
+        """باز کردن آیتم انتخاب شده"""
+        selected = self.file_list.selection()
+        if selected:
+            self.open_item(selected[0])
+
+    def download_selected(self):
+        """دانلود تمام فایل‌ها و پوشه‌های انتخاب شده از طریق صف دانلود"""
+        selected = self.file_list.selection()
+        if not selected:
+            Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
+            return
+
+        files = [file for file in (self.get_file(item) for item in selected) if file]
+        if not files:
+            return
+
+        try:
+            if len(files) == 1 and files[0]['mimeType'] != 'application/vnd.google-apps.folder':
+                save_path = filedialog.asksaveasfilename(
+                    title=self._("Save File"),
+                    initialfile=files[0]['name'],
+                    defaultextension=".*"
+                )
+
+                if not save_path:
+                    return
+
+                self.download_manager.enqueue(files[0], save_path)
+            else:
+                # پوشه‌ها به صورت بازگشتی در مقصد بازسازی می‌شوند
+                target_dir = filedialog.askdirectory(title=self._("Select Download Folder"))
+                if not target_dir:
+                    return
+
+                self.download_manager.add_selection(files, target_dir)
+
+            self.show_download_queue()
+
+        except Exception as e:
+            Messagebox.show_error(str(e), self._("Error"))
+
+    def show_download_queue(self):
+        """نمایش پنجره صف دانلود"""
+        if self.download_window is None or not self.download_window.winfo_exists():
+            self.download_window = DownloadQueueWindow(self, self.download_manager)
+        else:
+            self.download_window.deiconify()
+            self.download_window.lift()
+
+    def get_selected_files(self):
+        """متادیتای تمام آیتم‌های انتخاب شده"""
+        return [file for file in map(self.get_file, self.file_list.selection()) if file]
+
+    def run_batch(self, operation, args, success_message):
+        """اجرای یک عملیات گروهی در پس‌زمینه و نمایش نتیجه در thread رابط کاربری"""
+        self.status_var.set(self._("Processing {} items...").format(len(args[0])))
+
+        def worker():
+            try:
+                errors = operation(*args)
+            except Exception as e:
+                self.ui.post(Messagebox.show_error, str(e), self._("Error"))
+                return
+            self.ui.post(self._on_batch_done, errors, success_message)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_batch_done(self, errors, success_message):
+        failed = {file_id: error for file_id, error in errors.items() if error}
+        succeeded = len(errors) - len(failed)
+
+        for file_id in errors:
+            if file_id not in failed and self.file_list.contains(file_id):
+                file = self.get_file(file_id)
+                if file is None:
+                    self.file_list.remove(file_id)
+                else:
+                    self.file_list.update(file)
+
+        self.status_var.set(success_message.format(succeeded))
+        if failed:
+            Messagebox.show_error(
+                self._("{} of {} items failed:\n{}").format(
+                    len(failed), len(errors), "\n".join(list(failed.values())[:10])),
+                self._("Error")
+            )
+
+    def run_action(self, operation, args, success_message):
+        """اجرای عملیات روی یک فایل در پس‌زمینه؛ پس از پایان لیست دوباره نمایش و نتیجه اعلام می‌شود"""
+        def worker():
+            try:
+                operation(*args)
+            except Exception as e:
+                self.ui.post(Messagebox.show_error, str(e), self._("Error"))
+                return
+            self.ui.post(self._on_action_done, success_message)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_action_done(self, success_message):
+        self.load_files()
+        Messagebox.show_info(success_message, self._("Success"))
+
+    def rename_selected(self):
+        """تغییر نام فایل انتخاب شده؛ برای چند فایل از الگوی نام و درخواست گروهی استفاده می‌شود"""
+        selected = self.file_list.selection()
+        if not selected:
+            Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
+            return
+
+        if len(selected) > 1:
+            self.rename_many(self.get_selected_files())
+            return
+
+        file = self.get_file(selected[0])
+        if not file:
+            return
+        old_name = file['name']
+
+        new_name = Querybox.get_string(
+            prompt=self._("Enter new name:"),
+            title=self._("Rename File"),
+            initialvalue=old_name,
+            parent=self
+        )
+
+        if not new_name or new_name == old_name:
+            return
+
+        self.run_action(
+            self.file_manager.rename_file,
+            (file['id'], new_name),
+            self._("File renamed successfully")
+        )
+
+    def rename_many(self, files):
+        """تغییر نام گروهی با الگو؛ {name} نام فعلی و {n} شماره ترتیبی است"""
+        pattern = Querybox.get_string(
+            prompt=self._("Enter a name pattern for {} items ({{name}} = current name, {{n}} = number):").format(
+                len(files)),
+            title=self._("Rename Files"),
+            initialvalue="{name}",
+            parent=self
+        )
+
+        if not pattern or pattern == "{name}":
+            return
+
+        renames = []
+        for number, file in enumerate(files, 1):
+            base, ext = os.path.splitext(file['name'])
+            new_name = pattern.replace("{name}", base).replace("{n}", str(number))
+            if file['mimeType'] != 'application/vnd.google-apps.folder' and not os.path.splitext(new_name)[1]:
+                new_name += ext
+            renames.append((file['id'], new_name))
+
+        self.run_batch(self.file_manager.batch_rename, (renames,), self._("Renamed {} items"))
+
+    def share_selected(self):
+        """اشتراک‌گذاری فایل(های) انتخاب شده"""
+        files = self.get_selected_files()
+        if not files:
+            Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
+            return
+
+        file = files[0]
+        if len(files) > 1:
+            item_name = self._("{} items").format(len(files))
+        else:
+            item_name = file['name']
+
+        share_type = Querybox.get_string(
+            prompt=self._(
+                "Share '{}' with:\n1. Specific user (enter email)\n2. Anyone with link (enter 'public')\n3. Cancel (leave blank)").format(
+                item_name),
+            title=self._("Share File"),
+            parent=self
+        )
+
+        if not share_type:
+            return
+
+        if len(files) > 1:
+            file_ids = [f['id'] for f in files]
+            if share_type.lower() == 'public':
+                args = (file_ids, 'public')
+            else:
+                args = (file_ids, 'user', share_type)
+            self.run_batch(self.file_manager.batch_share, args, self._("Shared {} items"))
+            return
+
+        if share_type.lower() == 'public':
+            args = (file['id'], 'public')
+        else:
+            args = (file['id'], 'user', share_type)
+        self.run_action(self.file_manager.share_file, args, self._("Sharing settings updated"))
+
+    def delete_selected(self):
+        """حذف فایل(های) انتخاب شده؛ چند فایل با یک درخواست گروهی حذف می‌شوند"""
+        files = self.get_selected_files()
+        if not files:
+            Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
+            return
+
+        if len(files) > 1:
+            if Messagebox.okcancel(
+                    self._("Are you sure you want to delete {} items?").format(len(files)),
+                    self._("Confirm Delete"),
+                    parent=self
+            ):
+                self.run_batch(
+                    self.file_manager.batch_delete,
+                    ([f['id'] for f in files],),
+                    self._("Deleted {} items")
+                )
+            return
+
+        file = files[0]
+        item_name = file['name']
+
+        if not Messagebox.okcancel(
+                self._("Are you sure you want to delete '{}'?").format(item_name),
+                self._("Confirm Delete"),
+                parent=self
+        ):
+            return
+
+        self.run_action(self.file_manager.delete_file, (file['id'],), self._("File deleted successfully"))
+
+    def show_properties(self):
+        """نمایش ویژگی‌های فایل انتخاب شده"""
+        selected = self.file_list.selection()
+        if not selected:
+            return
+
+        file = self.get_file(selected[0])
+        if not file:
+            return
+
+        if not self.file_manager.access_token:
+            EnhancedPropertiesDialog(self, file)
+            return
+
+        # فیلدهای کامل فقط برای دیالوگ ویژگی‌ها دریافت می‌شوند
+        threading.Thread(target=self._fetch_properties, args=(file['id'],), daemon=True).start()
+
+    def _fetch_properties(self, file_id):
+        try:
+            file = self.file_manager.get_file_projection(file_id, 'properties')
+        except Exception as e:
+            self.ui.post(Messagebox.show_error, str(e), self._("Error"))
+            return
+
+        self.ui.post(EnhancedPropertiesDialog, self, file)
+
+    def show_upload_dialog(self):
+        """نمایش دیالوگ آپلود"""
+        upload_window = UploadDialog(self, self.file_manager, folder_id=self.file_manager.current_folder_id)
+
+    def schedule_type_ahead(self, event=None, delay=150):
+        """جستجوی محلی پس از توقف کوتاه تایپ"""
+        if event is not None and event.keysym == 'Return':
+            return
+
+        if self._type_ahead_job is not None:
+            self.after_cancel(self._type_ahead_job)
+        self._type_ahead_job = self.after(delay, self.type_ahead)
+
+    def type_ahead(self):
+        """نمایش نتایج ایندکس محلی نام‌ها بدون درخواست شبکه"""
+        self._type_ahead_job = None
+        query = self.search_var.get().strip()
+        if query == self._type_ahead_query or query == self._("Search Files..."):
+            return
+        self._type_ahead_query = query
+
+        if not query:
+            self.load_files()
+            return
+
+        # فیلترهای type:/text:/after:/before: فقط در جستجوی سرور (Enter) اعمال می‌شوند
+        if ':' in query:
+            return
+
+        self._begin_load()
+        results = self.file_manager.index.search_names(query)
+        self.file_list.set_records(results)
+        self.refresh_views(results)
+        self.status_var.set(
+            self._("{} local matches, press Enter to search Drive").format(len(results))
+        )
+
+    def search_files(self):
+        """جستجو در کل درایو؛ نتایج صفحه به صفحه نمایش داده می‌شوند"""
+        query = self.search_var.get().strip()
+        if query == self._("Search Files..."):
+            return
+        if not query:
+            # جستجوی خالی یعنی بازگشت به پوشه فعلی
+            self.load_files()
+            return
+
+        generation, cancel_event = self._begin_load()
+        self.file_list.clear()
+        self._set_loading(True)
+        self.status_var.set(self._("Searching..."))
+
+        threading.Thread(
+            target=self._fetch_search,
+            args=(query, generation, cancel_event),
+            daemon=True
+        ).start()
+
+    def _fetch_search(self, query, generation, cancel_event):
+        """دریافت صفحات نتایج جستجو در پس‌زمینه"""
+        results = []
+        try:
+            for page in self.file_manager.iter_search(query, cancel_event=cancel_event):
+                if cancel_event.is_set():
+                    return
+                results.extend(page)
+                self.ui.post(self._append_search_page, generation, page, len(results))
+        except Exception as e:
+            if not cancel_event.is_set():
+                self.ui.post(self._on_search_failed, generation, str(e))
+            return
+
+        if not cancel_event.is_set():
+            self.ui.post(self._on_search_done, generation, results)
+
+    def _append_search_page(self, generation, page, found_count):
+        if not self._is_current_load(generation):
+            return
+
+        self.append_file_list(page)
+        self.status_var.set(self._("Searching... {} found").format(found_count))
+
+    def _on_search_done(self, generation, results):
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.refresh_views(results)
+        self.status_var.set(self._("Found {} matching files").format(len(results)))
+
+    def _on_search_failed(self, generation, error):
+        if not self._is_current_load(generation):
+            return
+
+        self._set_loading(False)
+        self.status_var.set(self._("Search error: {}").format(error))
+
+    def update_storage_info(self):
+        """به‌روزرسانی اطلاعات فضای ذخیره‌سازی؛ مقدار ذخیره شده فوراً و مقدار جدید پس از پاسخ سرور نمایش داده می‌شود"""
+        self.show_storage_info(self.file_manager.get_cached_storage_info())
+        if not self.file_manager.access_token:
+            return
+
+        client = self.file_manager.get_async_client()
+        if client is not None:
+            client.submit(
+                client.get_storage_info(),
+                on_done=self.show_storage_info,
+                on_error=lambda e: logger.error(f"Error getting storage info: {e}"),
+                ui=self.ui
+            )
+        else:
+            threading.Thread(target=self._fetch_storage_info, daemon=True).start()
+
+    def _fetch_storage_info(self):
+        try:
+            storage = self.file_manager.get_storage_info()
+        except Exception as e:
+            logger.error(f"Error getting storage info: {e}")
+            return
+        self.ui.post(self.show_storage_info, storage)
+
+    def show_storage_info(self, storage):
+        """نمایش فضای استفاده شده، آزاد و کل"""
+        if not storage:
+            self.storage_var.set("")
+            return
+
+        used = self.format_size(int(storage.get('usage', 0)))
+        total = self.format_size(int(storage.get('limit', 0)))
+        free = self.format_size(int(storage.get('limit', 0)) - int(storage.get('usage', 0)))
+
+        self.storage_var.set(
+            f"{self._('Used:')} {used} | {self._('Free:')} {free} | {self._('Total:')} {total}")
+
+    def get_file(self, item):
+        """دریافت متادیتای فایل از ایندکس؛ ID آیتم Treeview همان ID فایل در درایو است"""
+        return self.file_manager.index.get(item)
+
+    @staticmethod
+    def get_file_type(mime_type):
+        """دریافت نوع فایل به صورت خوانا"""
+        return IconRegistry.shared().describe(mime_type)[1]
+
+    @staticmethod
+    def get_file_icon(mime_type, size=None):
+        """دریافت آیکون مناسب برای نوع فایل"""
+        return IconRegistry.shared().icon_for(mime_type, size)
+
+    @staticmethod
+    def format_size(size_bytes):
+        """قالب‌بندی اندازه فایل به صورت خوانا"""
+        if not size_bytes:
+            return "0 B"
+
+        size_bytes = int(size_bytes)
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.1f} PB"
+
+    @staticmethod
+    def format_date(date_str):
+        """قالب‌بندی تاریخ به صورت خوانا"""
+        try:
+            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            return dt.strftime('%Y-%m-%d %H:%M')
+        except:
+            return date_str
+
+
+class UploadDialog(tk.Toplevel):
+    """دیالوگ آپلود پیشرفته"""
+
+    def __init__(self, parent, file_manager, folder_id=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        # پیش‌فرض مقصد پوشه‌ای است که کاربر در مرورگر باز کرده است
+        self.folder_id = folder_id or file_manager.current_folder_id
+        self.assets = AppAssets(parent)
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
+        self.setup_window()
+        self.create_widgets()
+        self.setup_animations()
+
+    def setup_window(self):
+        """تنظیمات پنجره"""
+        self.title(self._("Upload Files"))
+        self.geometry("600x400")
+        self.resizable(False, False)
+        self.center_window()
+
+        # آیکون پنجره
+        try:
+            self.iconphoto(False, self.assets.get_icon('upload'))
+        except:
+            pass
+
+    def setup_animations(self):
+        """تنظیم انیمیشن‌های پنجره"""
+        self.assets.animations['fade'](self)
+
+    def center_window(self):
+        """مرکز کردن پنجره"""
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'+{x}+{y}')
+
+    def create_widgets(self):
+        """ایجاد ویجت‌های پنجره"""
+        # فریم اصلی
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # انتخاب فایل
+        file_frame = ttk.LabelFrame(
+            main_frame,
+            text=self._("File Selection"),
+            padding=10
         )
+        file_frame.pack(fill=tk.X, pady=5)
 
-        # تنظیم ستون‌ها
-        columns = {
-            "name": {"text": self._("Name"), "width": 300, "anchor": tk.W},
-            "size": {"text": self._("Size"), "width": 100, "anchor": tk.CENTER},
-            "type": {"text": self._("Type"), "width": 100, "anchor": tk.CENTER},
-            "modified": {"text": self._("Modified"), "width": 150, "anchor": tk.CENTER},
-            "shared": {"text": self._("Shared"), "width": 80, "anchor": tk.CENTER}
-        }
+        # ورودی فایل و دکمه مرور
+        file_select_frame = ttk.Frame(file_frame)
+        file_select_frame.pack(fill=tk.X, pady=5)
 
-        for col, config in columns.items():
-            self.tree.heading(col, text=config["text"], anchor=config["anchor"])
-            self.tree.column(col, width=config["width"], anchor=config["anchor"])
+        self.file_entry = ttk.Entry(file_select_frame)
+        self.file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
-        # اسکرول‌بارها
-        y_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        x_scroll = ttk.Scrollbar(self.list_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        self.tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        self.browse_btn = ttk.Button(
+            file_select_frame,
+            text=self._("Browse..."),
+            command=self.select_file,
+            width=10
+        )
+        self.browse_btn.pack(side=tk.LEFT)
 
-        # چیدمان
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        y_scroll.grid(row=0, column=1, sticky="ns")
-        x_scroll.grid(row=1, column=0, sticky="ew")
+        # اطلاعات فایل
+        self.file_info_label = ttk.Label(
+            file_frame,
+            text=self._("No file selected"),
+            wraplength=500
+        )
+        self.file_info_label.pack(fill=tk.X, pady=5)
 
-        # تنظیم وزن‌های گرید
-        self.list_frame.grid_rowconfigure(0, weight=1)
-        self.list_frame.grid_columnconfigure(0, weight=1)
+        # گزینه‌های آپلود
+        options_frame = ttk.LabelFrame(
+            main_frame,
+            text=self._("Upload Options"),
+            padding=10
+        )
+        options_frame.pack(fill=tk.X, pady=5)
 
-        # نمای تصاویر کوچک
-        self.thumb_frame = ScrolledFrame(self.notebook)
-        self.thumb_frame.pack(fill=tk.BOTH, expand=True)
-        self.thumb_container = ttk.Frame(self.thumb_frame)
-        self.thumb_container.pack(fill=tk.BOTH, expand=True)
-        self.notebook.add(self.thumb_frame, text=self._("Thumbnail View"), image=self.assets.get_icon('image'),
-                          compound=tk.LEFT)
+        # پوشه مقصد
+        ttk.Label(
+            options_frame,
+            text=self._("Destination Folder:")
+        ).grid(row=0, column=0, sticky=tk.E, padx=5, pady=5)
+
+        self.folder_entry = ttk.Entry(options_frame)
+        self.folder_entry.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
+        self.default_folder_text = self.folder_display_path(self.folder_id)
+        self.folder_entry.insert(0, self.default_folder_text)
+
+        self.change_folder_btn = ttk.Button(
+            options_frame,
+            text=self._("Change..."),
+            command=self.select_destination_folder,
+            width=10
+        )
+        self.change_folder_btn.grid(row=0, column=2, padx=5, pady=5)
 
-        # نمای جزئیات
-        self.details_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.details_frame, text=self._("Details View"), image=self.assets.get_icon('info'),
-                          compound=tk.LEFT)
+        # نام فایل در درایو
+        ttk.Label(
+            options_frame,
+            text=self._("Drive File Name:")
+        ).grid(row=1, column=0, sticky=tk.E, padx=5, pady=5)
 
-    def create_enhanced_status_bar(self):
-        """ایجاد نوار وضعیت پیشرفته"""
-        status_bar = ttk.Frame(self, style="info.TFrame")
-        status_bar.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.drive_name_entry = ttk.Entry(options_frame)
+        self.drive_name_entry.grid(row=1, column=1, columnspan=2, sticky=tk.EW, padx=5, pady=5)
 
-        # پیام وضعیت
-        self.status_var = tk.StringVar(value=self._("Ready"))
-        status_label = ttk.Label(
-            status_bar,
-            textvariable=self.status_var,
-            bootstyle="inverse",
-            anchor=tk.W
+        # تنظیمات گرید
+        options_frame.grid_columnconfigure(1, weight=1)
+
+        # پیشرفت آپلود
+        progress_frame = ttk.LabelFrame(
+            main_frame,
+            text=self._("Upload Progress"),
+            padding=10
         )
-        status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        progress_frame.pack(fill=tk.X, pady=5)
 
-        # اطلاعات ذخیره‌سازی
-        self.storage_var = tk.StringVar(value="")
-        storage_label = ttk.Label(
-            status_bar,
-            textvariable=self.storage_var,
-            bootstyle="inverse",
-            width=30
+        self.progress = ttk.Progressbar(
+            progress_frame,
+            orient=tk.HORIZONTAL,
+            mode='determinate'
         )
-        storage_label.pack(side=tk.RIGHT)
+        self.progress.pack(fill=tk.X, pady=5)
 
-        # اطلاعات انتخاب
-        self.selection_var = tk.StringVar(value="0 items selected")
-        selection_label = ttk.Label(
-            status_bar,
-            textvariable=self.selection_var,
-            bootstyle="inverse",
-            width=20
+        self.progress_label = ttk.Label(
+            progress_frame,
+            text=self._("Ready to upload"),
+            anchor=tk.CENTER
         )
-        selection_label.pack(side=tk.RIGHT)
+        self.progress_label.pack(fill=tk.X)
 
-        # به‌روزرسانی اطلاعات ذخیره‌سازی
-        self.update_storage_info()
+        # دکمه‌های عملیاتی
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X, pady=10)
 
-    def setup_file_preview(self):
-        """تنظیم پیش‌نمایش فایل"""
-        self.preview_window = tk.Toplevel(self)
-        self.preview_window.withdraw()
-        self.preview_window.overrideredirect(True)
-        self.preview_window.attributes('-alpha', 0.9)
+        self.upload_btn = ttk.Button(
+            btn_frame,
+            text=self._("Start Upload"),
+            command=self.start_upload,
+            bootstyle="success",
+            state=tk.DISABLED
+        )
+        self.upload_btn.pack(side=tk.LEFT, padx=5)
 
-        self.preview_label = ttk.Label(self.preview_window)
-        self.preview_label.pack()
+        self.cancel_btn = ttk.Button(
+            btn_frame,
+            text=self._("Cancel"),
+            command=self.destroy,
+            bootstyle="danger"
+        )
+        self.cancel_btn.pack(side=tk.RIGHT, padx=5)
+
+    def select_file(self):
+        """انتخاب فایل برای آپلود"""
+        file_path = filedialog.askopenfilename(
+            title=self._("Select File to Upload"),
+            filetypes=[
+                (self._("All Files"), "*.*"),
+                (self._("Documents"), "*.doc *.docx *.pdf *.txt *.rtf"),
+                (self._("Images"), "*.jpg *.jpeg *.png *.gif *.bmp"),
+                (self._("Videos"), "*.mp4 *.avi *.mov *.mkv")
+            ]
+        )
 
-        self.tree.bind("<Motion>", self.show_file_preview)
-        self.tree.bind("<Leave>", self.hide_file_preview)
+        if file_path:
+            self.file_entry.delete(0, tk.END)
+            self.file_entry.insert(0, file_path)
+            self.update_file_info(file_path)
 
-    def show_file_preview(self, event):
-        """نمایش پیش‌نمایش فایل هنگام hover"""
-        item = self.tree.identify_row(event.y)
-        if item:
-            file_name = self.tree.item(item, 'values')[0]
-            file_type = self.tree.item(item, 'values')[2]
-
-            if "Image" in file_type:
-                file_id = self.get_file_id(file_name)
-                if file_id:
-                    thumbnail_url = f"https://drive.google.com/thumbnail?id={file_id}&sz=w200"
-
-                    try:
-                        response = requests.get(thumbnail_url, stream=True, timeout=3)
-                        if response.status_code == 200:
-                            img_data = response.content
-                            img = Image.open(io.BytesIO(img_data))
-
-                            # محدود کردن اندازه تصویر
-                            max_size = (200, 200)
-                            img.thumbnail(max_size)
-
-                            photo = ImageTk.PhotoImage(img)
-                            self.preview_label.configure(image=photo)
-                            self.preview_label.image = photo
-
-                            # نمایش پنجره پیش‌نمایش
-                            self.preview_window.deiconify()
-                            self.preview_window.geometry(f"+{event.x_root + 20}+{event.y_root + 20}")
-                    except:
-                        pass
-
-    def hide_file_preview(self, event):
-        """پنهان کردن پیش‌نمایش فایل"""
-        self.preview_window.withdraw()
+            # پر کردن نام فایل در درایو
+            file_name = os.path.basename(file_path)
+            self.drive_name_entry.delete(0, tk.END)
+            self.drive_name_entry.insert(0, file_name)
 
-    def setup_drag_drop(self):
-        """تنظیم قابلیت کشیدن و رها کردن"""
-        self.tree.bind("<ButtonPress-1>", self.on_drag_start)
-        self.tree.bind("<B1-Motion>", self.on_drag_motion)
-        self.tree.bind("<ButtonRelease-1>", self.on_drag_end)
+            if self.file_manager.access_token:
+                self.upload_btn['state'] = tk.NORMAL
 
-        self.drag_data = {"item": None, "x": 0, "y": 0}
+    def update_file_info(self, file_path):
+        """به‌روزرسانی اطلاعات فایل"""
+        try:
+            file_name = os.path.basename(file_path)
+            file_size = os.path.getsize(file_path)
 
-    def on_drag_start(self, event):
-        """شروع عملیات کشیدن"""
-        item = self.tree.identify_row(event.y)
-        if item:
-            self.drag_data["item"] = item
-            self.drag_data["x"] = event.x
-            self.drag_data["y"] = event.y
+            info_text = f"{self._('File:')} {file_name}\n{self._('Size:')} {self.format_size(file_size)}"
+            self.file_info_label.config(text=info_text)
+        except Exception as e:
+            logger.error(f"Error getting file info: {e}")
+            self.file_info_label.config(text=self._("Error getting file information"))
+
+    def folder_display_path(self, folder_id):
+        """مسیر نمایشی پوشه مقصد فقط از داده‌های کش شده"""
+        folders = self.file_manager.folders
+        if folders.is_root(folder_id):
+            return self._("My Drive")
+
+        chain, complete = folders.ancestors(folder_id)
+        names = [name for _, name in chain] or [folder_id]
+        return '/' + '/'.join(names) if complete else '…/' + '/'.join(names)
+
+    def select_destination_folder(self):
+        """انتخاب پوشه مقصد در گوگل درایو"""
+        if not self.file_manager.access_token:
+            Messagebox.show_error(
+                self._("You must authenticate first"),
+                self._("Error")
+            )
+            return
 
-    def on_drag_motion(self, event):
-        """حرکت در حین کشیدن"""
-        if self.drag_data["item"]:
-            # می‌توانید اینجا افکت‌های بصری اضافه کنید
-            pass
+        # در نسخه کامل می‌توانید یک مرورگر پوشه درایو پیاده‌سازی کنید
+        Messagebox.show_info(
+            self._("Folder selection will be implemented in a future version"),
+            self._("Info")
+        )
 
-    def on_drag_end(self, event):
-        """پایان عملیات کشیدن"""
-        if self.drag_data["item"]:
-            target_item = self.tree.identify_row(event.y)
-            if target_item and self.drag_data["item"] != target_item:
-                # انجام عملیات جابجایی
-                self.move_item(self.drag_data["item"], target_item)
+    def start_upload(self):
+        """شروع آپلود فایل"""
+        file_path = self.file_entry.get()
+        if not file_path or not os.path.exists(file_path):
+            Messagebox.show_error(
+                self._("Please select a valid file"),
+                self._("Error")
+            )
+            return
+
+        drive_name = self.drive_name_entry.get().strip()
+        if not drive_name:
+            drive_name = os.path.basename(file_path)
+
+        # مسیر مقصد مانند /Projects/2026/raw؛ اگر تغییر نکرده باشد همان پوشه فعلی مرورگر
+        folder_path = self.folder_entry.get().strip()
+        if not folder_path or folder_path == self.default_folder_text:
+            folder_path = None
+        elif folder_path == self._("My Drive"):
+            folder_path = '/'
+
+        # نمایش دیالوگ پیشرفت
+        progress_dialog = EnhancedProgressDialog(
+            self,
+            title=self._("Uploading"),
+            message=self._("Uploading {}...").format(drive_name)
+        )
 
-            self.drag_data["item"] = None
+        # شروع آپلود در یک thread جداگانه
+        threading.Thread(
+            target=self._perform_upload,
+            args=(file_path, drive_name, progress_dialog, folder_path),
+            daemon=True
+        ).start()
 
-    def move_item(self, source_item, target_item):
-        """جابجایی فایل/پوشه"""
-        source_name = self.tree.item(source_item, 'values')[0]
-        target_name = self.tree.item(target_item, 'values')[0]
+    def _perform_upload(self, file_path, drive_name, progress_dialog, folder_path=None):
+        """انجام عملیات آپلود قابل ازسرگیری با نمایش پیشرفت واقعی
 
-        # دریافت ID فایل‌ها
-        files = self.file_manager.list_files()
-        source_file = next((f for f in files if f['name'] == source_name), None)
-        target_file = next((f for f in files if f['name'] == target_name), None)
+        این متد در thread پس‌زمینه اجرا می‌شود و تمام تغییرات رابط کاربری
+        از طریق UiDispatcher به thread اصلی ارسال می‌شوند.
+        """
+        ui = UiDispatcher.shared(self)
 
-        if source_file and target_file:
-            if target_file['mimeType'] == 'application/vnd.google-apps.folder':
-                # جابجایی به پوشه مقصد
-                try:
-                    # ابتدا فایل را از پوشه فعلی حذف می‌کنیم
-                    self.file_manager.remove_parent(source_file['id'], self.file_manager.current_folder_id)
+        # مسیر وارد شده باید وجود داشته باشد؛ پوشه‌ای با اشتباه تایپی ساخته نمی‌شود
+        folder_id = self.folder_id
+        if folder_path is not None:
+            try:
+                folder_id = self.file_manager.folders.resolve_path(folder_path)
+            except Exception as e:
+                ui.post(progress_dialog.close)
+                ui.post(Messagebox.show_error, str(e), self._("Error"))
+                return
 
-                    # سپس به پوشه جدید اضافه می‌کنیم
-                    self.file_manager.add_parent(source_file['id'], target_file['id'])
+        try:
+            upload = self.file_manager.create_upload(file_path, folder_id=folder_id, file_name=drive_name)
 
-                    # به‌روزرسانی لیست فایل‌ها
-                    self.load_files()
+            for uploaded, total in upload.upload():
+                if uploaded == upload.resumed_from and uploaded > 0:
+                    ui.post(
+                        progress_dialog.message_var.set,
+                        self._("Resuming upload of {}...").format(drive_name)
+                    )
 
-                    self.status_var.set(self._("Moved '{}' to '{}'").format(source_name, target_name))
-                except Exception as e:
-                    self.status_var.set(self._("Error moving file: {}").format(str(e)))
-            else:
-                self.status_var.set(self._("Can only move to folders"))
+                progress = (uploaded / total) * 100 if total else 100
+                ui.post_coalesced(
+                    (id(progress_dialog), 'progress'),
+                    progress_dialog.update_progress,
+                    progress,
+                    f"{self.format_size(uploaded)} / {self.format_size(total)}"
+                )
 
-            def setup_events(self):
-                """تنظیم رویدادهای مختلف"""
-                self.tree.bind("<Double-1>", self.on_item_double_click)
-                self.tree.bind("<Button-3>", self.show_context_menu)
-                self.tree.bind("<<TreeviewSelect>>", self.update_selection_count)
+                # نشست آپلود ذخیره شده است و دفعه بعد از همین نقطه ادامه می‌یابد
+                if progress_dialog.cancelled:
+                    return
 
-                # ایجاد منوی زمینه
-                self.create_context_menu()
+            ui.post(progress_dialog.complete, self._("Upload complete"))
+            ui.post(
+                Messagebox.show_info,
+                self._("File uploaded successfully"),
+                self._("Success")
+            )
 
-                # تنظیمات کشیدن و رها کردن
-                self.setup_drag_drop()
+        except Exception as e:
+            ui.post(progress_dialog.error, str(e))
+            ui.post(Messagebox.show_error, str(e), self._("Error"))
+        finally:
+            ui.post(progress_dialog.close)
+            ui.post(self.destroy)
+
+    @staticmethod
+    def format_size(size_bytes):
+        """قالب‌بندی اندازه فایل"""
+        if not size_bytes:
+            return "0 B"
+
+        size_bytes = int(size_bytes)
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.1f} PB"
+
+
+class EnhancedProgressDialog(tk.Toplevel):
+    """دیالوگ پیشرفت پیشرفته"""
+
+    def __init__(self, parent, title="Progress", message="Processing..."):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("400x180")  # ارتفاع بیشتر برای جزئیات بیشتر
+        self.resizable(False, False)
+        self.cancelled = False
 
-            def create_context_menu(self):
-                """ایجاد منوی زمینه پیشرفته"""
-                self.context_menu = tk.Menu(self, tearoff=0, font=self.lang.get_font())
+        # مرکز کردن پنجره
+        self.center_window()
 
-                self.context_menu.add_command(
-                    label=self._("Open"),
-                    image=self.assets.get_icon('file'),
-                    compound=tk.LEFT,
-                    command=self.open_selected,
-                    accelerator="Enter"
-                )
+        # تنظیمات ظاهری
+        self.attributes('-alpha', 0.95)
 
-                self.context_menu.add_command(
-                    label=self._("Download"),
-                    image=self.assets.get_icon('download'),
-                    compound=tk.LEFT,
-                    command=self.download_selected,
-                    accelerator="Ctrl+D"
-                )
+        # پیام
+        self.message_var = tk.StringVar(value=message)
+        ttk.Label(
+            self,
+            textvariable=self.message_var,
+            wraplength=380,
+            font=("TkDefaultFont", 10)
+        ).pack(pady=(15, 5))
+
+        # نوار پیشرفت
+        self.progress = ttk.Progressbar(
+            self,
+            orient=tk.HORIZONTAL,
+            mode='determinate',
+            length=380,
+            style="success.Striped.Horizontal.TProgressbar"
+        )
+        self.progress.pack(pady=5)
 
-                self.context_menu.add_command(
-                    label=self._("Rename"),
-                    image=self.assets.get_icon('edit'),
-                    compound=tk.LEFT,
-                    command=self.rename_selected,
-                    accelerator="F2"
-                )
+        # متن پیشرفت
+        self.progress_var = tk.StringVar(value="")
+        ttk.Label(
+            self,
+            textvariable=self.progress_var,
+            font=("TkDefaultFont", 8)
+        ).pack()
 
-                self.context_menu.add_command(
-                    label=self._("Share"),
-                    image=self.assets.get_icon('share'),
-                    compound=tk.LEFT,
-                    command=self.share_selected,
-                    accelerator="Ctrl+S"
-                )
+        # تخمین زمان باقیمانده
+        self.time_var = tk.StringVar(value="")
+        ttk.Label(
+            self,
+            textvariable=self.time_var,
+            font=("TkDefaultFont", 8)
+        ).pack()
+
+        # دکمه‌ها
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(pady=10)
+
+        self.cancel_btn = ttk.Button(
+            btn_frame,
+            text="Cancel",
+            command=self.cancel,
+            bootstyle="danger"
+        )
+        self.cancel_btn.pack(side=tk.LEFT, padx=10)
 
-                self.context_menu.add_separator()
+        self.minimize_btn = ttk.Button(
+            btn_frame,
+            text="Minimize",
+            command=self.minimize
+        )
+        self.minimize_btn.pack(side=tk.RIGHT, padx=10)
 
-                self.context_menu.add_command(
-                    label=self._("Delete"),
-                    image=self.assets.get_icon('delete'),
-                    compound=tk.LEFT,
-                    command=self.delete_selected,
-                    accelerator="Del"
-                )
+        # متغیرهای زمان
+        self.start_time = time.time()
+        self.last_update = 0
 
-                self.context_menu.add_separator()
+        # تنظیم modal
+        self.grab_set()
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
 
-                self.context_menu.add_command(
-                    label=self._("Properties"),
-                    image=self.assets.get_icon('info'),
-                    compound=tk.LEFT,
-                    command=self.show_properties,
-                    accelerator="Alt+Enter"
-                )
+    def center_window(self):
+        """مرکز کردن پنجره"""
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'+{x}+{y}')
 
-            def update_selection_count(self, event):
-                """به‌روزرسانی تعداد فایل‌های انتخاب شده"""
-                selected = len(self.tree.selection())
-                self.selection_var.set(f"{selected} items selected")
+    def update_progress(self, value, text=""):
+        """به‌روزرسانی پیشرفت"""
+        self.progress['value'] = value
+        self.progress_var.set(text)
 
-            def load_files(self):
-                """بارگذاری فایل‌ها با نمایش وضعیت"""
-                self.status_var.set(self._("Loading files..."))
-                self.tree.delete(*self.tree.get_children())
+        # محاسبه زمان باقیمانده
+        current_time = time.time()
+        if current_time - self.last_update > 1:  # هر ثانیه یکبار به‌روزرسانی کنید
+            elapsed = current_time - self.start_time
+            if value > 0:
+                remaining = (elapsed * (100 - value)) / value
+                self.time_var.set(f"Estimated time remaining: {self.format_time(remaining)}")
+            self.last_update = current_time
 
-                try:
-                    files = self.file_manager.list_files()
-                    self.update_file_list(files)
-                    self.status_var.set(self._("Loaded {} items").format(len(files)))
-                except Exception as e:
-                    self.status_var.set(self._("Error: {}").format(str(e)))
-                    Messagebox.show_error(str(e), self._("Error loading files"))
-
-            def update_file_list(self, files):
-                """به‌روزرسانی لیست فایل‌ها با اطلاعات جدید"""
-                # پوشه‌ها اول نمایش داده می‌شوند
-                folders = [f for f in files if f['mimeType'] == 'application/vnd.google-apps.folder']
-                for folder in folders:
-                    self.tree.insert(
-                        '', tk.END,
-                        values=(
-                            folder['name'],
-                            "",
-                            self._("Folder"),
-                            self.format_date(folder['modifiedTime']),
-                            self._("Yes") if folder.get('shared', False) else self._("No")
-                        ),
-                        tags=('folder',),
-                        image=self.assets.get_icon('folder')
-                    )
+        self.update_idletasks()
 
-                # سپس فایل‌ها
-                other_files = [f for f in files if f['mimeType'] != 'application/vnd.google-apps.folder']
-                for file in other_files:
-                    self.tree.insert(
-                        '', tk.END,
-                        values=(
-                            file['name'],
-                            self.format_size(int(file.get('size', 0))),
-                            self.get_file_type(file['mimeType']),
-                            self.format_date(file['modifiedTime']),
-                            self._("Yes") if file.get('shared', False) else self._("No")
-                        ),
-                        tags=('file',),
-                        image=self.get_file_icon(file['mimeType'])
-                    )
+    def complete(self, message):
+        """تکمیل عملیات"""
+        self.message_var.set(message)
+        self.progress['value'] = 100
+        self.progress_var.set("")
+        self.time_var.set("")
+        self.cancel_btn.config(text="Close")
+        self.minimize_btn.pack_forget()
+        self.update_idletasks()
 
-                # به‌روزرسانی نمای تصاویر کوچک
-                self.update_thumbnail_view(files)
+    def error(self, message):
+        """نمایش خطا"""
+        self.message_var.set(f"Error: {message}")
+        self.progress.config(style="danger.Horizontal.TProgressbar")
+        self.cancel_btn.config(text="Close")
+        self.minimize_btn.pack_forget()
+        self.update_idletasks()
 
-                # به‌روزرسانی نمای جزئیات
-                self.update_details_view(files)
+    def cancel(self):
+        """لغو عملیات"""
+        self.cancelled = True
+        self.message_var.set("Cancelling...")
+        self.update_idletasks()
 
-            def update_thumbnail_view(self, files):
-                """به‌روزرسانی نمای تصاویر کوچک"""
-                # پاکسازی ویجت‌های قبلی
-                for widget in self.thumb_container.winfo_children():
-                    widget.destroy()
+    def minimize(self):
+        """کوچک کردن پنجره"""
+        self.iconify()
 
-                # ایجاد ویجت‌های جدید برای هر فایل
-                for file in files:
-                    frame = ttk.Frame(self.thumb_container)
-                    frame.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.Y)
+    def close(self):
+        """بستن دیالوگ"""
+        try:
+            self.grab_release()
+            self.destroy()
+        except tk.TclError:
+            pass
 
-                    # آیکون یا تصویر کوچک
-                    if file['mimeType'] == 'application/vnd.google-apps.folder':
-                        icon = self.assets.get_icon('folder', (64, 64))
-                    else:
-                        icon = self.get_file_icon(file['mimeType'], (64, 64))
-
-                    label = ttk.Label(frame, image=icon)
-                    label.image = icon
-                    label.pack()
-
-                    # نام فایل
-                    name_label = ttk.Label(
-                        frame,
-                        text=file['name'],
-                        wraplength=100,
-                        justify=tk.CENTER
-                    )
-                    name_label.pack()
-
-            def update_details_view(self, files):
-                """به‌روزرسانی نمای جزئیات"""
-                # پاکسازی ویجت‌های قبلی
-                for widget in self.details_frame.winfo_children():
-                    widget.destroy()
-
-                # ایجاد جدول جزئیات
-                columns = [
-                    {"text": "Name", "stretch": True},
-                    {"text": "Size", "stretch": False},
-                    {"text": "Type", "stretch": False},
-                    {"text": "Modified", "stretch": False},
-                    {"text": "Shared", "stretch": False}
-                ]
+    @staticmethod
+    def format_time(seconds):
+        """قالب‌بندی زمان به صورت خوانا"""
+        seconds = int(seconds)
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        seconds = seconds % 60
+
+        if hours > 0:
+            return f"{hours}h {minutes}m {seconds}s"
+        elif minutes > 0:
+            return f"{minutes}m {seconds}s"
+        else:
+            return f"{seconds}s"
 
-                rows = []
-                for file in files:
-                    rows.append((
-                        file['name'],
-                        self.format_size(int(file.get('size', 0))),
-                        self.get_file_type(file['mimeType']),
-                        self.format_date(file['modifiedTime']),
-                        "Yes" if file.get('shared', False) else "No"
-                    ))
-
-                self.details_table = Tableview(
-                    self.details_frame,
-                    coldata=columns,
-                    rowdata=rows,
-                    paginated=True,
-                    pagesize=20,
-                    height=20,
-                    searchable=True,
-                    bootstyle="info"
-                )
-                self.details_table.pack(fill=tk.BOTH, expand=True)
-
-            def on_item_double_click(self, event):
-                """رویداد دابل کلیک روی آیتم"""
-                item = self.tree.selection()[0]
-                self.open_item(item)
-
-            def open_item(self, item):
-                """باز کردن آیتم انتخاب شده"""
-                item_type = self.tree.item(item, 'tags')[0]
-                item_name = self.tree.item(item, 'values')[0]
-
-                if item_type == 'folder':
-                    try:
-                        files = self.file_manager.list_files()
-                        folder = next((f for f in files if f['name'] == item_name and
-                                       f['mimeType'] == 'application/vnd.google-apps.folder'), None)
-
-                        if folder:
-                            self.file_manager.current_folder_id = folder['id']
-                            self.file_manager.folder_stack.append(folder['id'])
-                            self.load_files()
-                            self.update_navigation_buttons()
-                            self.path_var.set(f"Drive > {item_name}")
-                    except Exception as e:
-                        self.status_var.set(self._("Error: {}").format(str(e)))
-                else:
-                    try:
-                        files = self.file_manager.list_files()
-                        file = next((f for f in files if f['name'] == item_name and
-                                     f['mimeType'] != 'application/vnd.google-apps.folder'), None)
-
-                        if file:
-                            webbrowser.open(f"https://drive.google.com/file/d/{file['id']}/view")
-                    except Exception as e:
-                        self.status_var.set(self._("Error: {}").format(str(e)))
-
-            def navigate_back(self):
-                """بازگشت به پوشه قبلی"""
-                if len(self.file_manager.folder_stack) > 1:
-                    self.file_manager.folder_stack.pop()
-                    self.file_manager.current_folder_id = self.file_manager.folder_stack[-1]
-                    self.load_files()
-                    self.update_navigation_buttons()
-
-            def navigate_up(self):
-                """رفتن به پوشه والد"""
-                self.file_manager.current_folder_id = "root"
-                self.file_manager.folder_stack = ["root"]
-                self.load_files()
-                self.update_navigation_buttons()
-
-            def refresh_files(self):
-                """بارگذاری مجدد فایل‌ها"""
-                self.file_manager.clear_cache()
-                self.load_files()
-
-            def update_navigation_buttons(self):
-                """به‌روزرسانی وضعیت دکمه‌های ناوبری"""
-                self.back_btn['state'] = tk.NORMAL if len(self.file_manager.folder_stack) > 1 else tk.DISABLED
-
-            def show_context_menu(self, event):
-                """نمایش منوی زمینه"""
-                item = self.tree.identify_row(event.y)
-                if item:
-                    self.tree.selection_set(item)
-                    try:
-                        self.context_menu.tk_popup(event.x_root, event.y_root)
-                    finally:
-                        self.context_menu.grab_release()
-
-            def open_selected(self):
-                """باز کردن آیتم انتخاب شده"""
-                selected = self.tree.selection()
-                if selected:
-                    self.open_item(selected[0])
-
-            def download_selected(self):
-                """دانلود فایل(های) انتخاب شده"""
-                selected = self.tree.selection()
-                if not selected:
-                    Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
-                    return
 
-                # برای سادگی، فقط اولین فایل انتخاب شده را دانلود می‌کنیم
-                item = selected[0]
-                item_name = self.tree.item(item, 'values')[0]
+class EnhancedPropertiesDialog(tk.Toplevel):
+    """دیالوگ ویژگی‌های پیشرفته"""
 
-                save_path = filedialog.asksaveasfilename(
-                    title=self._("Save File"),
-                    initialfile=item_name,
-                    defaultextension=".*"
-                )
+    def __init__(self, parent, file_data):
+        super().__init__(parent)
+        self.title("Properties")
+        self.geometry("500x500")
+        self.resizable(False, False)
+        self.file_data = file_data
+        self.assets = AppAssets(parent)
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
+        self.setup_ui()
+        self.center_window()
 
-                if not save_path:
-                    return
+    def center_window(self):
+        """مرکز کردن پنجره"""
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'+{x}+{y}')
 
-                try:
-                    files = self.file_manager.list_files()
-                    file = next((f for f in files if f['name'] == item_name and
-                                 f['mimeType'] != 'application/vnd.google-apps.folder'), None)
-
-                    if file:
-                        progress_dialog = ProgressDialog(
-                            self,
-                            title=self._("Downloading"),
-                            message=self._("Downloading {}...").format(item_name)
-                        )
-
-                        threading.Thread(
-                            target=self._perform_download,
-                            args=(file['id'], save_path, progress_dialog),
-                            daemon=True
-                        ).start()
+    def setup_ui(self):
+        """تنظیم رابط کاربری"""
+        # فریم اصلی
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
 
-                except Exception as e:
-                    Messagebox.show_error(str(e), self._("Error"))
+        # هدر
+        header_frame = ttk.Frame(main_frame)
+        header_frame.pack(fill=tk.X, pady=(0, 10))
 
-            def _perform_download(self, file_id, save_path, progress_dialog):
-                """انجام عملیات دانلود با نمایش پیشرفت"""
-                try:
-                    for downloaded, total in self.file_manager.download_file(file_id, save_path):
-                        progress = (downloaded / total) * 100
-                        progress_dialog.update_progress(
-                            progress,
-                            f"{self.format_size(downloaded)} / {self.format_size(total)}"
-                        )
+        # آیکون فایل
+        file_icon = self.get_file_icon(self.file_data['mimeType'], (64, 64))
+        ttk.Label(
+            header_frame,
+            image=file_icon
+        ).pack(side=tk.LEFT, padx=10)
 
-                        if progress_dialog.cancelled:
-                            os.remove(save_path)
-                            return
+        # نام و نوع فایل
+        info_frame = ttk.Frame(header_frame)
+        info_frame.pack(side=tk.LEFT, fill=tk.Y)
 
-                    progress_dialog.complete(self._("Download complete"))
-                    Messagebox.show_info(self._("File downloaded successfully"), self._("Success"))
+        ttk.Label(
+            info_frame,
+            text=self.file_data['name'],
+            font=("TkDefaultFont", 12, "bold")
+        ).pack(anchor=tk.W)
 
-                except Exception as e:
-                    progress_dialog.error(str(e))
-                    Messagebox.show_error(str(e), self._("Error"))
-                finally:
-                    progress_dialog.close()
-
-            def rename_selected(self):
-                """تغییر نام فایل انتخاب شده"""
-                selected = self.tree.selection()
-                if not selected:
-                    Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
-                    return
+        ttk.Label(
+            info_frame,
+            text=self.get_file_type(self.file_data['mimeType']),
+            font=("TkDefaultFont", 9)
+        ).pack(anchor=tk.W)
 
-                item = selected[0]
-                old_name = self.tree.item(item, 'values')[0]
+        # تب‌ها
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True)
 
-                new_name = Querybox.get_string(
-                    prompt=self._("Enter new name:"),
-                    title=self._("Rename File"),
-                    initialvalue=old_name,
-                    parent=self
-                )
+        # تب عمومی
+        general_tab = ttk.Frame(notebook)
+        notebook.add(general_tab, text=self._("General"))
 
-                if not new_name or new_name == old_name:
-                    return
+        self.create_general_tab(general_tab)
 
-                try:
-                    files = self.file_manager.list_files()
-                    file = next((f for f in files if f['name'] == old_name), None)
+        # تب جزئیات
+        details_tab = ttk.Frame(notebook)
+        notebook.add(details_tab, text=self._("Details"))
 
-                    if file:
-                        self.file_manager.rename_file(file['id'], new_name)
-                        self.load_files()
-                        Messagebox.show_info(self._("File renamed successfully"), self._("Success"))
-                except Exception as e:
-                    Messagebox.show_error(str(e), self._("Error"))
+        self.create_details_tab(details_tab)
 
-            def share_selected(self):
-                """اشتراک‌گذاری فایل انتخاب شده"""
-                selected = self.tree.selection()
-                if not selected:
-                    Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
-                    return
+        # تب اشتراک‌گذاری
+        sharing_tab = ttk.Frame(notebook)
+        notebook.add(sharing_tab, text=self._("Sharing"))
 
-                item = selected[0]
-                item_name = self.tree.item(item, 'values')[0]
+        self.create_sharing_tab(sharing_tab)
 
-                share_type = Querybox.get_string(
-                    prompt=self._(
-                        "Share '{}' with:\n1. Specific user (enter email)\n2. Anyone with link (enter 'public')\n3. Cancel (leave blank)").format(
-                        item_name),
-                    title=self._("Share File"),
-                    parent=self
-                )
+        # دکمه بستن
+        ttk.Button(
+            main_frame,
+            text=self._("Close"),
+            command=self.destroy,
+            bootstyle="primary"
+        ).pack(pady=10)
 
-                if not share_type:
-                    return
+    def create_general_tab(self, parent):
+        """ایجاد تب عمومی"""
+        # تصویر کوچک برای فایل‌های تصویری
+        if 'image/' in self.file_data['mimeType'] and 'thumbnailLink' in self.file_data:
+            try:
+                response = DriveHttpSession.shared().get(self.file_data['thumbnailLink'], stream=True)
+                if response.status_code == 200:
+                    img_data = response.content
+                    img = Image.open(io.BytesIO(img_data))
+                    img.thumbnail((200, 200))
+
+                    photo = ImageTk.PhotoImage(img)
+                    label = ttk.Label(parent, image=photo)
+                    label.image = photo
+                    label.pack(pady=10)
+            except:
+                pass
 
-                try:
-                    files = self.file_manager.list_files()
-                    file = next((f for f in files if f['name'] == item_name), None)
+        # اطلاعات پایه
+        info_frame = ttk.Frame(parent)
+        info_frame.pack(fill=tk.X, pady=5)
 
-                    if file:
-                        if share_type.lower() == 'public':
-                            self.file_manager.share_file(file['id'], 'public')
-                        else:
-                            self.file_manager.share_file(file['id'], 'user', share_type)
+        properties = [
+            (self._("Name:"), self.file_data['name']),
+            (self._("Type:"), self.get_file_type(self.file_data['mimeType'])),
+            (self._("Size:"), self.format_size(int(self.file_data.get('size', 0)))),
+            (self._("Modified:"), self.format_date(self.file_data['modifiedTime'])),
+            (self._("Shared:"), self._("Yes") if self.file_data.get('shared', False) else self._("No"))
+        ]
 
-                        self.load_files()
-                        Messagebox.show_info(self._("Sharing settings updated"), self._("Success"))
-                except Exception as e:
-                    Messagebox.show_error(str(e), self._("Error"))
+        for i, (prop, value) in enumerate(properties):
+            row = ttk.Frame(info_frame)
+            row.pack(fill=tk.X, pady=2)
 
-            def delete_selected(self):
-                """حذف فایل(های) انتخاب شده"""
-                selected = self.tree.selection()
-                if not selected:
-                    Messagebox.show_warning(self._("Please select a file first"), self._("Warning"))
-                    return
+            ttk.Label(
+                row,
+                text=prop,
+                font=("TkDefaultFont", 9, "bold"),
+                width=15,
+                anchor=tk.E
+            ).pack(side=tk.LEFT)
 
-                item = selected[0]
-                item_name = self.tree.item(item, 'values')[0]
+            ttk.Label(
+                row,
+                text=value,
+                font=("TkDefaultFont", 9),
+                anchor=tk.W
+            ).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-                if not Messagebox.okcancel(
-                        self._("Are you sure you want to delete '{}'?").format(item_name),
-                        self._("Confirm Delete"),
-                        parent=self
-                ):
-                    return
+    def create_details_tab(self, parent):
+        """ایجاد تب جزئیات"""
+        # جدول جزئیات
+        columns = [
+            {"text": "Property", "stretch": False},
+            {"text": "Value", "stretch": True}
+        ]
 
-                try:
-                    files = self.file_manager.list_files()
-                    file = next((f for f in files if f['name'] == item_name), None)
+        rows = [
+            ("ID", self.file_data['id']),
+            ("MIME Type", self.file_data['mimeType']),
+            ("Created", self.format_date(self.file_data.get('createdTime', ''))),
+            ("Modified", self.format_date(self.file_data['modifiedTime'])),
+            ("Size", self.format_size(int(self.file_data.get('size', 0)))),
+            ("Shared", "Yes" if self.file_data.get('shared', False) else "No"),
+            ("Web View", self.file_data.get('webViewLink', 'N/A'))
+        ]
 
-                    if file:
-                        self.file_manager.delete_file(file['id'])
-                        self.load_files()
-                        Messagebox.show_info(self._("File deleted successfully"), self._("Success"))
-                except Exception as e:
-                    Messagebox.show_error(str(e), self._("Error"))
+        table = Tableview(
+            parent,
+            coldata=columns,
+            rowdata=rows,
+            paginated=False,
+            searchable=False,
+            bootstyle="info"
+        )
+        table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # دکمه کپی ID
+        ttk.Button(
+            parent,
+            text=self._("Copy ID"),
+            command=lambda: self.copy_to_clipboard(self.file_data['id']),
+            bootstyle="info"
+        ).pack(pady=5)
+
+    def create_sharing_tab(self, parent):
+        """ایجاد تب اشتراک‌گذاری"""
+        if not self.file_data.get('shared', False):
+            ttk.Label(
+                parent,
+                text=self._("This file is not shared"),
+                font=("TkDefaultFont", 10)
+            ).pack(pady=20)
+            return
 
-            def show_properties(self):
-                """نمایش ویژگی‌های فایل انتخاب شده"""
-                selected = self.tree.selection()
-                if not selected:
-                    return
+        # در نسخه کامل می‌توانید لیست مجوزها را نمایش دهید
+        ttk.Label(
+            parent,
+            text=self._("Sharing settings:"),
+            font=("TkDefaultFont", 10, "bold")
+        ).pack(pady=5)
 
-                item = selected[0]
-                item_name = self.tree.item(item, 'values')[0]
+        ttk.Label(
+            parent,
+            text=self._("Anyone with the link can view"),
+            font=("TkDefaultFont", 9)
+        ).pack()
+
+        # دکمه‌های مدیریت اشتراک
+        btn_frame = ttk.Frame(parent)
+        btn_frame.pack(pady=10)
+
+        ttk.Button(
+            btn_frame,
+            text=self._("Copy Link"),
+            command=self.copy_share_link,
+            bootstyle="info"
+        ).pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(
+            btn_frame,
+            text=self._("Change Permissions"),
+            command=self.change_permissions,
+            bootstyle="warning"
+        ).pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(
+            btn_frame,
+            text=self._("Stop Sharing"),
+            command=self.stop_sharing,
+            bootstyle="danger"
+        ).pack(side=tk.LEFT, padx=5)
+
+    def copy_to_clipboard(self, text):
+        """کپی متن به کلیپ‌بورد"""
+        try:
+            pyperclip.copy(text)
+            Messagebox.show_info(
+                self._("Copied to clipboard"),
+                self._("Success")
+            )
+        except:
+            Messagebox.show_error(
+                self._("Could not copy to clipboard"),
+                self._("Error")
+            )
 
-                try:
-                    files = self.file_manager.list_files()
-                    file = next((f for f in files if f['name'] == item_name), None)
+    def copy_share_link(self):
+        """کپی لینک اشتراک‌گذاری"""
+        if 'webViewLink' in self.file_data:
+            self.copy_to_clipboard(self.file_data['webViewLink'])
+        else:
+            Messagebox.show_warning(
+                self._("No share link available"),
+                self._("Warning")
+            )
 
-                    if file:
-                        PropertiesDialog(self, file)
-                except Exception as e:
-                    Messagebox.show_error(str(e), self._("Error"))
+    def change_permissions(self):
+        """تغییر مجوزهای اشتراک‌گذاری"""
+        Messagebox.show_info(
+            self._("This feature will be implemented in a future version"),
+            self._("Info")
+        )
 
-            def show_upload_dialog(self):
-                """نمایش دیالوگ آپلود"""
-                upload_window = UploadDialog(self, self.file_manager)
+    def stop_sharing(self):
+        """توقف اشتراک‌گذاری"""
+        if Messagebox.okcancel(
+                self._("Are you sure you want to stop sharing this file?"),
+                self._("Confirm"),
+                parent=self
+        ):
+            Messagebox.show_info(
+                self._("This feature will be implemented in a future version"),
+                self._("Info")
+            )
 
-            def search_files(self):
-                """جستجوی فایل‌ها"""
-                query = self.search_var.get().strip()
-                if not query or query == self._("Search Files..."):
-                    return
+    def get_file_icon(self, mime_type, size=None):
+        """دریافت آیکون فایل"""
+        return IconRegistry.shared().icon_for(mime_type, size)
+
+    def get_file_type(self, mime_type):
+        """دریافت نوع فایل"""
+        return self._(IconRegistry.shared().describe(mime_type)[1])
+
+    @staticmethod
+    def format_size(size_bytes):
+        """قالب‌بندی اندازه فایل"""
+        if not size_bytes:
+            return "0 B"
+
+        size_bytes = int(size_bytes)
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.1f} PB"
+
+    @staticmethod
+    def format_date(date_str):
+        """قالب‌بندی تاریخ"""
+        try:
+            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            return dt.strftime('%Y-%m-%d %H:%M')
+        except:
+            return date_str
 
-                try:
-                    files = self.file_manager.list_files()
-                    results = [f for f in files if query.lower() in f['name'].lower()]
-                    self.update_file_list(results)
-                    self.status_var.set(self._("Found {} matching files").format(len(results)))
-                except Exception as e:
-                    self.status_var.set(self._("Search error: {}").format(str(e)))
 
-            def update_storage_info(self):
-                """به‌روزرسانی اطلاعات فضای ذخیره‌سازی"""
-                try:
-                    storage = self.file_manager.get_storage_info()
-                    used = self.format_size(int(storage.get('usage', 0)))
-                    total = self.format_size(int(storage.get('limit', 0)))
-                    free = self.format_size(int(storage.get('limit', 0)) - int(storage.get('usage', 0)))
+class UploadManager(ttk.Frame):
+    """تب آپلود فایل‌ها؛ انتخاب فایل و مسیر مقصد در UploadDialog انجام می‌شود"""
 
-                    self.storage_var.set(
-                        f"{self._('Used:')} {used} | {self._('Free:')} {free} | {self._('Total:')} {total}")
-                except Exception as e:
-                    logger.error(f"Error getting storage info: {e}")
-                    self.storage_var.set("")
-
-            def get_file_id(self, file_name):
-                """دریافت ID فایل بر اساس نام"""
-                files = self.file_manager.list_files()
-                file = next((f for f in files if f['name'] == file_name), None)
-                return file['id'] if file else None
-
-            @staticmethod
-            def get_file_type(mime_type):
-                """دریافت نوع فایل به صورت خوانا"""
-                if 'image/' in mime_type:
-                    return "Image"
-                elif 'video/' in mime_type:
-                    return "Video"
-                elif 'audio/' in mime_type:
-                    return "Audio"
-                elif 'application/pdf' in mime_type:
-                    return "PDF"
-                elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in mime_type:
-                    return "Word"
-                elif 'text/' in mime_type:
-                    return "Text"
-                else:
-                    return mime_type.split('/')[-1].title()
-
-            @staticmethod
-            def get_file_icon(mime_type, size=None):
-                """دریافت آیکون مناسب برای نوع فایل"""
-                assets = AppAssets(None)
-                if 'image/' in mime_type:
-                    return assets.get_icon('image', size)
-                elif 'video/' in mime_type:
-                    return assets.get_icon('video', size)
-                elif 'audio/' in mime_type:
-                    return assets.get_icon('audio', size)
-                elif 'application/pdf' in mime_type:
-                    return assets.get_icon('pdf', size)
-                elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in mime_type:
-                    return assets.get_icon('word', size)
-                elif 'text/' in mime_type:
-                    return assets.get_icon('text', size)
-                else:
-                    return assets.get_icon('file', size)
-
-            @staticmethod
-            def format_size(size_bytes):
-                """قالب‌بندی اندازه فایل به صورت خوانا"""
-                if not size_bytes:
-                    return "0 B"
-
-                size_bytes = int(size_bytes)
-                for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                    if size_bytes < 1024.0:
-                        return f"{size_bytes:.1f} {unit}"
-                    size_bytes /= 1024.0
-                return f"{size_bytes:.1f} PB"
-
-            @staticmethod
-            def format_date(date_str):
-                """قالب‌بندی تاریخ به صورت خوانا"""
-                try:
-                    dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    return dt.strftime('%Y-%m-%d %H:%M')
-                except:
-                    return date_str
-
-        class UploadDialog(tk.Toplevel):
-            """دیالوگ آپلود پیشرفته"""
-
-            def __init__(self, parent, file_manager):
-                super().__init__(parent)
-                self.file_manager = file_manager
-                self.assets = AppAssets(parent)
-                self.lang = LanguageManager()
-                self._ = self.lang.gettext
-                self.setup_window()
-                self.create_widgets()
-                self.setup_animations()
-
-            def setup_window(self):
-                """تنظیمات پنجره"""
-                self.title(self._("Upload Files"))
-                self.geometry("600x400")
-                self.resizable(False, False)
-                self.center_window()
-
-                # آیکون پنجره
-                try:
-                    self.iconphoto(False, self.assets.get_icon('upload'))
-                except:
-                    pass
-
-            def setup_animations(self):
-                """تنظیم انیمیشن‌های پنجره"""
-                self.assets.animations['fade'](self)
-
-            def center_window(self):
-                """مرکز کردن پنجره"""
-                self.update_idletasks()
-                width = self.winfo_width()
-                height = self.winfo_height()
-                x = (self.winfo_screenwidth() // 2) - (width // 2)
-                y = (self.winfo_screenheight() // 2) - (height // 2)
-                self.geometry(f'+{x}+{y}')
-
-            def create_widgets(self):
-                """ایجاد ویجت‌های پنجره"""
-                # فریم اصلی
-                main_frame = ttk.Frame(self, padding=10)
-                main_frame.pack(fill=tk.BOTH, expand=True)
-
-                # انتخاب فایل
-                file_frame = ttk.LabelFrame(
-                    main_frame,
-                    text=self._("File Selection"),
-                    padding=10
-                )
-                file_frame.pack(fill=tk.X, pady=5)
+    def __init__(self, parent, file_manager, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.file_manager = file_manager
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
 
-                # ورودی فایل و دکمه مرور
-                file_select_frame = ttk.Frame(file_frame)
-                file_select_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(
+            self,
+            text=self._("Upload files to Google Drive"),
+            font=("Helvetica", 14, "bold")
+        ).pack(pady=(40, 10))
+
+        ttk.Button(
+            self,
+            text=self._("Select File..."),
+            bootstyle="primary",
+            command=self.show_upload_dialog
+        ).pack(pady=10)
 
-                self.file_entry = ttk.Entry(file_select_frame)
-                self.file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+    def show_upload_dialog(self):
+        """نمایش دیالوگ آپلود"""
+        UploadDialog(self, self.file_manager)
 
-                self.browse_btn = ttk.Button(
-                    file_select_frame,
-                    text=self._("Browse..."),
-                    command=self.select_file,
-                    width=10
-                )
-                self.browse_btn.pack(side=tk.LEFT)
 
-                # اطلاعات فایل
-                self.file_info_label = ttk.Label(
-                    file_frame,
-                    text=self._("No file selected"),
-                    wraplength=500
-                )
-                self.file_info_label.pack(fill=tk.X, pady=5)
+class SettingsManager(ttk.Frame):
+    """تب تنظیمات اتصال OAuth؛ تنظیمات در config.json ذخیره می‌شوند"""
 
-                # گزینه‌های آپلود
-                options_frame = ttk.LabelFrame(
-                    main_frame,
-                    text=self._("Upload Options"),
-                    padding=10
-                )
-                options_frame.pack(fill=tk.X, pady=5)
-
-                # پوشه مقصد
-                ttk.Label(
-                    options_frame,
-                    text=self._("Destination Folder:")
-                ).grid(row=0, column=0, sticky=tk.E, padx=5, pady=5)
-
-                self.folder_entry = ttk.Entry(options_frame)
-                self.folder_entry.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
-                self.folder_entry.insert(0, self._("My Drive"))
-
-                self.change_folder_btn = ttk.Button(
-                    options_frame,
-                    text=self._("Change..."),
-                    command=self.select_destination_folder,
-                    width=10
-                )
-                self.change_folder_btn.grid(row=0, column=2, padx=5, pady=5)
+    def __init__(self, parent, client_config, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.client_config = client_config
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
 
-                # نام فایل در درایو
-                ttk.Label(
-                    options_frame,
-                    text=self._("Drive File Name:")
-                ).grid(row=1, column=0, sticky=tk.E, padx=5, pady=5)
+        form = ttk.Frame(self)
+        form.pack(fill=tk.X, padx=20, pady=20)
+        form.columnconfigure(1, weight=1)
 
-                self.drive_name_entry = ttk.Entry(options_frame)
-                self.drive_name_entry.grid(row=1, column=1, columnspan=2, sticky=tk.EW, padx=5, pady=5)
+        installed = client_config["installed"]
+        self.client_id_entry = self._add_field(form, 0, self._("Client ID:"), installed["client_id"])
+        self.client_secret_entry = self._add_field(
+            form, 1, self._("Client Secret:"), installed["client_secret"], show="*"
+        )
+        self.redirect_entry = self._add_field(form, 2, self._("Redirect URI:"), installed["redirect_uris"][0])
 
-                # تنظیمات گرید
-                options_frame.grid_columnconfigure(1, weight=1)
+        ttk.Button(
+            self,
+            text=self._("Save Settings"),
+            bootstyle="success",
+            command=self.save_settings
+        ).pack(pady=10)
+
+    @staticmethod
+    def _add_field(parent, row, label, value, show=None):
+        ttk.Label(parent, text=label).grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
+        entry = ttk.Entry(parent, show=show) if show else ttk.Entry(parent)
+        entry.grid(row=row, column=1, sticky=tk.EW, padx=5, pady=5)
+        entry.insert(0, value)
+        return entry
+
+    def save_settings(self):
+        """ذخیره تنظیمات در config.json"""
+        installed = self.client_config["installed"]
+        installed["client_id"] = self.client_id_entry.get().strip()
+        installed["client_secret"] = self.client_secret_entry.get().strip()
+        installed["redirect_uris"] = [self.redirect_entry.get().strip()]
 
-                # پیشرفت آپلود
-                progress_frame = ttk.LabelFrame(
-                    main_frame,
-                    text=self._("Upload Progress"),
-                    padding=10
-                )
-                progress_frame.pack(fill=tk.X, pady=5)
+        try:
+            with open('config.json', 'w') as f:
+                json.dump(self.client_config, f)
+            Messagebox.show_info(self._("Settings saved"), self._("Success"))
+        except Exception as e:
+            logger.error(f"Error saving settings: {e}")
+            Messagebox.show_error(str(e), self._("Error"))
 
-                self.progress = ttk.Progressbar(
-                    progress_frame,
-                    orient=tk.HORIZONTAL,
-                    mode='determinate'
-                )
-                self.progress.pack(fill=tk.X, pady=5)
 
-                self.progress_label = ttk.Label(
-                    progress_frame,
-                    text=self._("Ready to upload"),
-                    anchor=tk.CENTER
-                )
-                self.progress_label.pack(fill=tk.X)
-
-                # دکمه‌های عملیاتی
-                btn_frame = ttk.Frame(main_frame)
-                btn_frame.pack(fill=tk.X, pady=10)
-
-                self.upload_btn = ttk.Button(
-                    btn_frame,
-                    text=self._("Start Upload"),
-                    command=self.start_upload,
-                    bootstyle="success",
-                    state=tk.DISABLED
-                )
-                self.upload_btn.pack(side=tk.LEFT, padx=5)
+class EnhancedSfileCloud:
+    """کلاس اصلی برنامه با تمام بهبودها"""
 
-                self.cancel_btn = ttk.Button(
-                    btn_frame,
-                    text=self._("Cancel"),
-                    command=self.destroy,
-                    bootstyle="danger"
-                )
-                self.cancel_btn.pack(side=tk.RIGHT, padx=5)
-
-            def select_file(self):
-                """انتخاب فایل برای آپلود"""
-                file_path = filedialog.askopenfilename(
-                    title=self._("Select File to Upload"),
-                    filetypes=[
-                        (self._("All Files"), "*.*"),
-                        (self._("Documents"), "*.doc *.docx *.pdf *.txt *.rtf"),
-                        (self._("Images"), "*.jpg *.jpeg *.png *.gif *.bmp"),
-                        (self._("Videos"), "*.mp4 *.avi *.mov *.mkv")
-                    ]
-                )
+    def __init__(self, root):
+        self.root = root
+        self.assets = AppAssets(root)
+        self.lang = EnhancedLanguageManager()
+        self._ = self.lang.gettext
+        self.ui = UiDispatcher.shared(root)
 
-                if file_path:
-                    self.file_entry.delete(0, tk.END)
-                    self.file_entry.insert(0, file_path)
-                    self.update_file_info(file_path)
+        # تنظیمات اولیه
+        self.initialize()
 
-                    # پر کردن نام فایل در درایو
-                    file_name = os.path.basename(file_path)
-                    self.drive_name_entry.delete(0, tk.END)
-                    self.drive_name_entry.insert(0, file_name)
+        # تنظیم پنجره اصلی
+        self.setup_main_window()
 
-                    if self.file_manager.access_token:
-                        self.upload_btn['state'] = tk.NORMAL
+        # تنظیم رابط کاربری
+        self.setup_ui()
 
-            def update_file_info(self, file_path):
-                """به‌روزرسانی اطلاعات فایل"""
-                try:
-                    file_name = os.path.basename(file_path)
-                    file_size = os.path.getsize(file_path)
+        # بارگذاری تنظیمات
+        self.load_settings()
 
-                    info_text = f"{self._('File:')} {file_name}\n{self._('Size:')} {self.format_size(file_size)}"
-                    self.file_info_label.config(text=info_text)
-                except Exception as e:
-                    logger.error(f"Error getting file info: {e}")
-                    self.file_info_label.config(text=self._("Error getting file information"))
-
-            def select_destination_folder(self):
-                """انتخاب پوشه مقصد در گوگل درایو"""
-                if not self.file_manager.access_token:
-                    Messagebox.show_error(
-                        self._("You must authenticate first"),
-                        self._("Error")
-                    )
-                    return
+        # تنظیم زبان پیش‌فرض
+        self.lang.set_language("en")
 
-                # در نسخه کامل می‌توانید یک مرورگر پوشه درایو پیاده‌سازی کنید
-                Messagebox.show_info(
-                    self._("Folder selection will be implemented in a future version"),
-                    self._("Info")
-                )
+        # نمایش splash screen
+        self.show_splash()
 
-            def start_upload(self):
-                """شروع آپلود فایل"""
-                file_path = self.file_entry.get()
-                if not file_path or not os.path.exists(file_path):
-                    Messagebox.show_error(
-                        self._("Please select a valid file"),
-                        self._("Error")
-                    )
-                    return
+        # ورود خودکار با اطلاعات ذخیره شده از اجرای قبلی
+        threading.Thread(target=self._restore_session, daemon=True).start()
 
-                drive_name = self.drive_name_entry.get().strip()
-                if not drive_name:
-                    drive_name = os.path.basename(file_path)
+    def initialize(self):
+        """مقداردهی اولیه متغیرها"""
+        # تنظیمات تم
+        self.theme_mode = "light"
+        self.available_themes = ["light", "dark", "blue", "green", "superhero", "solar"]
 
-                # نمایش دیالوگ پیشرفت
-                progress_dialog = ProgressDialog(
-                    self,
-                    title=self._("Uploading"),
-                    message=self._("Uploading {}...").format(drive_name)
-                )
+        # تنظیمات OAuth
+        self.client_config = {
+            "installed": {
+                "client_id": os.getenv('GOOGLE_CLIENT_ID', ''),
+                "client_secret": os.getenv('GOOGLE_CLIENT_SECRET', ''),
+                "redirect_uris": ["http://localhost:8080"],
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token"
+            }
+        }
 
-                # شروع آپلود در یک thread جداگانه
-                threading.Thread(
-                    target=self._perform_upload,
-                    args=(file_path, drive_name, progress_dialog),
-                    daemon=True
-                ).start()
+        # مدیر فایل
+        self.file_manager = EnhancedDriveFileManager(self.client_config)
 
-            def _perform_upload(self, file_path, drive_name, progress_dialog):
-                """انجام عملیات آپلود"""
-                try:
-                    # در اینجا می‌توانید از file_manager.upload_file استفاده کنید
-                    # این یک پیاده‌سازی ساده برای نمایش پیشرفت است
-                    file_size = os.path.getsize(file_path)
-                    chunk_size = file_size // 100
-
-                    for i in range(101):
-                        progress_dialog.update_progress(
-                            i,
-                            f"{self.format_size(i * chunk_size)} / {self.format_size(file_size)}"
-                        )
-                        time.sleep(0.05)  # شبیه‌سازی زمان آپلود
-
-                        if progress_dialog.cancelled:
-                            return
-
-                    # در نسخه واقعی، نتیجه آپلود را نمایش دهید
-                    progress_dialog.complete(self._("Upload complete"))
-                    Messagebox.show_info(
-                        self._("File uploaded successfully"),
-                        self._("Success")
-                    )
+    def setup_main_window(self):
+        """تنظیم پنجره اصلی"""
+        self.root.title(self._("SfileCloud Professional"))
+        self.root.geometry("1200x800")
+        self.root.minsize(1000, 700)
 
-                except Exception as e:
-                    progress_dialog.error(str(e))
-                    Messagebox.show_error(str(e), self._("Error"))
-                finally:
-                    progress_dialog.close()
-                    self.destroy()
-
-            @staticmethod
-            def format_size(size_bytes):
-                """قالب‌بندی اندازه فایل"""
-                if not size_bytes:
-                    return "0 B"
-
-                size_bytes = int(size_bytes)
-                for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                    if size_bytes < 1024.0:
-                        return f"{size_bytes:.1f} {unit}"
-                    size_bytes /= 1024.0
-                return f"{size_bytes:.1f} PB"
-
-        class EnhancedProgressDialog(tk.Toplevel):
-            """دیالوگ پیشرفت پیشرفته"""
-
-            def __init__(self, parent, title="Progress", message="Processing..."):
-                super().__init__(parent)
-                self.title(title)
-                self.geometry("400x180")  # ارتفاع بیشتر برای جزئیات بیشتر
-                self.resizable(False, False)
-                self.cancelled = False
-
-                # مرکز کردن پنجره
-                self.center_window()
-
-                # تنظیمات ظاهری
-                self.attributes('-alpha', 0.95)
-
-                # پیام
-                self.message_var = tk.StringVar(value=message)
-                ttk.Label(
-                    self,
-                    textvariable=self.message_var,
-                    wraplength=380,
-                    font=("TkDefaultFont", 10)
-                ).pack(pady=(15, 5))
-
-                # نوار پیشرفت
-                self.progress = ttk.Progressbar(
-                    self,
-                    orient=tk.HORIZONTAL,
-                    mode='determinate',
-                    length=380,
-                    style="success.Striped.Horizontal.TProgressbar"
-                )
-                self.progress.pack(pady=5)
-
-                # متن پیشرفت
-                self.progress_var = tk.StringVar(value="")
-                ttk.Label(
-                    self,
-                    textvariable=self.progress_var,
-                    font=("TkDefaultFont", 8)
-                ).pack()
-
-                # تخمین زمان باقیمانده
-                self.time_var = tk.StringVar(value="")
-                ttk.Label(
-                    self,
-                    textvariable=self.time_var,
-                    font=("TkDefaultFont", 8)
-                ).pack()
-
-                # دکمه‌ها
-                btn_frame = ttk.Frame(self)
-                btn_frame.pack(pady=10)
-
-                self.cancel_btn = ttk.Button(
-                    btn_frame,
-                    text="Cancel",
-                    command=self.cancel,
-                    bootstyle="danger"
-                )
-                self.cancel_btn.pack(side=tk.LEFT, padx=10)
+        # آیکون پنجره
+        try:
+            self.root.iconphoto(False, self.assets.get_image('logo'))
+        except:
+            pass
 
-                self.minimize_btn = ttk.Button(
-                    btn_frame,
-                    text="Minimize",
-                    command=self.minimize
-                )
-                self.minimize_btn.pack(side=tk.RIGHT, padx=10)
-
-                # متغیرهای زمان
-                self.start_time = time.time()
-                self.last_update = 0
-
-                # تنظیم modal
-                self.grab_set()
-                self.transient(parent)
-                self.protocol("WM_DELETE_WINDOW", self.cancel)
-
-            def center_window(self):
-                """مرکز کردن پنجره"""
-                self.update_idletasks()
-                width = self.winfo_width()
-                height = self.winfo_height()
-                x = (self.winfo_screenwidth() // 2) - (width // 2)
-                y = (self.winfo_screenheight() // 2) - (height // 2)
-                self.geometry(f'+{x}+{y}')
-
-            def update_progress(self, value, text=""):
-                """به‌روزرسانی پیشرفت"""
-                self.progress['value'] = value
-                self.progress_var.set(text)
-
-                # محاسبه زمان باقیمانده
-                current_time = time.time()
-                if current_time - self.last_update > 1:  # هر ثانیه یکبار به‌روزرسانی کنید
-                    elapsed = current_time - self.start_time
-                    if value > 0:
-                        remaining = (elapsed * (100 - value)) / value
-                        self.time_var.set(f"Estimated time remaining: {self.format_time(remaining)}")
-                    self.last_update = current_time
-
-                self.update_idletasks()
-
-            def complete(self, message):
-                """تکمیل عملیات"""
-                self.message_var.set(message)
-                self.progress['value'] = 100
-                self.progress_var.set("")
-                self.time_var.set("")
-                self.cancel_btn.config(text="Close")
-                self.minimize_btn.pack_forget()
-                self.update_idletasks()
-
-            def error(self, message):
-                """نمایش خطا"""
-                self.message_var.set(f"Error: {message}")
-                self.progress.config(style="danger.Horizontal.TProgressbar")
-                self.cancel_btn.config(text="Close")
-                self.minimize_btn.pack_forget()
-                self.update_idletasks()
-
-            def cancel(self):
-                """لغو عملیات"""
-                self.cancelled = True
-                self.message_var.set("Cancelling...")
-                self.update_idletasks()
-
-            def minimize(self):
-                """کوچک کردن پنجره"""
-                self.iconify()
-
-            @staticmethod
-            def format_time(seconds):
-                """قالب‌بندی زمان به صورت خوانا"""
-                seconds = int(seconds)
-                hours = seconds // 3600
-                minutes = (seconds % 3600) // 60
-                seconds = seconds % 60
-
-                if hours > 0:
-                    return f"{hours}h {minutes}m {seconds}s"
-                elif minutes > 0:
-                    return f"{minutes}m {seconds}s"
-                else:
-                    return f"{seconds}s"
-
-        class EnhancedPropertiesDialog(tk.Toplevel):
-            """دیالوگ ویژگی‌های پیشرفته"""
-
-            def __init__(self, parent, file_data):
-                super().__init__(parent)
-                self.title("Properties")
-                self.geometry("500x500")
-                self.resizable(False, False)
-                self.file_data = file_data
-                self.assets = AppAssets(parent)
-                self.lang = LanguageManager()
-                self._ = self.lang.gettext
-                self.setup_ui()
-                self.center_window()
-
-            def center_window(self):
-                """مرکز کردن پنجره"""
-                self.update_idletasks()
-                width = self.winfo_width()
-                height = self.winfo_height()
-                x = (self.winfo_screenwidth() // 2) - (width // 2)
-                y = (self.winfo_screenheight() // 2) - (height // 2)
-                self.geometry(f'+{x}+{y}')
-
-            def setup_ui(self):
-                """تنظیم رابط کاربری"""
-                # فریم اصلی
-                main_frame = ttk.Frame(self, padding=10)
-                main_frame.pack(fill=tk.BOTH, expand=True)
-
-                # هدر
-                header_frame = ttk.Frame(main_frame)
-                header_frame.pack(fill=tk.X, pady=(0, 10))
-
-                # آیکون فایل
-                file_icon = self.get_file_icon(self.file_data['mimeType'], (64, 64))
-                ttk.Label(
-                    header_frame,
-                    image=file_icon
-                ).pack(side=tk.LEFT, padx=10)
-
-                # نام و نوع فایل
-                info_frame = ttk.Frame(header_frame)
-                info_frame.pack(side=tk.LEFT, fill=tk.Y)
-
-                ttk.Label(
-                    info_frame,
-                    text=self.file_data['name'],
-                    font=("TkDefaultFont", 12, "bold")
-                ).pack(anchor=tk.W)
-
-                ttk.Label(
-                    info_frame,
-                    text=self.get_file_type(self.file_data['mimeType']),
-                    font=("TkDefaultFont", 9)
-                ).pack(anchor=tk.W)
-
-                # تب‌ها
-                notebook = ttk.Notebook(main_frame)
-                notebook.pack(fill=tk.BOTH, expand=True)
-
-                # تب عمومی
-                general_tab = ttk.Frame(notebook)
-                notebook.add(general_tab, text=self._("General"))
-
-                self.create_general_tab(general_tab)
-
-                # تب جزئیات
-                details_tab = ttk.Frame(notebook)
-                notebook.add(details_tab, text=self._("Details"))
-
-                self.create_details_tab(details_tab)
-
-                # تب اشتراک‌گذاری
-                sharing_tab = ttk.Frame(notebook)
-                notebook.add(sharing_tab, text=self._("Sharing"))
-
-                self.create_sharing_tab(sharing_tab)
-
-                # دکمه بستن
-                ttk.Button(
-                    main_frame,
-                    text=self._("Close"),
-                    command=self.destroy,
-                    bootstyle="primary"
-                ).pack(pady=10)
-
-            def create_general_tab(self, parent):
-                """ایجاد تب عمومی"""
-                # تصویر کوچک برای فایل‌های تصویری
-                if 'image/' in self.file_data['mimeType'] and 'thumbnailLink' in self.file_data:
-                    try:
-                        response = requests.get(self.file_data['thumbnailLink'], stream=True)
-                        if response.status_code == 200:
-                            img_data = response.content
-                            img = Image.open(io.BytesIO(img_data))
-                            img.thumbnail((200, 200))
-
-                            photo = ImageTk.PhotoImage(img)
-                            label = ttk.Label(parent, image=photo)
-                            label.image = photo
-                            label.pack(pady=10)
-                    except:
-                        pass
-
-                # اطلاعات پایه
-                info_frame = ttk.Frame(parent)
-                info_frame.pack(fill=tk.X, pady=5)
-
-                properties = [
-                    (self._("Name:"), self.file_data['name']),
-                    (self._("Type:"), self.get_file_type(self.file_data['mimeType'])),
-                    (self._("Size:"), self.format_size(int(self.file_data.get('size', 0)))),
-                    (self._("Modified:"), self.format_date(self.file_data['modifiedTime'])),
-                    (self._("Shared:"), self._("Yes") if self.file_data.get('shared', False) else self._("No"))
-                ]
+        # مرکز کردن پنجره
+        self.center_window()
 
-                for i, (prop, value) in enumerate(properties):
-                    row = ttk.Frame(info_frame)
-                    row.pack(fill=tk.X, pady=2)
-
-                    ttk.Label(
-                        row,
-                        text=prop,
-                        font=("TkDefaultFont", 9, "bold"),
-                        width=15,
-                        anchor=tk.E
-                    ).pack(side=tk.LEFT)
-
-                    ttk.Label(
-                        row,
-                        text=value,
-                        font=("TkDefaultFont", 9),
-                        anchor=tk.W
-                    ).pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-            def create_details_tab(self, parent):
-                """ایجاد تب جزئیات"""
-                # جدول جزئیات
-                columns = [
-                    {"text": "Property", "stretch": False},
-                    {"text": "Value", "stretch": True}
-                ]
+        # تنظیم تم
+        self.style = Style(theme="flatly")
 
-                rows = [
-                    ("ID", self.file_data['id']),
-                    ("MIME Type", self.file_data['mimeType']),
-                    ("Created", self.format_date(self.file_data.get('createdTime', ''))),
-                    ("Modified", self.format_date(self.file_data['modifiedTime'])),
-                    ("Size", self.format_size(int(self.file_data.get('size', 0)))),
-                    ("Shared", "Yes" if self.file_data.get('shared', False) else "No"),
-                    ("Web View", self.file_data.get('webViewLink', 'N/A'))
-                ]
+    def center_window(self):
+        """مرکز کردن پنجره روی صفحه"""
+        self.root.update_idletasks()
+        width = self.root.winfo_width()
+        height = self.root.winfo_height()
+        x = (self.root.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.root.winfo_screenheight() // 2) - (height // 2)
+        self.root.geometry(f'+{x}+{y}')
+
+    def show_splash(self):
+        """نمایش splash screen"""
+        self.splash = tk.Toplevel(self.root)
+        self.splash.title("SfileCloud Professional")
+        self.splash.geometry("500x300")
+        self.splash.overrideredirect(True)
+
+        # مرکز کردن splash
+        self.splash.update_idletasks()
+        width = self.splash.winfo_width()
+        height = self.splash.winfo_height()
+        x = (self.splash.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.splash.winfo_screenheight() // 2) - (height // 2)
+        self.splash.geometry(f'+{x}+{y}')
+
+        # محتوای splash
+        logo = self.assets.get_image('splash')
+        if logo:
+            ttk.Label(self.splash, image=logo).pack(pady=20)
 
-                table = Tableview(
-                    parent,
-                    coldata=columns,
-                    rowdata=rows,
-                    paginated=False,
-                    searchable=False,
-                    bootstyle="info"
-                )
-                table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-                # دکمه کپی ID
-                ttk.Button(
-                    parent,
-                    text=self._("Copy ID"),
-                    command=lambda: self.copy_to_clipboard(self.file_data['id']),
-                    bootstyle="info"
-                ).pack(pady=5)
-
-            def create_sharing_tab(self, parent):
-                """ایجاد تب اشتراک‌گذاری"""
-                if not self.file_data.get('shared', False):
-                    ttk.Label(
-                        parent,
-                        text=self._("This file is not shared"),
-                        font=("TkDefaultFont", 10)
-                    ).pack(pady=20)
-                    return
+        ttk.Label(
+            self.splash,
+            text="SfileCloud Professional",
+            font=("Helvetica", 16, "bold")
+        ).pack()
 
-                # در نسخه کامل می‌توانید لیست مجوزها را نمایش دهید
-                ttk.Label(
-                    parent,
-                    text=self._("Sharing settings:"),
-                    font=("TkDefaultFont", 10, "bold")
-                ).pack(pady=5)
-
-                ttk.Label(
-                    parent,
-                    text=self._("Anyone with the link can view"),
-                    font=("TkDefaultFont", 9)
-                ).pack()
-
-                # دکمه‌های مدیریت اشتراک
-                btn_frame = ttk.Frame(parent)
-                btn_frame.pack(pady=10)
-
-                ttk.Button(
-                    btn_frame,
-                    text=self._("Copy Link"),
-                    command=self.copy_share_link,
-                    bootstyle="info"
-                ).pack(side=tk.LEFT, padx=5)
-
-                ttk.Button(
-                    btn_frame,
-                    text=self._("Change Permissions"),
-                    command=self.change_permissions,
-                    bootstyle="warning"
-                ).pack(side=tk.LEFT, padx=5)
-
-                ttk.Button(
-                    btn_frame,
-                    text=self._("Stop Sharing"),
-                    command=self.stop_sharing,
-                    bootstyle="danger"
-                ).pack(side=tk.LEFT, padx=5)
-
-        def copy_to_clipboard(self, text):
-            """کپی متن به کلیپ‌بورد"""
-            try:
-                pyperclip.copy(text)
-                Messagebox.show_info(
-                    self._("Copied to clipboard"),
-                    self._("Success")
-                )
-            except:
-                Messagebox.show_error(
-                    self._("Could not copy to clipboard"),
-                    self._("Error")
-                )
+        ttk.Label(
+            self.splash,
+            text="Loading...",
+            font=("Helvetica", 10)
+        ).pack(pady=20)
+
+        progress = ttk.Progressbar(
+            self.splash,
+            orient=tk.HORIZONTAL,
+            mode='indeterminate',
+            length=300
+        )
+        progress.pack(pady=10)
+        progress.start()
 
-        def copy_share_link(self):
-            """کپی لینک اشتراک‌گذاری"""
-            if 'webViewLink' in self.file_data:
-                self.copy_to_clipboard(self.file_data['webViewLink'])
-            else:
-                Messagebox.show_warning(
-                    self._("No share link available"),
-                    self._("Warning")
-                )
+        # به‌روزرسانی splash
+        self.splash.update()
 
-        def change_permissions(self):
-            """تغییر مجوزهای اشتراک‌گذاری"""
-            Messagebox.show_info(
-                self._("This feature will be implemented in a future version"),
-                self._("Info")
-            )
+        # بستن splash پس از تاخیر
+        self.root.after(2000, self.close_splash)
 
-        def stop_sharing(self):
-            """توقف اشتراک‌گذاری"""
-            if Messagebox.okcancel(
-                    self._("Are you sure you want to stop sharing this file?"),
-                    self._("Confirm"),
-                    parent=self
-            ):
-                Messagebox.show_info(
-                    self._("This feature will be implemented in a future version"),
-                    self._("Info")
-                )
+    def close_splash(self):
+        """بستن splash screen"""
+        try:
+            self.splash.destroy()
+        except:
+            pass
 
-        def get_file_icon(self, mime_type, size=None):
-            """دریافت آیکون فایل"""
-            if mime_type == 'application/vnd.google-apps.folder':
-                return self.assets.get_icon('folder', size)
-            elif 'image/' in mime_type:
-                return self.assets.get_icon('image', size)
-            elif 'video/' in mime_type:
-                return self.assets.get_icon('video', size)
-            elif 'audio/' in mime_type:
-                return self.assets.get_icon('audio', size)
-            elif 'application/pdf' in mime_type:
-                return self.assets.get_icon('pdf', size)
-            elif 'text/' in mime_type:
-                return self.assets.get_icon('text', size)
-            else:
-                return self.assets.get_icon('file', size)
-
-        def get_file_type(self, mime_type):
-            """دریافت نوع فایل"""
-            if mime_type == 'application/vnd.google-apps.folder':
-                return self._("Folder")
-            elif 'image/' in mime_type:
-                return self._("Image")
-            elif 'video/' in mime_type:
-                return self._("Video")
-            elif 'audio/' in mime_type:
-                return self._("Audio")
-            elif 'application/pdf' in mime_type:
-                return "PDF"
-            elif 'text/' in mime_type:
-                return self._("Text")
-            else:
-                return mime_type.split('/')[-1].title()
-
-        @staticmethod
-        def format_size(size_bytes):
-            """قالب‌بندی اندازه فایل"""
-            if not size_bytes:
-                return "0 B"
-
-            size_bytes = int(size_bytes)
-            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                if size_bytes < 1024.0:
-                    return f"{size_bytes:.1f} {unit}"
-                size_bytes /= 1024.0
-            return f"{size_bytes:.1f} PB"
-
-        @staticmethod
-        def format_date(date_str):
-            """قالب‌بندی تاریخ"""
-            try:
-                dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                return dt.strftime('%Y-%m-%d %H:%M')
-            except:
-                return date_str
-
-    class EnhancedSfileCloud:
-        """کلاس اصلی برنامه با تمام بهبودها"""
-
-        def __init__(self, root):
-            self.root = root
-            self.assets = AppAssets(root)
-            self.lang = EnhancedLanguageManager()
-            self._ = self.lang.gettext
-
-            # تنظیمات اولیه
-            self.initialize()
-
-            # تنظیم پنجره اصلی
-            self.setup_main_window()
-
-            # تنظیم رابط کاربری
-            self.setup_ui()
-
-            # بارگذاری تنظیمات
-            self.load_settings()
-
-            # تنظیم زبان پیش‌فرض
-            self.lang.set_language("en")
-
-            # نمایش splash screen
-            self.show_splash()
-
-        def initialize(self):
-            """مقداردهی اولیه متغیرها"""
-            # تنظیمات تم
-            self.theme_mode = "light"
-            self.available_themes = ["light", "dark", "blue", "green", "superhero", "solar"]
-
-            # تنظیمات OAuth
-            self.client_config = {
-                "installed": {
-                    "client_id": os.getenv('GOOGLE_CLIENT_ID', ''),
-                    "client_secret": os.getenv('GOOGLE_CLIENT_SECRET', ''),
-                    "redirect_uris": ["http://localhost:8080"],
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token"
-                }
-            }
+        # نمایش پنجره اصلی
+        self.root.deiconify()
 
-            # مدیر فایل
-            self.file_manager = EnhancedDriveFileManager(self.client_config)
+    def setup_ui(self):
+        """تنظیم رابط کاربری اصلی"""
+        self.create_menu_bar()
+        self.create_main_notebook()
+        self.create_status_bar()
+
+    def create_menu_bar(self):
+        """ایجاد نوار منوی پیشرفته"""
+        self.menubar = tk.Menu(self.root)
+
+        # منوی فایل
+        self.file_menu = tk.Menu(self.menubar, tearoff=0)
+        self.file_menu.add_command(
+            label=self._("New Upload"),
+            command=self.new_upload,
+            image=self.assets.get_icon('upload'),
+            compound=tk.LEFT,
+            accelerator="Ctrl+N"
+        )
+        self.file_menu.add_command(
+            label=self._("Open Folder"),
+            command=self.open_local_folder,
+            image=self.assets.get_icon('folder'),
+            compound=tk.LEFT,
+            accelerator="Ctrl+O"
+        )
+        self.file_menu.add_separator()
+        self.file_menu.add_command(
+            label=self._("Exit"),
+            command=self.root.quit,
+            image=self.assets.get_icon('exit'),
+            compound=tk.LEFT,
+            accelerator="Alt+F4"
+        )
+        self.menubar.add_cascade(label=self._("File"), menu=self.file_menu)
 
-        def setup_main_window(self):
-            """تنظیم پنجره اصلی"""
-            self.root.title(self._("SfileCloud Professional"))
-            self.root.geometry("1200x800")
-            self.root.minsize(1000, 700)
+        # منوی ویرایش
+        self.edit_menu = tk.Menu(self.menubar, tearoff=0)
+        self.edit_menu.add_command(
+            label=self._("Copy"),
+            image=self.assets.get_icon('copy'),
+            compound=tk.LEFT,
+            command=lambda: self.assets.copy_item(self.get_selected_item()),
+            accelerator="Ctrl+C"
+        )
+        self.edit_menu.add_command(
+            label=self._("Paste"),
+            image=self.assets.get_icon('paste'),
+            compound=tk.LEFT,
+            command=lambda: self.handle_paste(self.assets.paste_item()),
+            accelerator="Ctrl+V"
+        )
+        self.edit_menu.add_separator()
+        self.edit_menu.add_command(
+            label=self._("Refresh"),
+            image=self.assets.get_icon('refresh'),
+            compound=tk.LEFT,
+            command=self.refresh_files,
+            accelerator="F5"
+        )
+        self.menubar.add_cascade(label=self._("Edit"), menu=self.edit_menu)
 
-            # آیکون پنجره
-            try:
-                self.root.iconphoto(False, self.assets.get_image('logo'))
-            except:
-                pass
+        # منوی نمایش
+        self.view_menu = tk.Menu(self.menubar, tearoff=0)
 
-            # مرکز کردن پنجره
-            self.center_window()
-
-            # تنظیم تم
-            self.style = Style(theme="flatly")
-
-        def center_window(self):
-            """مرکز کردن پنجره روی صفحه"""
-            self.root.update_idletasks()
-            width = self.root.winfo_width()
-            height = self.root.winfo_height()
-            x = (self.root.winfo_screenwidth() // 2) - (width // 2)
-            y = (self.root.winfo_screenheight() // 2) - (height // 2)
-            self.root.geometry(f'+{x}+{y}')
-
-        def show_splash(self):
-            """نمایش splash screen"""
-            self.splash = tk.Toplevel(self.root)
-            self.splash.title("SfileCloud Professional")
-            self.splash.geometry("500x300")
-            self.splash.overrideredirect(True)
-
-            # مرکز کردن splash
-            self.splash.update_idletasks()
-            width = self.splash.winfo_width()
-            height = self.splash.winfo_height()
-            x = (self.splash.winfo_screenwidth() // 2) - (width // 2)
-            y = (self.splash.winfo_screenheight() // 2) - (height // 2)
-            self.splash.geometry(f'+{x}+{y}')
-
-            # محتوای splash
-            logo = self.assets.get_image('splash')
-            if logo:
-                ttk.Label(self.splash, image=logo).pack(pady=20)
+        # زیرمنوی تم
+        theme_menu = tk.Menu(self.view_menu, tearoff=0)
+        for theme in self.available_themes:
+            theme_menu.add_command(
+                label=theme.capitalize(),
+                command=lambda t=theme: self.change_theme(t)
+            )
 
-            ttk.Label(
-                self.splash,
-                text="SfileCloud Professional",
-                font=("Helvetica", 16, "bold")
-            ).pack()
+        self.view_menu.add_cascade(
+            label=self._("Theme"),
+            menu=theme_menu,
+            image=self.assets.get_icon('theme'),
+            compound=tk.LEFT
+        )
 
-            ttk.Label(
-                self.splash,
-                text="Loading...",
-                font=("Helvetica", 10)
-            ).pack(pady=20)
+        self.view_menu.add_separator()
 
-            progress = ttk.Progressbar(
-                self.splash,
-                orient=tk.HORIZONTAL,
-                mode='indeterminate',
-                length=300
-            )
-            progress.pack(pady=10)
-            progress.start()
+        self.view_menu.add_command(
+            label=self._("List View"),
+            command=lambda: self.explorer_tab.notebook.select(0),
+            accelerator="Ctrl+1"
+        )
 
-            # به‌روزرسانی splash
-            self.splash.update()
+        self.view_menu.add_command(
+            label=self._("Thumbnail View"),
+            command=lambda: self.explorer_tab.notebook.select(1),
+            accelerator="Ctrl+2"
+        )
 
-            # بستن splash پس از تاخیر
-            self.root.after(2000, self.close_splash)
+        self.view_menu.add_command(
+            label=self._("Details View"),
+            command=lambda: self.explorer_tab.notebook.select(2),
+            accelerator="Ctrl+3"
+        )
 
-        def close_splash(self):
-            """بستن splash screen"""
-            try:
-                self.splash.destroy()
-            except:
-                pass
+        self.menubar.add_cascade(label=self._("View"), menu=self.view_menu)
 
-            # نمایش پنجره اصلی
-            self.root.deiconify()
-
-        def setup_ui(self):
-            """تنظیم رابط کاربری اصلی"""
-            self.create_menu_bar()
-            self.create_main_notebook()
-            self.create_status_bar()
-
-        def create_menu_bar(self):
-            """ایجاد نوار منوی پیشرفته"""
-            self.menubar = tk.Menu(self.root)
-
-            # منوی فایل
-            self.file_menu = tk.Menu(self.menubar, tearoff=0)
-            self.file_menu.add_command(
-                label=self._("New Upload"),
-                command=self.new_upload,
-                image=self.assets.get_icon('upload'),
-                compound=tk.LEFT,
-                accelerator="Ctrl+N"
-            )
-            self.file_menu.add_command(
-                label=self._("Open Folder"),
-                command=self.open_local_folder,
-                image=self.assets.get_icon('folder'),
-                compound=tk.LEFT,
-                accelerator="Ctrl+O"
-            )
-            self.file_menu.add_separator()
-            self.file_menu.add_command(
-                label=self._("Exit"),
-                command=self.root.quit,
-                image=self.assets.get_icon('exit'),
-                compound=tk.LEFT,
-                accelerator="Alt+F4"
-            )
-            self.menubar.add_cascade(label=self._("File"), menu=self.file_menu)
+        # منوی ابزارها
+        self.tools_menu = tk.Menu(self.menubar, tearoff=0)
+        self.tools_menu.add_command(
+            label=self._("Connect to Drive"),
+            command=self.connect_to_drive,
+            image=self.assets.get_icon('drive'),
+            compound=tk.LEFT,
+            accelerator="Ctrl+D"
+        )
+        self.tools_menu.add_command(
+            label=self._("Batch Operations"),
+            command=self.show_batch_operations,
+            image=self.assets.get_icon('edit'),
+            compound=tk.LEFT
+        )
+        self.menubar.add_cascade(label=self._("Tools"), menu=self.tools_menu)
+
+        # منوی کمک
+        self.help_menu = tk.Menu(self.menubar, tearoff=0)
+        self.help_menu.add_command(
+            label=self._("Documentation"),
+            command=self.show_documentation,
+            image=self.assets.get_icon('info'),
+            compound=tk.LEFT
+        )
+        self.help_menu.add_command(
+            label=self._("About"),
+            command=self.show_about,
+            image=self.assets.get_icon('info'),
+            compound=tk.LEFT,
+            accelerator="F1"
+        )
+        self.menubar.add_cascade(label=self._("Help"), menu=self.help_menu)
 
-            # منوی ویرایش
-            self.edit_menu = tk.Menu(self.menubar, tearoff=0)
-            self.edit_menu.add_command(
-                label=self._("Copy"),
-                image=self.assets.get_icon('copy'),
-                compound=tk.LEFT,
-                command=lambda: self.assets.copy_item(self.get_selected_item()),
-                accelerator="Ctrl+C"
-            )
-            self.edit_menu.add_command(
-                label=self._("Paste"),
-                image=self.assets.get_icon('paste'),
-                compound=tk.LEFT,
-                command=lambda: self.handle_paste(self.assets.paste_item()),
-                accelerator="Ctrl+V"
-            )
-            self.edit_menu.add_separator()
-            self.edit_menu.add_command(
-                label=self._("Refresh"),
-                image=self.assets.get_icon('refresh'),
-                compound=tk.LEFT,
-                command=self.refresh_files,
-                accelerator="F5"
-            )
-            self.menubar.add_cascade(label=self._("Edit"), menu=self.edit_menu)
+        # منوی زبان
+        self.lang_menu = tk.Menu(self.menubar, tearoff=0)
+        self.lang_menu.add_command(
+            label="English",
+            command=lambda: self.change_language("en")
+        )
+        self.lang_menu.add_command(
+            label="فارسی",
+            command=lambda: self.change_language("fa")
+        )
+        self.menubar.add_cascade(label=self._("Language"), menu=self.lang_menu)
 
-            # منوی نمایش
-            self.view_menu = tk.Menu(self.menubar, tearoff=0)
+        self.root.config(menu=self.menubar)
 
-            # زیرمنوی تم
-            theme_menu = tk.Menu(self.view_menu, tearoff=0)
-            for theme in self.available_themes:
-                theme_menu.add_command(
-                    label=theme.capitalize(),
-                    command=lambda t=theme: self.change_theme(t)
-                )
+    def create_main_notebook(self):
+        """ایجاد نوت‌بوک اصلی"""
+        self.main_notebook = ttk.Notebook(self.root)
+        self.main_notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
-            self.view_menu.add_cascade(
-                label=self._("Theme"),
-                menu=theme_menu,
-                image=self.assets.get_icon('theme'),
-                compound=tk.LEFT
-            )
+        # ایجاد تب‌ها
+        self.create_drive_explorer_tab()
+        self.create_upload_tab()
+        self.create_settings_tab()
 
-            self.view_menu.add_separator()
+    def create_drive_explorer_tab(self):
+        """ایجاد تب مرورگر درایو"""
+        self.explorer_tab = ModernFileBrowser(
+            self.main_notebook,
+            self.file_manager
+        )
+        self.main_notebook.add(
+            self.explorer_tab,
+            text=self._("Drive Explorer"),
+            image=self.assets.get_icon('drive'),
+            compound=tk.LEFT
+        )
 
-            self.view_menu.add_command(
-                label=self._("List View"),
-                command=lambda: self.explorer_tab.notebook.select(0),
-                accelerator="Ctrl+1"
-            )
+    def create_upload_tab(self):
+        """ایجاد تب آپلود فایل‌ها"""
+        self.upload_tab = UploadManager(
+            self.main_notebook,
+            self.file_manager
+        )
+        self.main_notebook.add(
+            self.upload_tab,
+            text=self._("Upload Files"),
+            image=self.assets.get_icon('upload'),
+            compound=tk.LEFT
+        )
 
-            self.view_menu.add_command(
-                label=self._("Thumbnail View"),
-                command=lambda: self.explorer_tab.notebook.select(1),
-                accelerator="Ctrl+2"
-            )
+    def create_settings_tab(self):
+        """ایجاد تب تنظیمات"""
+        self.settings_tab = SettingsManager(
+            self.main_notebook,
+            self.client_config
+        )
+        self.main_notebook.add(
+            self.settings_tab,
+            text=self._("Settings"),
+            image=self.assets.get_icon('settings'),
+            compound=tk.LEFT
+        )
 
-            self.view_menu.add_command(
-                label=self._("Details View"),
-                command=lambda: self.explorer_tab.notebook.select(2),
-                accelerator="Ctrl+3"
-            )
+    def create_status_bar(self):
+        """ایجاد نوار وضعیت پیشرفته"""
+        self.status_bar = ttk.Frame(self.root)
+        self.status_bar.pack(fill=tk.X, padx=5, pady=(0, 5))
 
-            self.menubar.add_cascade(label=self._("View"), menu=self.view_menu)
+        # پیام وضعیت
+        self.status_var = tk.StringVar()
+        self.status_var.set(self._("Ready"))
 
-            # منوی ابزارها
-            self.tools_menu = tk.Menu(self.menubar, tearoff=0)
-            self.tools_menu.add_command(
-                label=self._("Connect to Drive"),
-                command=self.connect_to_drive,
-                image=self.assets.get_icon('drive'),
-                compound=tk.LEFT,
-                accelerator="Ctrl+D"
-            )
-            self.tools_menu.add_command(
-                label=self._("Batch Operations"),
-                command=self.show_batch_operations,
-                image=self.assets.get_icon('edit'),
-                compound=tk.LEFT
-            )
-            self.menubar.add_cascade(label=self._("Tools"), menu=self.tools_menu)
-
-            # منوی کمک
-            self.help_menu = tk.Menu(self.menubar, tearoff=0)
-            self.help_menu.add_command(
-                label=self._("Documentation"),
-                command=self.show_documentation,
-                image=self.assets.get_icon('info'),
-                compound=tk.LEFT
-            )
-            self.help_menu.add_command(
-                label=self._("About"),
-                command=self.show_about,
-                image=self.assets.get_icon('info'),
-                compound=tk.LEFT,
-                accelerator="F1"
-            )
-            self.menubar.add_cascade(label=self._("Help"), menu=self.help_menu)
+        ttk.Label(
+            self.status_bar,
+            textvariable=self.status_var,
+            relief=tk.SUNKEN,
+            anchor=tk.W
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-            # منوی زبان
-            self.lang_menu = tk.Menu(self.menubar, tearoff=0)
-            self.lang_menu.add_command(
-                label="English",
-                command=lambda: self.change_language("en")
-            )
-            self.lang_menu.add_command(
-                label="فارسی",
-                command=lambda: self.change_language("fa")
-            )
-            self.menubar.add_cascade(label=self._("Language"), menu=self.lang_menu)
+        # وضعیت اتصال
+        self.connection_status = ttk.Label(
+            self.status_bar,
+            text=self._("Not Connected"),
+            relief=tk.SUNKEN,
+            width=20
+        )
+        self.connection_status.pack(side=tk.RIGHT)
 
-            self.root.config(menu=self.menubar)
+        # اطلاعات کاربر
+        self.user_status = ttk.Label(
+            self.status_bar,
+            text=self._("User: Not logged in"),
+            relief=tk.SUNKEN,
+            width=30
+        )
+        self.user_status.pack(side=tk.RIGHT)
 
-        def create_main_notebook(self):
-            """ایجاد نوت‌بوک اصلی"""
-            self.main_notebook = ttk.Notebook(self.root)
-            self.main_notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+    def change_language(self, lang_code):
+        """تغییر زبان برنامه"""
+        if self.lang.set_language(lang_code):
+            self.update_ui_texts()
 
-            # ایجاد تب‌ها
-            self.create_drive_explorer_tab()
-            self.create_upload_tab()
-            self.create_settings_tab()
+            if self.lang.get_direction() == "rtl":
+                self.root.tk.call('tk', 'scaling', 1.5)
+            else:
+                self.root.tk.call('tk', 'scaling', 1.0)
+
+    def update_ui_texts(self):
+        """به‌روزرسانی متون رابط کاربری پس از تغییر زبان"""
+        self.root.title(self._("SfileCloud Professional"))
+
+        # به‌روزرسانی منوها
+        self.menubar.entryconfig(0, label=self._("File"))
+        self.file_menu.entryconfig(0, label=self._("New Upload"))
+        self.file_menu.entryconfig(1, label=self._("Open Folder"))
+        self.file_menu.entryconfig(3, label=self._("Exit"))
+
+        self.menubar.entryconfig(1, label=self._("Edit"))
+        self.edit_menu.entryconfig(0, label=self._("Copy"))
+        self.edit_menu.entryconfig(1, label=self._("Paste"))
+        self.edit_menu.entryconfig(3, label=self._("Refresh"))
+
+        self.menubar.entryconfig(2, label=self._("View"))
+        self.view_menu.entryconfig(0, label=self._("Theme"))
+        self.view_menu.entryconfig(2, label=self._("List View"))
+        self.view_menu.entryconfig(3, label=self._("Thumbnail View"))
+        self.view_menu.entryconfig(4, label=self._("Details View"))
+
+        self.menubar.entryconfig(3, label=self._("Tools"))
+        self.tools_menu.entryconfig(0, label=self._("Connect to Drive"))
+        self.tools_menu.entryconfig(1, label=self._("Batch Operations"))
+
+        self.menubar.entryconfig(4, label=self._("Help"))
+        self.help_menu.entryconfig(0, label=self._("Documentation"))
+        self.help_menu.entryconfig(1, label=self._("About"))
+
+        self.menubar.entryconfig(5, label=self._("Language"))
+
+        # به‌روزرسانی تب‌ها
+        self.main_notebook.tab(0, text=self._("Drive Explorer"))
+        self.main_notebook.tab(1, text=self._("Upload Files"))
+        self.main_notebook.tab(2, text=self._("Settings"))
+
+        # به‌روزرسانی نوار وضعیت
+        self.status_var.set(self._("Ready"))
+        self.connection_status.config(text=self._("Not Connected"))
+        self.user_status.config(text=self._("User: Not logged in"))
+
+    def change_theme(self, theme_name):
+        """تغییر تم برنامه"""
+        if theme_name in self.available_themes:
+            self.theme_mode = theme_name
+            self.style.theme_use(theme_name)
+
+    def new_upload(self):
+        """شروع یک آپلود جدید"""
+        self.main_notebook.select(self.upload_tab)
+
+    def open_local_folder(self):
+        """باز کردن پوشه محلی"""
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            try:
+                if platform.system() == "Windows":
+                    os.startfile(folder_path)
+                elif platform.system() == "Darwin":
+                    os.system(f"open {folder_path}")
+                else:
+                    os.system(f"xdg-open {folder_path}")
+            except:
+                Messagebox.show_error(
+                    self._("Could not open folder"),
+                    self._("Error")
+                )
 
-        def create_drive_explorer_tab(self):
-            """ایجاد تب مرورگر درایو"""
-            self.explorer_tab = ModernFileBrowser(
-                self.main_notebook,
-                self.file_manager
-            )
-            self.main_notebook.add(
-                self.explorer_tab,
-                text=self._("Drive Explorer"),
-                image=self.assets.get_icon('drive'),
-                compound=tk.LEFT
-            )
+    def refresh_files(self):
+        """بارگذاری مجدد فایل‌ها"""
+        if hasattr(self, 'explorer_tab'):
+            self.explorer_tab.refresh_files()
 
-        def create_upload_tab(self):
-            """ایجاد تب آپلود فایل‌ها"""
-            self.upload_tab = UploadManager(
-                self.main_notebook,
-                self.file_manager
-            )
-            self.main_notebook.add(
-                self.upload_tab,
-                text=self._("Upload Files"),
-                image=self.assets.get_icon('upload'),
-                compound=tk.LEFT
-            )
+    def connect_to_drive(self):
+        """اتصال به گوگل درایو"""
+        auth_window = ModernAuthWindow(
+            self.root,
+            self.start_auth,
+        )
 
-        def create_settings_tab(self):
-            """ایجاد تب تنظیمات"""
-            self.settings_tab = SettingsManager(
-                self.main_notebook,
-                self.client_config
-            )
-            self.main_notebook.add(
-                self.settings_tab,
-                text=self._("Settings"),
-                image=self.assets.get_icon('settings'),
-                compound=tk.LEFT
-            )
+    def start_auth(self):
+        """شروع فرآیند احراز هویت"""
+        auth_url = (
+            f"{self.client_config['installed']['auth_uri']}?"
+            f"client_id={self.client_config['installed']['client_id']}&"
+            f"redirect_uri={self.client_config['installed']['redirect_uris'][0]}&"
+            f"response_type=code&"
+            f"scope=https://www.googleapis.com/auth/drive&"
+            f"access_type=offline&"
+            f"prompt=consent"
+        )
 
-        def create_status_bar(self):
-            """ایجاد نوار وضعیت پیشرفته"""
-            self.status_bar = ttk.Frame(self.root)
-            self.status_bar.pack(fill=tk.X, padx=5, pady=(0, 5))
+        webbrowser.open(auth_url)
 
-            # پیام وضعیت
-            self.status_var = tk.StringVar()
-            self.status_var.set(self._("Ready"))
+        # نمایش دیالوگ برای وارد کردن کد احراز هویت
+        auth_code = Querybox.get_string(
+            prompt=self._("Please enter the authentication code from Google:"),
+            title=self._("Google Authentication"),
+            parent=self.root
+        )
 
-            ttk.Label(
-                self.status_bar,
-                textvariable=self.status_var,
-                relief=tk.SUNKEN,
-                anchor=tk.W
-            ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        if auth_code:
+            self.status_var.set(self._("Connecting to Google Drive..."))
+            threading.Thread(
+                target=self._perform_auth,
+                args=(auth_code,),
+                daemon=True
+            ).start()
 
-            # وضعیت اتصال
-            self.connection_status = ttk.Label(
-                self.status_bar,
-                text=self._("Not Connected"),
-                relief=tk.SUNKEN,
-                width=20
-            )
-            self.connection_status.pack(side=tk.RIGHT)
-
-            # اطلاعات کاربر
-            self.user_status = ttk.Label(
-                self.status_bar,
-                text=self._("User: Not logged in"),
-                relief=tk.SUNKEN,
-                width=30
+    def _perform_auth(self, auth_code):
+        """تبادل کد احراز هویت در پس‌زمینه و ارسال نتیجه به thread رابط کاربری"""
+        try:
+            if self.file_manager.authenticate(auth_code):
+                self.ui.post(self._on_auth_success)
+        except Exception as e:
+            self.ui.post(
+                Messagebox.show_error,
+                self._("Authentication failed: {}").format(str(e)),
+                self._("Error")
             )
-            self.user_status.pack(side=tk.RIGHT)
+            self.ui.post(self.status_var.set, self._("Ready"))
 
-        def change_language(self, lang_code):
-            """تغییر زبان برنامه"""
-            if self.lang.set_language(lang_code):
-                self.update_ui_texts()
+    def _restore_session(self):
+        try:
+            restored = self.file_manager.restore_session()
+        except Exception as e:
+            logger.error(f"Error restoring saved session: {e}")
+            return
 
-                if self.lang.get_direction() == "rtl":
-                    self.root.tk.call('tk', 'scaling', 1.5)
-                else:
-                    self.root.tk.call('tk', 'scaling', 1.0)
-
-        def update_ui_texts(self):
-            """به‌روزرسانی متون رابط کاربری پس از تغییر زبان"""
-            self.root.title(self._("SfileCloud Professional"))
-
-            # به‌روزرسانی منوها
-            self.menubar.entryconfig(0, label=self._("File"))
-            self.file_menu.entryconfig(0, label=self._("New Upload"))
-            self.file_menu.entryconfig(1, label=self._("Open Folder"))
-            self.file_menu.entryconfig(3, label=self._("Exit"))
-
-            self.menubar.entryconfig(1, label=self._("Edit"))
-            self.edit_menu.entryconfig(0, label=self._("Copy"))
-            self.edit_menu.entryconfig(1, label=self._("Paste"))
-            self.edit_menu.entryconfig(3, label=self._("Refresh"))
-
-            self.menubar.entryconfig(2, label=self._("View"))
-            self.view_menu.entryconfig(0, label=self._("Theme"))
-            self.view_menu.entryconfig(2, label=self._("List View"))
-            self.view_menu.entryconfig(3, label=self._("Thumbnail View"))
-            self.view_menu.entryconfig(4, label=self._("Details View"))
-
-            self.menubar.entryconfig(3, label=self._("Tools"))
-            self.tools_menu.entryconfig(0, label=self._("Connect to Drive"))
-            self.tools_menu.entryconfig(1, label=self._("Batch Operations"))
-
-            self.menubar.entryconfig(4, label=self._("Help"))
-            self.help_menu.entryconfig(0, label=self._("Documentation"))
-            self.help_menu.entryconfig(1, label=self._("About"))
-
-            self.menubar.entryconfig(5, label=self._("Language"))
-
-            # به‌روزرسانی تب‌ها
-            self.main_notebook.tab(0, text=self._("Drive Explorer"))
-            self.main_notebook.tab(1, text=self._("Upload Files"))
-            self.main_notebook.tab(2, text=self._("Settings"))
-
-            # به‌روزرسانی نوار وضعیت
-            self.status_var.set(self._("Ready"))
-            self.connection_status.config(text=self._("Not Connected"))
-            self.user_status.config(text=self._("User: Not logged in"))
-
-        def change_theme(self, theme_name):
-            """تغییر تم برنامه"""
-            if theme_name in self.available_themes:
-                self.theme_mode = theme_name
-                self.style.theme_use(theme_name)
-
-        def new_upload(self):
-            """شروع یک آپلود جدید"""
-            self.main_notebook.select(self.upload_tab)
-
-        def open_local_folder(self):
-            """باز کردن پوشه محلی"""
-            folder_path = filedialog.askdirectory()
-            if folder_path:
-                try:
-                    if platform.system() == "Windows":
-                        os.startfile(folder_path)
-                    elif platform.system() == "Darwin":
-                        os.system(f"open {folder_path}")
-                    else:
-                        os.system(f"xdg-open {folder_path}")
-                except:
-                    Messagebox.show_error(
-                        self._("Could not open folder"),
-                        self._("Error")
-                    )
+        if restored:
+            self.ui.post(self._on_auth_success, False)
 
-        def refresh_files(self):
-            """بارگذاری مجدد فایل‌ها"""
-            if hasattr(self, 'explorer_tab'):
-                self.explorer_tab.refresh_files()
+    def _on_auth_success(self, notify=True):
+        """به‌روزرسانی رابط کاربری پس از اتصال موفق"""
+        self.connection_status.config(text=self._("Connected"))
+        self.user_status.config(text=f"User: {self.file_manager.user_info.get('name', 'Unknown')}")
+        self.status_var.set(self._("Ready"))
 
-        def connect_to_drive(self):
-            """اتصال به گوگل درایو"""
-            auth_window = ModernAuthWindow(
-                self.root,
-                self.start_auth,
-            )
+        # به‌روزرسانی لیست نمایش داده شده از کش
+        self.explorer_tab.load_files()
+        self.explorer_tab.update_storage_info()
 
-        def start_auth(self):
-            """شروع فرآیند احراز هویت"""
-            auth_url = (
-                f"{self.client_config['installed']['auth_uri']}?"
-                f"client_id={self.client_config['installed']['client_id']}&"
-                f"redirect_uri={self.client_config['installed']['redirect_uris'][0]}&"
-                f"response_type=code&"
-                f"scope=https://www.googleapis.com/auth/drive&"
-                f"access_type=offline&"
-                f"prompt=consent"
+        # شروع پیگیری تغییرات در پس‌زمینه
+        self.file_manager.changes.start()
+        if notify:
+            Messagebox.show_info(
+                self._("Successfully connected to Google Drive"),
+                self._("Success")
             )
 
-            webbrowser.open(auth_url)
-
-            # نمایش دیالوگ برای وارد کردن کد احراز هویت
-            auth_code = Querybox.get_string(
-                prompt=self._("Please enter the authentication code from Google:"),
-                title=self._("Google Authentication"),
-                parent=self.root
+    def show_batch_operations(self):
+        """نمایش عملیات گروهی روی آیتم‌های انتخاب شده در مرورگر درایو"""
+        browser = self.explorer_tab
+        files = browser.get_selected_files()
+        if not files:
+            Messagebox.show_warning(
+                self._("Select one or more items in Drive Explorer first"),
+                self._("Batch Operations")
             )
+            return
 
-            if auth_code:
-                try:
-                    if self.file_manager.authenticate(auth_code):
-                        self.connection_status.config(text=self._("Connected"))
-                        self.user_status.config(text=f"User: {self.file_manager.user_info.get('name', 'Unknown')}")
-                        Messagebox.show_info(
-                            self._("Successfully connected to Google Drive"),
-                            self._("Success")
-                        )
-                except Exception as e:
-                    Messagebox.show_error(
-                        self._("Authentication failed: {}").format(str(e)),
-                        self._("Error")
-                    )
+        window = tk.Toplevel(self.root)
+        window.title(self._("Batch Operations"))
+        window.resizable(False, False)
+        window.transient(self.root)
+
+        ttk.Label(
+            window,
+            text=self._("{} items selected").format(len(files)),
+            font=("Helvetica", 11, "bold")
+        ).pack(padx=20, pady=(15, 10))
+
+        actions = [
+            (self._("Download"), 'download', browser.download_selected, "primary"),
+            (self._("Rename"), 'edit', lambda: browser.rename_many(files), "secondary"),
+            (self._("Share"), 'share', browser.share_selected, "info"),
+            (self._("Delete"), 'delete', browser.delete_selected, "danger"),
+        ]
+        for text, icon, command, style in actions:
+            ttk.Button(
+                window,
+                text=text,
+                image=self.assets.get_icon(icon),
+                compound=tk.LEFT,
+                bootstyle=style,
+                width=20,
+                command=lambda c=command: (window.destroy(), c())
+            ).pack(padx=20, pady=3)
+
+        ttk.Button(
+            window,
+            text=self._("Close"),
+            command=window.destroy
+        ).pack(padx=20, pady=(10, 15))
+
+    def show_documentation(self):
+        """نمایش مستندات"""
+        webbrowser.open("https://github.com/Kaspian021/SfileColud/wiki")
+
+    def show_about(self):
+        """نمایش پنجره درباره برنامه"""
+        about_window = ModernAboutWindow(self.root)
+
+    def get_selected_item(self):
+        """دریافت آیتم انتخاب شده"""
+        if hasattr(self, 'explorer_tab'):
+            selected = self.explorer_tab.file_list.selection()
+            if selected:
+                file = self.explorer_tab.get_file(selected[0])
+                return file['name'] if file else None
+        return None
 
-        def show_batch_operations(self):
-            """نمایش عملیات گروهی"""
+    def handle_paste(self, content):
+        """مدیریت عملیات چسباندن"""
+        if content:
             Messagebox.show_info(
-                self._("This feature will be implemented in a future version"),
-                self._("Info")
+                f"Pasted content: {content}",
+                "Paste"
             )
 
-        def show_documentation(self):
-            """نمایش مستندات"""
-            webbrowser.open("https://github.com/Kaspian021/SfileColud/wiki")
+    def load_settings(self):
+        """بارگذاری تنظیمات برنامه"""
+        try:
+            if os.path.exists('config.json'):
+                with open('config.json', 'r') as f:
+                    self.client_config = json.load(f)
 
-        def show_about(self):
-            """نمایش پنجره درباره برنامه"""
-            about_window = ModernAboutWindow(self.root)
+            # به‌روزرسانی مدیر فایل
+            self.file_manager.client_config = self.client_config
 
-        def get_selected_item(self):
-            """دریافت آیتم انتخاب شده"""
-            if hasattr(self, 'explorer_tab'):
-                selected = self.explorer_tab.tree.selection()
-                if selected:
-                    return self.explorer_tab.tree.item(selected[0], 'values')[0]
-            return None
+            # به‌روزرسانی تب تنظیمات
+            if hasattr(self, 'settings_tab'):
+                self.settings_tab.client_id_entry.delete(0, tk.END)
+                self.settings_tab.client_id_entry.insert(0, self.client_config["installed"]["client_id"])
 
-        def handle_paste(self, content):
-            """مدیریت عملیات چسباندن"""
-            if content:
-                Messagebox.show_info(
-                    f"Pasted content: {content}",
-                    "Paste"
-                )
+                self.settings_tab.client_secret_entry.delete(0, tk.END)
+                self.settings_tab.client_secret_entry.insert(0, self.client_config["installed"]["client_secret"])
 
-        def load_settings(self):
-            """بارگذاری تنظیمات برنامه"""
-            try:
-                if os.path.exists('config.json'):
-                    with open('config.json', 'r') as f:
-                        self.client_config = json.load(f)
+                self.settings_tab.redirect_entry.delete(0, tk.END)
+                self.settings_tab.redirect_entry.insert(0, self.client_config["installed"]["redirect_uris"][0])
+
+            logger.info("Settings loaded successfully")
+        except FileNotFoundError:
+            logger.info("No saved settings found")
+        except Exception as e:
+            logger.error(f"Error loading settings: {e}")
+            Messagebox.show_error(
+                self._("Could not load settings: {}").format(str(e)),
+                self._("Error")
+            )
 
-                # به‌روزرسانی مدیر فایل
-                self.file_manager.client_config = self.client_config
 
-                # به‌روزرسانی تب تنظیمات
-                if hasattr(self, 'settings_tab'):
-                    self.settings_tab.client_id_entry.delete(0, tk.END)
-                    self.settings_tab.client_id_entry.insert(0, self.client_config["installed"]["client_id"])
+if __name__ == "__main__":
+    # در نسخه frozen (PyInstaller) processهای فرزند نباید دوباره رابط کاربری را اجرا کنند
+    multiprocessing.freeze_support()
 
-                    self.settings_tab.client_secret_entry.delete(0, tk.END)
-                    self.settings_tab.client_secret_entry.insert(0, self.client_config["installed"]["client_secret"])
+    # فراخوانی تابع تنظیم لاگ‌گیری
+    setup_logging()
 
-                    self.settings_tab.redirect_entry.delete(0, tk.END)
-                    self.settings_tab.redirect_entry.insert(0, self.client_config["installed"]["redirect_uris"][0])
+    # حالا می‌توانید از ماژول logging به صورت معمول استفاده کنید
+    logging.info("This is a test log message with UTF-8 characters: üöäç")
 
-                logger.info("Settings loaded successfully")
-            except FileNotFoundError:
-                logger.info("No saved settings found")
-            except Exception as e:
-                logger.error(f"Error loading settings: {e}")
-                Messagebox.show_error(
-                    self._("Could not load settings: {}").format(str(e)),
-                    self._("Error")
-                )
+    # بارگذاری متغیرهای محیطی
+    load_dotenv()
 
-    if __name__ == "__main__":
-        try:
-            # ایجاد پنجره اصلی
-            root = tk.Tk()
+    try:
+        # ایجاد پنجره اصلی
+        root = tk.Tk()
 
-            # مخفی کردن پنجره اصلی تا زمانی که splash نمایش داده شود
-            root.withdraw()
+        # مخفی کردن پنجره اصلی تا زمانی که splash نمایش داده شود
+        root.withdraw()
 
-            # تنظیم تم
-            style = Style(theme="flatly")
+        # تنظیم تم
+        style = Style(theme="flatly")
 
-            # ایجاد برنامه
-            app = EnhancedSfileCloud(root)
+        # ایجاد برنامه
+        app = EnhancedSfileCloud(root)
 
-            # اجرای حلقه اصلی
-            root.mainloop()
+        # اجرای حلقه اصلی
+        root.mainloop()
 
-        except Exception as e:
-            logger.error(f"Application error: {e}")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
\ No newline at end of file
+    except Exception as e:
+        logger.error(f"Application error: {e}")
+        messagebox.showerror("Error", f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# کش برنامه (metadata.db، credentials.json و ...) در پوشه موقت ساخته می‌شود
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='sfilecloud-tests-')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
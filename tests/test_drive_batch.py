@@ -0,0 +1,130 @@
+import json
+import types
+
+from SfileColud import DriveBatch
+
+
+class FakeResponse:
+    def __init__(self, status_code, content_type='', text=''):
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type}
+        self.text = text
+
+
+def multipart_response(boundary, parts):
+    """ساخت پاسخ batch؛ parts لیست (content_id, status, body)"""
+    lines = []
+    for content_id, status, body in parts:
+        lines += [
+            f"--{boundary}",
+            "Content-Type: application/http",
+            f"Content-ID: <response-{content_id}>",
+            "",
+            f"HTTP/1.1 {status} OK",
+            "Content-Type: application/json; charset=UTF-8",
+            "",
+            json.dumps(body) if body is not None else "",
+        ]
+    lines.append(f"--{boundary}--")
+    return "\r\n".join(lines)
+
+
+def make_manager(post):
+    return types.SimpleNamespace(
+        access_token='token',
+        retry_count=3,
+        retry_delay=0,
+        http=types.SimpleNamespace(post=post),
+        _refresh_token=lambda *args: True
+    )
+
+
+def test_build_body():
+    batch = DriveBatch(make_manager(None))
+    batch.add('DELETE', 'files/a')
+    batch.add('PATCH', 'files/b', body={'name': 'new'}, params={'fields': 'id,name'})
+
+    body = batch._build_body([0, 1], 'xyz')
+    parts = body.split('\r\n')
+
+    assert parts[0] == '--xyz'
+    assert 'Content-ID: <item-0>' in parts
+    assert 'DELETE /drive/v3/files/a HTTP/1.1' in parts
+    assert 'Content-ID: <item-1>' in parts
+    assert 'PATCH /drive/v3/files/b?fields=id%2Cname HTTP/1.1' in parts
+    assert json.dumps({'name': 'new'}) in parts
+    assert parts[-1] == '--xyz--'
+
+
+def test_parse_response():
+    text = multipart_response('batch_abc', [
+        ('item-1', 404, {'error': {'message': 'not found'}}),
+        ('item-0', 200, {'id': 'a'}),
+        ('item-2', 204, None),
+    ])
+
+    results = DriveBatch._parse_response('multipart/mixed; boundary=batch_abc', text)
+
+    assert results == {
+        '0': (200, {'id': 'a'}),
+        '1': (404, {'error': {'message': 'not found'}}),
+        '2': (204, None),
+    }
+
+
+def test_parse_response_quoted_boundary_and_plain_text_body():
+    text = "--b1\nContent-ID: <response-item-0>\n\nHTTP/1.1 500 Error\n\nbackend error\n--b1--"
+
+    results = DriveBatch._parse_response('multipart/mixed; boundary="b1"', text)
+
+    assert results == {'0': (500, {'error': {'message': 'backend error'}})}
+
+
+def test_execute_retries_only_failed_parts():
+    requests_sent = []
+
+    def post(url, headers=None, data=None):
+        boundary = headers['Content-Type'].split('boundary=')[1]
+        paths = [line.split()[1] for line in data.decode('utf-8').split('\r\n') if line.endswith('HTTP/1.1')]
+        requests_sent.append(paths)
+
+        parts = []
+        for position, path in enumerate(paths):
+            # اولین ارسال files/b با محدودیت نرخ مواجه می‌شود
+            if path.endswith('/b') and len(requests_sent) == 1:
+                parts.append((f'item-{position}', 429, {'error': {'message': 'rate limit'}}))
+            else:
+                parts.append((f'item-{position}', 200, {'id': path.rsplit('/', 1)[-1]}))
+        return FakeResponse(200, f'multipart/mixed; boundary={boundary}', multipart_response(boundary, parts))
+
+    batch = DriveBatch(make_manager(post))
+    for file_id in ('a', 'b', 'c'):
+        batch.add('GET', f'files/{file_id}')
+
+    results = batch.execute()
+
+    assert results == [(200, {'id': 'a'}), (200, {'id': 'b'}), (200, {'id': 'c'})]
+    assert requests_sent == [
+        ['/drive/v3/files/a', '/drive/v3/files/b', '/drive/v3/files/c'],
+        ['/drive/v3/files/b'],
+    ]
+
+
+def test_execute_splits_large_batches():
+    sizes = []
+
+    def post(url, headers=None, data=None):
+        boundary = headers['Content-Type'].split('boundary=')[1]
+        count = data.decode('utf-8').count('HTTP/1.1')
+        sizes.append(count)
+        parts = [(f'item-{position}', 200, {}) for position in range(count)]
+        return FakeResponse(200, f'multipart/mixed; boundary={boundary}', multipart_response(boundary, parts))
+
+    batch = DriveBatch(make_manager(post))
+    for position in range(DriveBatch.max_batch_size + 5):
+        batch.add('DELETE', f'files/{position}')
+
+    results = batch.execute()
+
+    assert sizes == [DriveBatch.max_batch_size, 5]
+    assert all(status == 200 for status, _ in results)
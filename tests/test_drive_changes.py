@@ -0,0 +1,98 @@
+import time
+
+from SfileColud import EnhancedDriveFileManager
+
+FOLDER = 'application/vnd.google-apps.folder'
+
+CLIENT_CONFIG = {'installed': {
+    'client_id': 'a', 'client_secret': 'b', 'redirect_uris': ['x'],
+    'token_uri': 't', 'auth_uri': 'u'
+}}
+
+
+def make_manager():
+    manager = EnhancedDriveFileManager(CLIENT_CONFIG)
+    manager.root_id = 'real-root'
+    return manager
+
+
+def cache_listing(manager, folder_id, files):
+    manager.index.add_many(files, folder_id)
+    manager.file_cache[folder_id] = (files, time.time())
+    manager.store.save_listing(folder_id, files)
+
+
+def names(manager, folder_id):
+    return [f['name'] for f in manager.file_cache[folder_id][0]]
+
+
+def test_merged_listing_keeps_folder_name_order():
+    manager = make_manager()
+    cache_listing(manager, 'root', [
+        {'id': 'd1', 'name': 'Docs', 'mimeType': FOLDER},
+        {'id': 'f1', 'name': 'alpha.txt', 'mimeType': 'text/plain'},
+        {'id': 'f2', 'name': 'zeta.txt', 'mimeType': 'text/plain'},
+    ])
+
+    manager.apply_change({'fileId': 'd2', 'file': {
+        'id': 'd2', 'name': 'Archive', 'mimeType': FOLDER, 'parents': ['real-root']}})
+    manager.apply_change({'fileId': 'f3', 'file': {
+        'id': 'f3', 'name': 'beta.txt', 'mimeType': 'text/plain', 'parents': ['real-root']}})
+
+    assert names(manager, 'root') == ['Archive', 'Docs', 'alpha.txt', 'beta.txt', 'zeta.txt']
+
+
+def test_change_for_unknown_file_removes_it_from_all_listings():
+    manager = make_manager()
+    cache_listing(manager, 'root', [{'id': 'f1', 'name': 'a.txt', 'mimeType': 'text/plain'}])
+    cache_listing(manager, 'other', [{'id': 'f2', 'name': 'b.txt', 'mimeType': 'text/plain'}])
+    # فایل در ایندکس نیست، مثلاً پس از راه‌اندازی دوباره برنامه
+    manager.index.remove('f1')
+    manager.index.remove('f2')
+
+    manager.apply_change({'fileId': 'f1', 'removed': True})
+    manager.apply_change({'fileId': 'f2', 'file': {
+        'id': 'f2', 'name': 'b.txt', 'mimeType': 'text/plain', 'parents': ['elsewhere']}})
+
+    assert names(manager, 'root') == []
+    assert names(manager, 'other') == []
+    assert manager.store.load_listing_ids('other') == []
+
+
+def test_tracked_listing_expires_when_polls_fail():
+    manager = make_manager()
+    manager.changes._set_tracking_since(time.time() - 1000)
+    timestamp = time.time() - manager.cache_expiry - 1
+
+    manager.changes.last_success = time.time()
+    assert manager.is_listing_fresh(timestamp)
+
+    manager.changes.last_success = time.time() - manager.cache_expiry - 1
+    assert not manager.is_listing_fresh(timestamp)
+
+
+def test_unknown_parent_updates_every_listing_holding_the_file():
+    manager = make_manager()
+    cache_listing(manager, 'root', [{'id': 'f1', 'name': 'a.txt', 'mimeType': 'text/plain'}])
+    cache_listing(manager, 'other', [
+        {'id': 'f1', 'name': 'a.txt', 'mimeType': 'text/plain'},
+        {'id': 'f2', 'name': 'b.txt', 'mimeType': 'text/plain'},
+    ])
+    manager.current_folder_id = 'current'
+    cache_listing(manager, 'current', [{'id': 'f3', 'name': 'c.txt', 'mimeType': 'text/plain'}])
+
+    manager._update_cached_listing(None, 'f2', {'id': 'f2', 'name': 'z.txt', 'mimeType': 'text/plain'})
+    manager._update_cached_listing(None, 'f1', None)
+
+    assert names(manager, 'root') == []
+    assert names(manager, 'other') == ['z.txt']
+    assert names(manager, 'current') == ['c.txt']
+
+
+def test_parent_lookup_maps_real_root_id():
+    manager = make_manager()
+    manager.get_file_info = lambda file_id, fields=None: {'id': file_id, 'parents': ['real-root']}
+    assert manager.get_parent_id('unknown') == 'root'
+
+    manager.get_file_info = lambda file_id, fields=None: {'id': file_id}
+    assert manager.get_parent_id('shared') is None
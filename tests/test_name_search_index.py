@@ -0,0 +1,80 @@
+from SfileColud import NameSearchIndex
+
+
+def make_index(names):
+    index = NameSearchIndex()
+    for file_id, name in names.items():
+        index.add(file_id, name)
+    return index
+
+
+def test_matches_all_terms_case_insensitively():
+    index = make_index({
+        'a': 'Annual Report 2024.pdf',
+        'b': 'annual budget.xlsx',
+        'c': 'REPORT draft.docx',
+    })
+
+    assert set(index.search('report')) == {'a', 'c'}
+    assert index.search('ANNUAL report') == ['a']
+    assert index.search('missing') == []
+    assert index.search('   ') == []
+
+
+def test_short_queries_match_word_prefixes():
+    index = make_index({'a': 'ab.txt', 'b': 'xyz', 'c': 'b'})
+
+    assert index.search('b') == ['c']
+    assert index.search('ab') == ['a']
+    assert index.search('t') == ['a']
+    assert index.search('yz') == []
+
+
+def test_ranking():
+    index = make_index({
+        'contains': 'old notes backup',
+        'word': 'my notes',
+        'prefix': 'notes 2024',
+        'exact': 'notes',
+    })
+
+    assert index.search('notes') == ['exact', 'prefix', 'word', 'contains']
+
+
+def test_word_boundary_beats_shorter_substring_match():
+    index = make_index({
+        'inside': 'semifinal.doc',
+        'word': 'draft-final report.docx',
+    })
+
+    assert index.search('final') == ['word', 'inside']
+    assert index.search('report final') == ['word']
+
+
+def test_limit():
+    index = make_index({str(i): f'photo {i:03}.jpg' for i in range(50)})
+
+    results = index.search('photo', limit=5)
+
+    assert results == ['0', '1', '2', '3', '4']
+
+
+def test_rename_and_remove_update_postings():
+    index = make_index({'a': 'holiday.jpg'})
+
+    index.add('a', 'work.jpg')
+    assert index.search('holiday') == []
+    assert index.search('work') == ['a']
+    assert not any('a' in ids for gram, ids in index.postings.items() if gram in NameSearchIndex.trigrams('holiday'))
+
+    index.remove('a')
+    assert index.search('work') == []
+    assert index.postings == {}
+    assert index.prefixes == {}
+    assert index.names == {}
+
+
+def test_whitespace_is_normalized():
+    index = make_index({'a': 'My   Big\tFile'})
+
+    assert index.search('my big file') == ['a']
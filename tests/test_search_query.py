@@ -0,0 +1,67 @@
+import pytest
+
+from SfileColud import EnhancedDriveFileManager
+
+CLIENT_CONFIG = {
+    'installed': {
+        'client_id': 'client-id',
+        'client_secret': 'client-secret',
+        'redirect_uris': ['http://localhost'],
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'auth_uri': 'https://accounts.google.com/o/oauth2/auth'
+    }
+}
+
+
+@pytest.fixture(scope='module')
+def manager():
+    file_manager = EnhancedDriveFileManager(CLIENT_CONFIG)
+    yield file_manager
+    file_manager.http.close()
+
+
+def test_plain_words(manager):
+    query, full_text = manager.build_search_query('annual report')
+    assert query == "trashed = false and name contains 'annual' and name contains 'report'"
+    assert not full_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("don't", ["don't"]),
+    ("O'Brien notes", ["O'Brien", 'notes']),
+    ('"annual report" 2024', ['annual report', '2024']),
+    ('text:"quarterly plan"', ['text:quarterly plan']),
+    ('"unclosed phrase', ['unclosed phrase']),
+    ('a "" b', ['a', 'b']),
+])
+def test_split_search_terms(text, expected):
+    assert EnhancedDriveFileManager.split_search_terms(text) == expected
+
+
+def test_apostrophe_is_escaped(manager):
+    query, _ = manager.build_search_query("O'Brien")
+    assert query == "trashed = false and name contains 'O\\'Brien'"
+
+
+def test_filters(manager):
+    query, full_text = manager.build_search_query('type:PDF after:2024-01-31 before:2024-03-01 text:"budget plan"')
+    assert query == (
+        "trashed = false"
+        " and mimeType = 'application/pdf'"
+        " and modifiedTime >= '2024-01-31T00:00:00'"
+        " and modifiedTime < '2024-03-01T00:00:00'"
+        " and fullText contains 'budget plan'"
+    )
+    assert full_text
+
+
+def test_unknown_key_is_a_name_term(manager):
+    query, _ = manager.build_search_query('note:1 type:')
+    assert query == "trashed = false and name contains 'note:1' and name contains 'type:'"
+
+
+def test_invalid_filters(manager):
+    with pytest.raises(Exception):
+        manager.build_search_query('type:spaceship')
+    with pytest.raises(Exception):
+        manager.build_search_query('after:yesterday')
@@ -0,0 +1,95 @@
+import io
+import re
+import threading
+
+import pytest
+import requests
+
+from SfileColud import EnhancedDriveFileManager
+
+CLIENT_CONFIG = {'installed': {
+    'client_id': 'a', 'client_secret': 'b', 'redirect_uris': ['x'],
+    'token_uri': 't', 'auth_uri': 'u'
+}}
+
+DATA = bytes(range(256)) * 64
+
+
+class BrokenRaw(io.BytesIO):
+    """بدنه‌ای که پس از چند بایت قطع می‌شود"""
+
+    def readinto(self, buffer):
+        if self.tell():
+            raise requests.exceptions.ConnectionError("connection reset")
+        return super().readinto(memoryview(buffer)[:16])
+
+
+class FakeResponse:
+    def __init__(self, status_code, raw):
+        self.status_code = status_code
+        self.raw = raw
+        self.text = ''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class FakeHttp:
+    """پاسخ Range؛ failures تعداد قطع شدن هر بازه بر اساس شروع اولیه آن"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.ranges = []
+        self.lock = threading.Lock()
+
+    def media_get(self, url, headers=None, stream=None, timeout=None):
+        start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', headers['Range']).groups())
+        with self.lock:
+            self.ranges.append((start, end))
+            segment = next(s for s in sorted(self.failures, reverse=True) if s <= start)
+            fail = self.failures[segment] > 0
+            self.failures[segment] -= fail
+        body = DATA[start:end + 1]
+        return FakeResponse(206, BrokenRaw(body) if fail else io.BytesIO(body))
+
+
+def make_manager(http):
+    manager = EnhancedDriveFileManager(CLIENT_CONFIG)
+    manager.access_token = 'token'
+    manager.http = http
+    manager.retry_delay = 0
+    manager.progress_interval = 0.01
+    manager.segment_threshold = 1
+    manager.get_file_info = lambda file_id, fields=None: {
+        'id': file_id, 'size': str(len(DATA)), 'modifiedTime': 't'}
+    return manager
+
+
+def test_failed_segment_resumes_from_its_offset(tmp_path):
+    segment_size = len(DATA) // 4
+    http = FakeHttp({0: 0, segment_size: 1, 2 * segment_size: 0, 3 * segment_size: 0})
+    manager = make_manager(http)
+    save_path = str(tmp_path / 'out.bin')
+
+    list(manager.download_file('file-id', save_path, segments=4))
+
+    assert (tmp_path / 'out.bin').read_bytes() == DATA
+    # تلاش دوم بازه دوم از بایت‌های دریافت شده ادامه می‌یابد
+    assert (segment_size + 16, 2 * segment_size - 1) in http.ranges
+
+
+def test_segment_out_of_retries_fails_download(tmp_path):
+    segment_size = len(DATA) // 4
+    http = FakeHttp({0: 0, segment_size: 99, 2 * segment_size: 0, 3 * segment_size: 0})
+    manager = make_manager(http)
+    save_path = str(tmp_path / 'out.bin')
+
+    with pytest.raises(Exception, match='connection reset'):
+        list(manager.download_file('file-id', save_path, segments=4))
+
+    retries = [r for r in http.ranges if segment_size <= r[0] < 2 * segment_size]
+    assert len(retries) == manager.retry_count
+    assert (tmp_path / 'out.bin.part').exists()